@@ -0,0 +1,93 @@
+#bench_chunking.py
+# Chunking throughput on a large synthetic corpus (Vietnamese-like PDF pages and sectioned wiki pages):
+# reference string packer vs span engine vs "auto" (the default engine choice per strategy), in-process and
+# with CHUNK_WORKERS processes (capped at the CPU count, so on one CPU the sharded run stays in-process).
+# Fails if any configuration produces different chunks from the reference.
+#
+#   python benchmarks/bench_chunking.py [--pages 20000] [--workers 4] [--strategy paragraph] [--repeat 3]
+
+import os
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.chunking import Chunker
+
+WORDS = ("sao la", "voọc", "rừng", "nhiệt đới", "loài", "bảo tồn", "Việt Nam", "IUCN", "quần thể", "sinh cảnh",
+         "cực kỳ", "nguy cấp", "phân bố", "Trường Sơn", "1998", "km²", "cá thể", "săn bắt", "khu bảo tồn")
+
+
+def sentence(r: random.Random) -> str:
+    words = [r.choice(WORDS) for _ in range(r.randint(4, 30))]
+    return words[0].capitalize() + " " + " ".join(words[1:]) + r.choice((".", ".", ".", "!", "?"))
+
+
+def paragraph(r: random.Random) -> str:
+    # mostly short paragraphs, some very long ones (OCR'd pages often lose their blank lines)
+    n = r.randint(1, 6) if r.random() < 0.85 else r.randint(20, 80)
+    return " ".join(sentence(r) for _ in range(n))
+
+
+def synthetic_pages(n_pages: int, seed: int = 0) -> list:
+    r = random.Random(seed)
+    pages = []
+    for i in range(n_pages):
+        if i % 5 == 4:
+            parts = [paragraph(r)]
+            for s in range(r.randint(2, 6)):
+                parts.append(f"== Mục {s} ==")
+                parts.extend(paragraph(r) for _ in range(r.randint(1, 4)))
+            pages.append({"page": 1, "text": "\n\n".join(parts), "source": "wiki", "title": f"Loài {i}"})
+        else:
+            text = "\n\n".join(paragraph(r) for _ in range(r.randint(2, 10)))
+            pages.append({"page": i, "text": text, "source": "pdf", "title": f"sach_do_{i // 300}.pdf"})
+    return pages
+
+
+def timed(fn, repeat: int) -> tuple:
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return out, best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=20000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--strategy", default=None, help="paragraph | sentences | wiki_sections (default: all)")
+    ap.add_argument("--max-chars", type=int, default=Constants.CHUNK_MAX_CHARS)
+    ap.add_argument("--overlap", type=int, default=Constants.CHUNK_OVERLAP)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = synthetic_pages(args.pages)
+    mb = sum(len(p["text"].encode("utf-8")) for p in pages) / 1e6
+    print(f"{len(pages)} pages, {mb:.1f} MB of text, max_chars={args.max_chars}, overlap={args.overlap}")
+    for strategy in [args.strategy] if args.strategy else ["paragraph", "sentences", "wiki_sections"]:
+        kw = dict(strategy=strategy, max_chars=args.max_chars, overlap_chars=args.overlap)
+        ref, t_ref = timed(lambda: Chunker.make_chunks(pages, engine="strings", **kw), args.repeat)
+        runs = [("spans", lambda: Chunker.make_chunks(pages, engine="spans", **kw)),
+                ("auto", lambda: Chunker.make_chunks(pages, engine="auto", **kw))]
+        if min(args.workers, os.cpu_count() or 1) > 1:
+            runs.append((f"spans x{args.workers}",
+                         lambda: Chunker.make_chunks(pages, engine="spans", workers=args.workers, **kw)))
+        print(f"{strategy:14s} strings      {t_ref:7.2f} s  {mb / t_ref:6.1f} MB/s  chunks={len(ref)}")
+        for label, fn in runs:
+            out, dt = timed(fn, args.repeat)
+            if out != ref:
+                raise SystemExit(f"{strategy} {label}: chunks differ from the reference packer")
+            print(f"{strategy:14s} {label:12s} {dt:7.2f} s  {mb / dt:6.1f} MB/s  speedup={t_ref / dt:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
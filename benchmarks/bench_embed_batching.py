@@ -0,0 +1,55 @@
+#bench_embed_batching.py
+# Chunks/sec of Embedder with original-order batching vs length-bucketed batching
+# on the shipped data/*/chunks.jsonl files.
+#
+#   python benchmarks/bench_embed_batching.py [--model NAME] [--limit N] [--token-budget T]
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.utils import Utils
+from data.embedding import Embedder, ModelRegistry
+
+
+def padded_tokens(lengths: list, batches: list) -> tuple:
+    real = sum(lengths)
+    padded = sum(len(b) * max(lengths[i] for i in b) for b in batches)
+    return real, padded
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=Constants.EMBED_MODEL_NAME)
+    ap.add_argument("--batch-size", type=int, default=Constants.EMBED_BATCH_SIZE)
+    ap.add_argument("--token-budget", type=int, default=None)
+    ap.add_argument("--limit", type=int, default=None, help="max chunks per file")
+    args = ap.parse_args()
+
+    model = ModelRegistry.warm_up(args.model)
+    for path in sorted((ROOT_DIR / "data").glob("*/chunks.jsonl")):
+        chunks = Utils.load_jsonl(str(path))[:args.limit]
+        texts = [Utils.normalize_vi_text(c["text"]) for c in chunks]
+        lengths = Embedder._token_lengths(model, texts)
+        ordered = [list(range(i, min(i + args.batch_size, len(texts)))) for i in range(0, len(texts), args.batch_size)]
+        bucketed = Embedder._length_buckets(lengths, args.batch_size, args.token_budget)
+
+        print(f"\n{path.parent.name}: {len(texts)} chunks")
+        for name, batches, sort_flag in (("ordered", ordered, False), ("bucketed", bucketed, True)):
+            real, padded = padded_tokens(lengths, batches)
+            t0 = time.perf_counter()
+            Embedder._encode_texts(texts, args.model, args.batch_size,
+                                   sort_by_length=sort_flag, token_budget=args.token_budget)
+            dt = time.perf_counter() - t0
+            print(f"  {name:9s} {len(texts) / dt:8.1f} chunks/s  {dt:7.2f}s  "
+                  f"batches={len(batches):4d}  padding={1 - real / padded:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#bench_embed_workers.py
+# Scaling of multi-process CPU embedding: chunks/sec for increasing EMBED_WORKERS.
+#
+#   python benchmarks/bench_embed_workers.py [--workers 1,2,4,8] [--file data/data_files_paragraph/chunks.jsonl]
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.utils import Utils
+from data.embedding import Embedder
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=Constants.EMBED_MODEL_NAME)
+    ap.add_argument("--file", default=str(ROOT_DIR / "data" / "data_files_paragraph" / "chunks.jsonl"))
+    ap.add_argument("--workers", default="1,2,4,8")
+    ap.add_argument("--batch-size", type=int, default=Constants.EMBED_BATCH_SIZE)
+    ap.add_argument("--limit", type=int, default=None)
+    args = ap.parse_args()
+
+    chunks = Utils.load_jsonl(args.file)[:args.limit]
+    texts = [Utils.normalize_vi_text(c["text"]) for c in chunks]
+    print(f"{len(texts)} chunks from {args.file}, {os.cpu_count()} cpus")
+
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        t0 = time.perf_counter()
+        Embedder._encode_texts(texts, args.model, args.batch_size, workers=workers)
+        dt = time.perf_counter() - t0
+        rate = len(texts) / dt
+        baseline = baseline or rate
+        # Timings include pool start-up and per-worker model load
+        print(f"workers={workers:3d}  {rate:8.1f} chunks/s  {dt:7.2f}s  speedup={rate / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
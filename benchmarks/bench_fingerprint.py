@@ -0,0 +1,87 @@
+#bench_fingerprint.py
+# PDF fingerprinting cost: hashlib throughput per algorithm on this CPU (to choose Constants.FILE_DIGEST),
+# then make_manifest with a cold FingerprintCache (every file hashed by FINGERPRINT_WORKERS threads)
+# and a warm one (stat only), which is what a no-op run pays.
+#
+#   python benchmarks/bench_fingerprint.py [--pdf-dir DIR | --synthetic-mb 2048] [--workers 4]
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.utils import Utils
+from data.fingerprint_cache import FingerprintCache
+
+
+def synthetic_files(dir_path: str, total_mb: int, n_files: int = 16) -> list:
+    paths = []
+    per_file = max(1, total_mb // n_files) * 1024 * 1024
+    block = os.urandom(1024 * 1024)
+    for i in range(n_files):
+        path = os.path.join(dir_path, f"scan_{i:03d}.pdf")
+        with open(path, "wb") as f:
+            for _ in range(per_file // len(block)):
+                f.write(block)
+        paths.append(path)
+    return paths
+
+
+def algo_throughput(algos: list, mb: int = 256) -> None:
+    data = memoryview(os.urandom(mb * 1024 * 1024))
+    step = 8 * 1024 * 1024
+    for algo in algos:
+        h = hashlib.new(algo)
+        t0 = time.perf_counter()
+        for i in range(0, len(data), step):
+            h.update(data[i:i + step])
+        dt = time.perf_counter() - t0
+        print(f"{algo:8s} {mb / 1024 / dt:6.2f} GB/s")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pdf-dir", default=None)
+    ap.add_argument("--synthetic-mb", type=int, default=1024)
+    ap.add_argument("--workers", type=int, default=Constants.FINGERPRINT_WORKERS)
+    ap.add_argument("--algo", default=Constants.FILE_DIGEST)
+    args = ap.parse_args()
+
+    algo_throughput(["sha1", "sha256", "blake2b", "md5"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.pdf_dir:
+            paths = sorted(str(p) for p in Path(args.pdf_dir).glob("*.pdf"))
+        else:
+            paths = synthetic_files(tmp, args.synthetic_mb)
+        total_gb = sum(os.path.getsize(p) for p in paths) / 1024 ** 3
+        cache_path = os.path.join(tmp, Constants.FINGERPRINT_CACHE)
+
+        t0 = time.perf_counter()
+        Utils.make_manifest(paths, [], {}, algo=args.algo)
+        t_serial = time.perf_counter() - t0
+
+        runs = []
+        for label in ("cold", "warm"):
+            t0 = time.perf_counter()
+            digests = FingerprintCache(cache_path, args.algo).digests(paths, workers=args.workers)
+            manifest = Utils.make_manifest(paths, [], {}, digests=digests, algo=args.algo)
+            runs.append((label, time.perf_counter() - t0, manifest))
+
+        print(f"{len(paths)} files, {total_gb:.2f} GB, {args.algo}, {args.workers} workers")
+        print(f"uncached serial  {t_serial * 1000:9.1f} ms")
+        for label, dt, _ in runs:
+            print(f"cache {label:10s} {dt * 1000:9.1f} ms")
+        if [p["sha1"] for p in runs[0][2]["pdfs"]] != [p["sha1"] for p in runs[1][2]["pdfs"]]:
+            raise SystemExit("cold and warm digests differ")
+
+
+if __name__ == "__main__":
+    main()
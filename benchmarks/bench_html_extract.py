@@ -0,0 +1,97 @@
+#bench_html_extract.py
+# Full-tree vs table-only (SoupStrainer) parsing for Ingestion's IUCN infobox and wikitable title extraction.
+# Runs over saved Wikipedia HTML (*.html in --fixtures; --save TITLE fetches one into it), or over synthetic
+# pages shaped like a species article and a large list page. Also checks that both paths return the same output.
+#
+#   python benchmarks/bench_html_extract.py [--fixtures DIR] [--save "Sách Đỏ Việt Nam" --save "Sao la"] [--repeat 5]
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.ingestion import Ingestion
+from data.http_client import HttpClient
+
+
+def synthetic_article(paragraphs: int = 400) -> str:
+    body = "".join(f"<p>Đoạn {i}: <a href='/wiki/Loai_{i}'>loài {i}</a> sống trong rừng <b>nhiệt đới</b>.</p>"
+                   f"<div class='thumb'><img src='x{i}.jpg' alt='ảnh'></div>" for i in range(paragraphs))
+    infobox = ("<table class='infobox biota'><tbody>"
+               "<tr><th colspan='2'>Sao la</th></tr>"
+               "<tr><td colspan='2'><table><tr><td>nested</td></tr></table></td></tr>"
+               "<tr><th>Tình trạng bảo tồn</th><td><img alt='CR' src='cr.png'> Cực kỳ nguy cấp (IUCN 3.1)</td></tr>"
+               "</tbody></table>")
+    return f"<html><head><title>Sao la</title></head><body><div id='content'>{infobox}{body}</div></body></html>"
+
+
+def synthetic_list(rows: int = 3000, tables: int = 4) -> str:
+    parts = ["<html><body>", "<p>" + "Danh sách loài. " * 200 + "</p>"]
+    n = 0
+    for t in range(tables):
+        parts.append("<table class='wikitable sortable'><tbody><tr><th>Tên</th><th>Ghi chú</th></tr>")
+        for _ in range(rows // tables):
+            href = f"/w/index.php?title=Loai_{n}&action=edit&redlink=1" if n % 17 == 0 else f"/wiki/Lo%C3%A0i_{n % (rows - 50)}"
+            cls = " class='new'" if n % 23 == 0 else ""
+            parts.append(f"<tr><td><i><a href='{href}'{cls}>Loài {n}</a></i></td><td>mô tả <a href='/wiki/X'>x</a></td></tr>")
+            n += 1
+        parts.append("</tbody></table><p>" + "chú thích " * 100 + "</p>")
+    parts.append("<table class='navbox'><tr><td><a href='/wiki/Nav'>Nav</a></td></tr></table></body></html>")
+    return "".join(parts)
+
+
+def load_fixtures(fixtures: str) -> list:
+    if fixtures and Path(fixtures).is_dir():
+        pages = [(p.name, p.read_bytes()) for p in sorted(Path(fixtures).glob("*.html"))]
+        if pages:
+            return pages
+    return [("synthetic-article", synthetic_article().encode("utf-8")),
+            ("synthetic-list", synthetic_list().encode("utf-8"))]
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", default=None)
+    ap.add_argument("--save", action="append", default=[], help="Wikipedia title to download into --fixtures")
+    ap.add_argument("--lang", default="vi")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.save:
+        if not args.fixtures:
+            ap.error("--save needs --fixtures")
+        Path(args.fixtures).mkdir(parents=True, exist_ok=True)
+        for title in args.save:
+            html = HttpClient.get(Ingestion.page_url_from_title(title, lang=args.lang)).content
+            (Path(args.fixtures) / (title.replace(" ", "_").replace("/", "_") + ".html")).write_bytes(html)
+
+    print(f"parser for the fast path: {Constants.HTML_PARSER}")
+    for name, html in load_fixtures(args.fixtures):
+        for label, fn in (("iucn", Ingestion._extract_iucn_from_html),
+                          ("titles", Ingestion.extract_first_column_titles_from_html)):
+            full = fn(html, fast=False)
+            fast = fn(html, fast=True)
+            if full != fast:
+                raise SystemExit(f"{name} {label}: outputs differ\n  full: {full!r}\n  fast: {fast!r}")
+            t_full = best_of(lambda: fn(html, fast=False), args.repeat)
+            t_fast = best_of(lambda: fn(html, fast=True), args.repeat)
+            size = len(full) if isinstance(full, list) else int(full[0] is not None)
+            print(f"{name[:32]:32s} {label:6s} {len(html) / 1e6:6.2f} MB  full={t_full * 1000:8.1f} ms  "
+                  f"fast={t_fast * 1000:8.1f} ms  speedup={t_full / max(t_fast, 1e-9):5.1f}x  results={size}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#bench_http_client.py
+# HttpClient against a local stub HTTP server: per-host concurrency cap, keep-alive connection reuse,
+# HTTP_MIN_INTERVAL spacing, and retry with backoff on 503, 429 (Retry-After), dropped connections, with
+# no retry on 404. Fails if any of these is violated; reports requests/s sequential vs through a thread pool.
+#
+#   python benchmarks/bench_http_client.py [--requests 64] [--workers 16] [--delay-ms 20] [--max-per-host 4]
+
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.http_client import HttpClient
+
+
+class StubServer(ThreadingHTTPServer):
+    """Test endpoints (query: id, ms, fail):
+      /slow      sleeps ms, then 200; tracks requests in flight per Host header
+      /flaky     503 for the first `fail` requests of an id, then 200
+      /limited   429 with Retry-After: 1 for the first request of an id, then 200
+      /drop      closes the connection without answering for the first `fail` requests of an id
+      /missing   404
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.attempts = {}
+        self.connections = set()
+        self.starts = []
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        server = self.server
+        host = self.headers.get("Host", "")
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.starts.append(time.monotonic())
+            key = (url.path, query.get("id"))
+            server.attempts[key] = attempt = server.attempts.get(key, 0) + 1
+            server.in_flight[host] = server.in_flight.get(host, 0) + 1
+            server.max_in_flight[host] = max(server.max_in_flight.get(host, 0), server.in_flight[host])
+        try:
+            fail = int(query.get("fail", 0))
+            if url.path == "/slow":
+                time.sleep(int(query.get("ms", 0)) / 1000.0)
+                self._reply(200)
+            elif url.path == "/flaky":
+                self._reply(503 if attempt <= fail else 200)
+            elif url.path == "/limited":
+                self._reply(429, {"Retry-After": "1"}) if attempt == 1 else self._reply(200)
+            elif url.path == "/drop" and attempt <= fail:
+                self.close_connection = True
+                self.connection.shutdown(2)
+            elif url.path == "/drop":
+                self._reply(200)
+            else:
+                self._reply(404)
+        finally:
+            with server.lock:
+                server.in_flight[host] -= 1
+
+    def _reply(self, status: int, headers: dict = None):
+        body = f"{status} {self.path}".encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def fetch_all(urls: list, workers: int) -> tuple:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        bodies = [r.text for r in executor.map(HttpClient.get, urls)]
+    return bodies, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=64)
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--delay-ms", type=int, default=20)
+    ap.add_argument("--max-per-host", type=int, default=Constants.HTTP_MAX_PER_HOST)
+    args = ap.parse_args()
+
+    server = StubServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Constants.HTTP_MAX_PER_HOST = args.max_per_host
+    Constants.HTTP_BACKOFF = 0.05
+    HttpClient.configure_cache(None, "off")
+    HttpClient.reset()
+    problems = []
+    # 127.0.0.1 and localhost are different hosts to HttpClient (and different Host headers to the stub)
+    hosts = [f"127.0.0.1:{server.port}", f"localhost:{server.port}"]
+
+    # 1) Per-host cap, output order and keep-alive
+    urls = [f"http://{hosts[0]}/slow?id={i}&ms={args.delay_ms}" for i in range(args.requests)]
+    _, t_seq = fetch_all(urls[:max(1, args.requests // 4)], 1)
+    t_seq *= args.requests / max(1, args.requests // 4)
+    server.connections.clear()
+    bodies, t_pool = fetch_all(urls, args.workers)
+    if bodies != [f"200 {urlparse(u).path}?{urlparse(u).query}" for u in urls]:
+        problems.append("responses are not in request order")
+    if server.max_in_flight[hosts[0]] > args.max_per_host:
+        problems.append(f"{server.max_in_flight[hosts[0]]} requests in flight > HTTP_MAX_PER_HOST={args.max_per_host}")
+    if len(server.connections) > args.max_per_host:
+        problems.append(f"{len(server.connections)} connections opened for {args.max_per_host} slots (no keep-alive?)")
+    print(f"{args.requests} requests of {args.delay_ms} ms: sequential {args.requests / t_seq:7.1f} req/s, "
+          f"{args.workers} threads {args.requests / t_pool:7.1f} req/s; max in flight "
+          f"{server.max_in_flight[hosts[0]]}/{args.max_per_host}, {len(server.connections)} connections")
+
+    # 2) Two hosts get a cap each
+    server.max_in_flight.clear()
+    urls = [f"http://{hosts[i % 2]}/slow?id=h{i}&ms={args.delay_ms}" for i in range(args.requests)]
+    fetch_all(urls, args.workers)
+    caps = [server.max_in_flight.get(h, 0) for h in hosts]
+    if max(caps) > args.max_per_host:
+        problems.append(f"per-host in flight {caps} > {args.max_per_host}")
+    print(f"two hosts: max in flight {caps} (cap {args.max_per_host} each)")
+
+    # 3) Minimum interval between request starts to one host
+    Constants.HTTP_MIN_INTERVAL = 0.02
+    HttpClient.reset()
+    server.starts.clear()
+    fetch_all([f"http://{hosts[0]}/slow?id=i{i}&ms=0" for i in range(20)], args.workers)
+    starts = sorted(server.starts)
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    # the server sees arrivals, which jitter around the client's start times, so the span is checked
+    if starts[-1] - starts[0] < 0.9 * 0.02 * (len(starts) - 1):
+        problems.append(f"20 requests arrived within {(starts[-1] - starts[0]) * 1000:.0f} ms "
+                        f"despite HTTP_MIN_INTERVAL=20 ms")
+    print(f"HTTP_MIN_INTERVAL=20 ms: 20 requests over {(starts[-1] - starts[0]) * 1000:.0f} ms, "
+          f"mean gap {sum(gaps) / len(gaps) * 1000:.1f} ms, smallest {min(gaps) * 1000:.1f} ms")
+    Constants.HTTP_MIN_INTERVAL = 0.0
+    HttpClient.reset()
+
+    # 4) Retries
+    base = f"http://{hosts[0]}"
+    cases = [("503 twice", f"{base}/flaky?id=a&fail=2", 200, 3),
+             ("503 past retries", f"{base}/flaky?id=b&fail=9", requests.HTTPError, 3 + 1),
+             ("429 Retry-After: 1", f"{base}/limited?id=c", 200, 2),
+             ("dropped connection", f"{base}/drop?id=d&fail=1", 200, 2),
+             ("404", f"{base}/missing?id=e", requests.HTTPError, 1)]
+    for label, url, expected, attempts in cases:
+        t0 = time.perf_counter()
+        try:
+            outcome = HttpClient.get(url, retries=3).status_code
+        except requests.RequestException as e:
+            outcome = type(e)
+        dt = time.perf_counter() - t0
+        parsed = urlparse(url)
+        seen = server.attempts.get((parsed.path, parse_qs(parsed.query)["id"][0]), 0)
+        ok = (outcome == expected or (isinstance(expected, type) and isinstance(outcome, type)
+                                      and issubclass(outcome, expected))) and seen == attempts
+        if label.startswith("429") and dt < 1.0:
+            ok = False
+        if not ok:
+            problems.append(f"{label}: got {outcome} after {seen} attempts, expected {expected} after {attempts}")
+        name = outcome.__name__ if isinstance(outcome, type) else outcome
+        print(f"{label:20s} -> {name} after {seen} attempts in {dt:.2f} s")
+
+    server.shutdown()
+    if problems:
+        raise SystemExit("\n".join(problems))
+    print("HttpClient behaves as configured")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#bench_hybrid.py
+# BM25 inverted index (LexicalIndex) cost on a synthetic corpus: build and append time, size on disk vs
+# chunks.jsonl, and ms/query. Checks that build + append + tombstones ranks exactly like a fresh build.
+# With --out-dir (real artifacts and model), also reports hit@k of the QA pairs' source chunk for
+# vector, lexical and hybrid (RRF) retrieval, and how many queries skipped the encoder as name queries.
+#
+#   python benchmarks/bench_hybrid.py [--chunks 50000] [--queries 2000]
+#   python benchmarks/bench_hybrid.py --out-dir DIR [--qa src/evaluation/QA_pairs/...json] [--k 5]
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.lexical_index import LexicalIndex
+
+WORDS = ("sao la", "voọc", "rừng", "nhiệt đới", "loài", "bảo tồn", "Việt Nam", "IUCN", "quần thể", "sinh cảnh",
+         "cực kỳ", "nguy cấp", "phân bố", "Trường Sơn", "1998", "km²", "cá thể", "săn bắt", "khu bảo tồn")
+GENERA = ("Pseudoryx", "Pygathrix", "Lophura", "Rhinopithecus", "Panthera", "Pica", "Trachypithecus", "Rafetus")
+EPITHETS = ("nghetinhensis", "cinerea", "hatinhensis", "avunculus", "tigris", "pica", "delacouri", "swinhoei")
+
+
+def synthetic_chunks(n: int, seed: int = 0) -> list:
+    r = random.Random(seed)
+    chunks = []
+    for i in range(n):
+        words = [r.choice(WORDS) for _ in range(r.randint(20, 60))]
+        if i % 5 == 0:
+            words.insert(r.randrange(len(words)), f"({r.choice(GENERA)} {r.choice(EPITHETS)})")
+        chunks.append({"text": " ".join(words), "source": "pdf", "doc_id": f"doc_{i % 50}"})
+    return chunks
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def synthetic(args) -> None:
+    chunks = synthetic_chunks(args.chunks)
+    head, tail = chunks[:int(len(chunks) * 0.9)], chunks[int(len(chunks) * 0.9):]
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        LexicalIndex.build(head).save(os.path.join(tmp, "lexical"))
+        t_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        lexical = LexicalIndex.load(os.path.join(tmp, "lexical"))
+        dead = list(range(0, len(head), 97))
+        lexical.mark_deleted(dead)
+        lexical.append(tail, len(head)).save(os.path.join(tmp, "lexical"))
+        t_append = time.perf_counter() - t0
+        size = dir_size(os.path.join(tmp, "lexical"))
+        jsonl_size = sum(len(json.dumps(c, ensure_ascii=False).encode("utf-8")) + 1 for c in chunks)
+
+        fresh_chunks = [dict(c, deleted=True) if i in set(dead) else c for i, c in enumerate(chunks)]
+        fresh = LexicalIndex.build(fresh_chunks)
+        lexical = LexicalIndex.load(os.path.join(tmp, "lexical"))
+        r = random.Random(1)
+        queries = [" ".join(r.choice(WORDS) for _ in range(r.randint(1, 4))) for _ in range(args.queries)]
+        queries += [f"{g} {e}" for g in GENERA for e in EPITHETS]
+        for q in queries[:200]:
+            a, b = lexical.search(q, 10), fresh.search(q, 10)
+            if not np.allclose(np.sort(a[1]), np.sort(b[1]), rtol=1e-5):
+                raise SystemExit(f"appended index ranks differently for {q!r}")
+        t0 = time.perf_counter()
+        for q in queries:
+            lexical.search(q, Constants.HYBRID_CANDIDATES)
+        t_query = (time.perf_counter() - t0) / len(queries)
+        n_names = sum(lexical.is_name(f"{g} {e}") for g in GENERA for e in EPITHETS)
+
+    print(f"{len(chunks)} chunks, {len(dead)} tombstoned, bigrams={Constants.LEXICAL_BIGRAMS}, "
+          f"fold={Constants.LEXICAL_FOLD_DIACRITICS}")
+    print(f"build 90%        {t_build:7.2f} s")
+    print(f"append 10%       {t_append:7.2f} s  (load + tombstones + new segment)")
+    print(f"size on disk     {size / 1e6:7.1f} MB  (chunks.jsonl {jsonl_size / 1e6:.1f} MB)")
+    print(f"query            {t_query * 1000:7.3f} ms  ({len(queries)} queries, top {Constants.HYBRID_CANDIDATES})")
+    print(f"binomials recognized as names: {n_names}")
+
+
+def quality(args) -> None:
+    from data.embedding import ModelRegistry
+    from data.retrieval import Retriever
+
+    retriever = Retriever.load(args.out_dir)
+    with open(args.qa, "r", encoding="utf-8") as f:
+        pairs = json.load(f)["qa_pairs"]
+    questions = [p["question"] for p in pairs]
+    model = ModelRegistry.get_model(retriever.model_name, Constants.EMBED_DEVICE)
+    encode = model.encode
+    calls = {"n": 0}
+
+    def counting_encode(texts, *a, **kw):
+        calls["n"] += len(texts)
+        return encode(texts, *a, **kw)
+
+    model.encode = counting_encode
+    for mode in ("vector", "lexical", "hybrid"):
+        calls["n"] = 0
+        t0 = time.perf_counter()
+        results = retriever.search_batch(questions, args.k, mode=mode)
+        dt = time.perf_counter() - t0
+        hits = sum(any(h["id"] == p["source_chunk_id"] for h in res) for p, res in zip(pairs, results))
+        print(f"{mode:8s} hit@{args.k} {hits / len(pairs):.3f}  {dt * 1000 / len(pairs):7.2f} ms/query  "
+              f"encoded {calls['n']}/{len(pairs)}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=50000)
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--out-dir", default=None)
+    ap.add_argument("--qa", default=str(ROOT_DIR / "src" / "evaluation" / "QA_pairs" /
+                                        "sach_do_dong_vat_vietnam_qa_dataset-3.json"))
+    ap.add_argument("--k", type=int, default=Constants.SERVE_TOP_K)
+    args = ap.parse_args()
+    if args.out_dir:
+        quality(args)
+    else:
+        synthetic(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#bench_index_types.py
+# Build time, per-query search latency and recall@10 for each Indexer index type.
+# Uses a .npy of embeddings if given, otherwise synthetic clustered vectors.
+#
+#   python benchmarks/bench_index_types.py [--npy path/to/embeddings.npy] [--n 100000 --dim 384]
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.indexing import Indexer
+
+
+def synthetic(n: int, dim: int, n_clusters: int = 512) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n)
+    return centers[labels] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--npy", default=None)
+    ap.add_argument("--n", type=int, default=100000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--types", default="flat,ivf_flat,ivf_pq,hnsw")
+    ap.add_argument("--queries", type=int, default=1000)
+    args = ap.parse_args()
+
+    emb = np.load(args.npy).astype(np.float32) if args.npy else synthetic(args.n, args.dim)
+    print(f"{emb.shape[0]} vectors, dim {emb.shape[1]}")
+    queries = emb[np.random.default_rng(2).choice(emb.shape[0], size=min(args.queries, emb.shape[0]), replace=False)]
+    for index_type in args.types.split(","):
+        data = emb.copy()
+        t0 = time.perf_counter()
+        index = Indexer.build_faiss(data, index_type=index_type)
+        build = time.perf_counter() - t0
+        q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        t0 = time.perf_counter()
+        for row in q:
+            index.search(row[None, :], 10)
+        per_query_ms = (time.perf_counter() - t0) * 1000 / len(q)
+        recall = Indexer.measure_recall(index, data, k=10)
+        print(f"{index_type:9s} build={build:7.2f}s  search={per_query_ms:7.3f} ms/query  recall@10={recall:.3f}  "
+              f"{Indexer.describe(index)}")
+
+
+if __name__ == "__main__":
+    main()
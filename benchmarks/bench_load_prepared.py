@@ -0,0 +1,62 @@
+#bench_load_prepared.py
+# Cold-start cost of Base.load_prepared: copy, mmap, and mmap + lazy ChunkStore. Each load runs in a fresh process (like an API
+# worker) and reports wall time plus private (RssAnon) and shared file-backed (RssFile) memory.
+#
+#   python benchmarks/bench_load_prepared.py --out-dir data/data_files [--repeat 3]
+
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+CHILD = r"""
+import sys, time, json
+sys.path.insert(0, {src!r})
+from data.base import Base
+
+def rss():
+    out = {{}}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon", "RssFile")):
+                key, val = line.split(":")
+                out[key] = int(val.split()[0]) // 1024
+    return out
+
+before = rss()
+t0 = time.perf_counter()
+chunks, embeddings, index = Base.load_prepared({out_dir!r}, mmap={mmap}, lazy_chunks={lazy})
+dt = time.perf_counter() - t0
+after = rss()
+print(json.dumps({{"seconds": dt, "chunks": len(chunks),
+                  "anon_mb": after.get("RssAnon", 0) - before.get("RssAnon", 0),
+                  "file_mb": after.get("RssFile", 0) - before.get("RssFile", 0)}}))
+"""
+
+
+def run(out_dir: str, mmap: bool, lazy: bool) -> dict:
+    code = CHILD.format(src=str(ROOT_DIR / "src"), out_dir=out_dir, mmap=mmap, lazy=lazy)
+    res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out-dir", required=True)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    # Build the chunk store up front so its one-off creation is not timed
+    run(args.out_dir, False, True)
+    for mmap, lazy in ((False, False), (True, False), (True, True)):
+        runs = [run(args.out_dir, mmap, lazy) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["seconds"])
+        print(f"mmap={str(mmap):5s} lazy_chunks={str(lazy):5s} load={best['seconds'] * 1000:8.1f} ms  chunks={best['chunks']}  "
+              f"private={best['anon_mb']:5d} MB  shared(file)={best['file_mb']:5d} MB")
+
+
+if __name__ == "__main__":
+    main()
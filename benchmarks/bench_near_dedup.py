@@ -0,0 +1,93 @@
+#bench_near_dedup.py
+# Near-duplicate removal with MinHash/LSH (Deduplicator.dedupe_chunks with a MinHashIndex) on synthetic
+# chunks with injected near duplicates (a few character edits, OCR-style noise, added trailing text).
+# Reports chunks/s, how many injected duplicates were caught, and false drops: chunks dropped although
+# their true shingle Jaccard with the kept chunk is below the threshold.
+#
+#   python benchmarks/bench_near_dedup.py [--chunks 20000] [--dups 2000] [--threshold 0.9]
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.deduplication import Deduplicator
+from data.near_dedup import MinHashIndex
+
+WORDS = ("sao la", "voọc", "rừng", "nhiệt đới", "loài", "bảo tồn", "Việt Nam", "IUCN", "quần thể", "sinh cảnh",
+         "cực kỳ", "nguy cấp", "phân bố", "Trường Sơn", "1998", "km²", "cá thể", "săn bắt", "khu bảo tồn")
+
+
+def mutate(text: str, r: random.Random, edits: int) -> str:
+    chars = list(text)
+    for _ in range(edits):
+        op = r.randrange(3)
+        pos = r.randrange(len(chars))
+        if op == 0:
+            chars[pos] = r.choice("aeiou.,l1")
+        elif op == 1:
+            chars.insert(pos, r.choice(" -.,"))
+        else:
+            del chars[pos]
+    return "".join(chars)
+
+
+def synthetic_chunks(n: int, n_dups: int, seed: int = 0) -> tuple:
+    r = random.Random(seed)
+    chunks = [{"text": " ".join(r.choice(WORDS) for _ in range(r.randint(40, 120))), "hash": f"c{i}"}
+              for i in range(n)]
+    dups = []
+    for k in range(n_dups):
+        src = chunks[r.randrange(n)]["text"]
+        text = mutate(src, r, r.randint(1, 4)) if k % 2 == 0 else src + " " + r.choice(WORDS)
+        dups.append({"text": text, "hash": f"d{k}"})
+    return chunks, dups
+
+
+def jaccard(index: MinHashIndex, a: str, b: str) -> float:
+    sa, sb = set(index._shingle_hashes(a).tolist()), set(index._shingle_hashes(b).tolist())
+    return len(sa & sb) / max(1, len(sa | sb))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=20000)
+    ap.add_argument("--dups", type=int, default=2000)
+    ap.add_argument("--threshold", type=float, default=Constants.NEAR_DEDUP_THRESHOLD)
+    args = ap.parse_args()
+
+    chunks, dups = synthetic_chunks(args.chunks, args.dups)
+    corpus = chunks + dups
+    texts = {c["hash"]: c["text"] for c in corpus}
+
+    t0 = time.perf_counter()
+    Deduplicator.dedupe_chunks(corpus)
+    t_exact = time.perf_counter() - t0
+
+    index = MinHashIndex(args.threshold)
+    stats = {}
+    t0 = time.perf_counter()
+    kept, _ = Deduplicator.dedupe_chunks(corpus, near_index=index, stats=stats)
+    t_near = time.perf_counter() - t0
+
+    near_map = stats["near_map"]
+    caught = sum(1 for h in near_map if h.startswith("d"))
+    true_j = [jaccard(index, texts[dropped], texts[kept_h]) for dropped, kept_h in near_map.items()]
+    false_drops = sum(1 for j in true_j if j < args.threshold - 0.05)
+    print(f"{len(corpus)} chunks, {len(dups)} injected near duplicates, threshold {args.threshold} "
+          f"({index.bands} bands x {index.rows} rows)")
+    print(f"exact only       {t_exact:7.3f} s  {len(corpus) / t_exact / 1000:8.1f} k chunks/s")
+    print(f"exact + MinHash  {t_near:7.3f} s  {len(corpus) / t_near / 1000:8.1f} k chunks/s")
+    print(f"kept {len(kept)}, near dropped {stats['near_dropped']} (injected caught {caught}), "
+          f"false drops (true Jaccard < threshold - 0.05): {false_drops}")
+    if false_drops:
+        raise SystemExit("near dedup dropped chunks well below the threshold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#bench_normalize.py
+# Text normalization throughput: Utils.normalize_vi_text / clean_ocr_text (reference) vs TextNormalizer,
+# in-process and with NORMALIZE_WORKERS processes, on synthetic wiki chunks and OCR pages.
+# Before timing, checks identical output on the corpus plus randomized edge cases (entities, NBSP,
+# zero-width spaces, decomposed diacritics, hyphenation, citations, compatibility characters).
+#
+#   python benchmarks/bench_normalize.py [--texts 200000] [--workers 4] [--cases 200000]
+
+import sys
+import time
+import random
+import argparse
+import unicodedata
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.utils import Utils
+from data.normalizer import TextNormalizer
+
+WORDS = ("sao la", "voọc", "rừng", "nhiệt đới", "loài", "bảo tồn", "Việt Nam", "IUCN", "quần thể", "sinh cảnh",
+         "cực kỳ", "nguy cấp", "phân bố", "Trường Sơn", "1998", "km²", "cá thể", "săn bắt", "khu bảo tồn")
+PIECES = ("a", "Đ", "ệ", unicodedata.normalize("NFD", "ế"), "-", "- ", "-\n", "\n", "\n\n", " ", "\u00A0",
+          "\u200B", "\t", "\r", "\x1c", "\u3000", "&amp;", "&eacute;", "&#8203;", "&nbsp;", "&", "&lt;b&gt;",
+          "[1]", "[ a ]", "[", "]", "x", "1", "_", "\uFB01", "\uFF21", "\u2460", "; ", "&#x5b;2&#x5d;")
+
+
+def synthetic_texts(n: int, seed: int = 0) -> list:
+    r = random.Random(seed)
+    texts = []
+    for i in range(n):
+        words = [r.choice(WORDS) for _ in range(r.randint(10, 60))]
+        if i % 3 == 0:
+            # wiki-style chunk: citations, entities and NBSP
+            words.insert(r.randrange(len(words)), f"[{r.randint(1, 99)}]")
+            words.insert(r.randrange(len(words)), "&amp;")
+            texts.append("\u00A0".join(words[:3]) + " " + " ".join(words[3:]))
+        elif i % 3 == 1:
+            # OCR-style page line breaks and hyphenation
+            texts.append("\n".join(" ".join(words[j:j + 8]) for j in range(0, len(words), 8)).replace("loài", "lo-\nài"))
+        else:
+            texts.append(" ".join(words))
+    return texts
+
+
+def edge_cases(n: int, seed: int = 1) -> list:
+    r = random.Random(seed)
+    return ["".join(r.choice(PIECES) for _ in range(r.randint(0, 24))) for _ in range(n)]
+
+
+def check(texts: list) -> None:
+    for t in texts:
+        if TextNormalizer.normalize_vi(t) != Utils.normalize_vi_text(t):
+            raise SystemExit(f"normalize_vi differs for {t!r}")
+        if TextNormalizer.clean_ocr(t) != Utils.clean_ocr_text(t):
+            raise SystemExit(f"clean_ocr differs for {t!r}")
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--texts", type=int, default=200000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--cases", type=int, default=200000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    texts = synthetic_texts(args.texts)
+    check(edge_cases(args.cases))
+    check(texts)
+    print(f"identical output on {args.cases} edge cases and {len(texts)} texts")
+
+    mb = sum(len(t.encode("utf-8")) for t in texts) / 1e6
+    runs = [
+        ("normalize_vi reference", lambda: [Utils.normalize_vi_text(t) for t in texts]),
+        ("normalize_vi batch", lambda: TextNormalizer.normalize_vi_batch(texts, workers=1)),
+        ("clean_ocr reference", lambda: [Utils.clean_ocr_text(t) for t in texts]),
+        ("clean_ocr batch", lambda: TextNormalizer.clean_ocr_batch(texts, workers=1)),
+    ]
+    if args.workers > 1:
+        runs.insert(2, (f"normalize_vi batch x{args.workers}",
+                        lambda: TextNormalizer.normalize_vi_batch(texts, workers=args.workers)))
+    for label, fn in runs:
+        dt = best_of(fn, args.repeat)
+        print(f"{label:26s} {dt:7.3f} s  {mb / dt:7.1f} MB/s  {len(texts) / dt / 1000:8.1f} k texts/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#bench_service.py
+# Load test for the retrieval service path (MicroBatcher -> Retriever.search_batch -> FAISS) with a stub
+# encoder whose cost is a fixed per-call overhead plus a per-query cost, like a transformer forward pass.
+# Closed-loop clients send queries concurrently; reports throughput and p50/p99 latency with batching off
+# (max_batch=1, one model call per request) and on, then with a QueryCache on a hot set of --hot distinct
+# questions (answered like src/app.py: result cache first, batcher on a miss).
+#
+#   python benchmarks/bench_service.py [--clients 64] [--requests 4000] [--max-batch 64] [--hot 50] [--out-dir DIR]
+
+import sys
+import time
+import asyncio
+import hashlib
+import argparse
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.embedding import ModelRegistry
+from data.retrieval import Retriever, MicroBatcher
+from data.query_cache import QueryCache
+
+QUESTIONS = ("Sao la sống ở đâu?", "Voọc chà vá chân xám thuộc nhóm nào trong Sách đỏ?",
+             "Tình trạng bảo tồn của hổ Đông Dương là gì?", "Rùa Hoàn Kiếm còn bao nhiêu cá thể?",
+             "Pica pica phân bố ở đâu?", "Vì sao tê giác Java tuyệt chủng ở Việt Nam?")
+
+
+class StubModel:
+    """Deterministic SentenceTransformer stand-in: sleeps overhead + per_query per encode call."""
+
+    def __init__(self, dim: int, overhead_ms: float, per_query_ms: float):
+        self.dim = dim
+        self.overhead = overhead_ms / 1000.0
+        self.per_query = per_query_ms / 1000.0
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True, show_progress_bar: bool = False):
+        self.calls += 1
+        time.sleep(self.overhead + self.per_query * len(texts))
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha1(t.encode("utf-8")).digest()[:4], "little")
+            out[i] = np.random.default_rng(seed).standard_normal(self.dim)
+        return out
+
+
+def synthetic_retriever(n: int, dim: int, cache: QueryCache = None) -> Retriever:
+    rng = np.random.default_rng(0)
+    emb = rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(emb)
+    index = faiss.IndexFlatIP(dim)
+    index.add(emb)
+    chunks = [{"id": f"chunk_{i}", "doc_id": f"doc_{i % 97}", "source": "wiki", "page": 1, "text": f"đoạn {i}",
+               "url": f"https://vi.wikipedia.org/wiki/{i}", "image_url": None, "iucn_code": "EN", "section": None}
+              for i in range(n)]
+    return Retriever(chunks, index, cache=cache)
+
+
+async def load(retriever: Retriever, batcher: MicroBatcher, clients: int, requests: int, k: int, hot: int) -> list:
+    latencies = []
+    counter = iter(range(requests))
+
+    async def client(c: int):
+        for i in counter:
+            q = f"{QUESTIONS[i % len(QUESTIONS)]} #{i % hot}" if hot else f"{QUESTIONS[i % len(QUESTIONS)]} #{c}-{i}"
+            t0 = time.perf_counter()
+            hits = retriever.lookup(q, k)
+            if hits is None:
+                hits = await batcher.submit(q, k)
+            latencies.append(time.perf_counter() - t0)
+            if len(hits) != k:
+                raise SystemExit(f"expected {k} hits, got {len(hits)}")
+
+    await batcher.start()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    await batcher.stop()
+    return latencies
+
+
+def run(retriever: Retriever, model: StubModel, label: str, max_batch: int, args, hot: int = 0) -> None:
+    batcher = MicroBatcher(retriever.search_batch, max_batch=max_batch, max_wait_ms=args.max_wait_ms)
+    calls = model.calls
+    t0 = time.perf_counter()
+    latencies = asyncio.run(load(retriever, batcher, args.clients, args.requests, args.k, hot))
+    dt = time.perf_counter() - t0
+    ms = np.asarray(latencies) * 1000
+    print(f"{label:16s} {len(latencies) / dt:8.1f} q/s  p50 {np.percentile(ms, 50):8.3f} ms  "
+          f"p99 {np.percentile(ms, 99):8.3f} ms  model calls {model.calls - calls:5d}  "
+          f"mean batch {batcher.stats['requests'] / max(1, batcher.stats['batches']):5.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out-dir", default=None, help="serve real artifacts (the stub still replaces the model)")
+    ap.add_argument("--chunks", type=int, default=5000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--clients", type=int, default=64)
+    ap.add_argument("--requests", type=int, default=4000)
+    ap.add_argument("--k", type=int, default=Constants.SERVE_TOP_K)
+    ap.add_argument("--max-batch", type=int, default=Constants.SERVE_MAX_BATCH)
+    ap.add_argument("--max-wait-ms", type=float, default=Constants.SERVE_MAX_WAIT_MS)
+    ap.add_argument("--overhead-ms", type=float, default=8.0)
+    ap.add_argument("--per-query-ms", type=float, default=0.5)
+    ap.add_argument("--hot", type=int, default=50, help="distinct questions in the cached run")
+    args = ap.parse_args()
+
+    def make_retriever(cache=None):
+        if args.out_dir:
+            return Retriever.load(args.out_dir, cache=cache)
+        return synthetic_retriever(args.chunks, args.dim, cache)
+
+    retriever = make_retriever()
+    model = StubModel(retriever.index.d, args.overhead_ms, args.per_query_ms)
+    ModelRegistry._models[(retriever.model_name, Constants.EMBED_DEVICE)] = model
+
+    print(f"{retriever.index.ntotal} vectors, {args.clients} clients, {args.requests} requests, k={args.k}, "
+          f"stub encode {args.overhead_ms} ms + {args.per_query_ms} ms/query")
+    run(retriever, model, "per request", 1, args)
+    run(retriever, model, f"batch <= {args.max_batch}", args.max_batch, args)
+    cached = make_retriever(QueryCache())
+    run(cached, model, f"cached, {args.hot} hot", args.max_batch, args, hot=args.hot)
+    stats = cached.cache.stats()
+    print(f"cache hit rate: results {stats['results']['hit_rate']:.3f}, embeddings {stats['embeddings']['hit_rate']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
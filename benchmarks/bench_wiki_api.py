@@ -0,0 +1,163 @@
+#bench_wiki_api.py
+# Replays MediaWiki API responses from a local fixture server through the batched "api" wiki backend
+# (WikiApi.fetch_titles): batching, extract continuation (excontinue), title normalization, a redirect, a
+# disambiguation page and a missing page that fall back to the top search hit, infobox IUCN status from the
+# lead-section HTML and the vi wikitext fallback. Fails if a request has no fixture response, a fixture
+# response goes unused, or the pages' titles / IUCN status differ from the fixture's expected output.
+# Reports API requests per title.
+#
+# The committed fixture is synthetic: written by hand in the API's formatversion=2 response format, not
+# recorded, so it checks the backend's request/response handling, not agreement with live Wikipedia or with
+# the library backend. --record replaces it with live responses (and the output they produce).
+#
+#   python benchmarks/bench_wiki_api.py [--fixture benchmarks/fixtures/wiki_api.json]
+#   python benchmarks/bench_wiki_api.py --record [--titles "Sao la" --titles ...] [--batch-size 3]
+
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from data.constants import Constants
+from data.http_client import HttpClient
+from data.wiki_api import WikiApi
+
+FIXTURE = ROOT_DIR / "benchmarks" / "fixtures" / "wiki_api.json"
+TITLES = ["Sao la", "Rhinopithecus avunculus", "voọc chà vá chân xám", "Cheo cheo", "Rùa Hoàn Kiếm",
+          "Gà lôi lam mào trắng"]
+
+
+def request_key(params: dict) -> str:
+    # continuation values come back as JSON numbers but go out as query strings
+    return json.dumps(sorted((k, str(v)) for k, v in params.items()), ensure_ascii=False)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Serves fixture api.php responses keyed by their query parameters; unknown requests get a 404."""
+
+    daemon_threads = True
+
+    def __init__(self, recorded: list):
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        self.responses = {request_key(r["params"]): json.dumps(r["response"], ensure_ascii=False).encode("utf-8")
+                          for r in recorded}
+        self.served = {}
+        self.unmatched = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/w/api.php"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        key = request_key(dict(parse_qsl(urlparse(self.path).query, keep_blank_values=True)))
+        body = self.server.responses.get(key)
+        with self.server.lock:
+            if body is None:
+                self.server.unmatched.append(key)
+            else:
+                self.server.served[key] = self.server.served.get(key, 0) + 1
+        if body is None:
+            self.send_error(404, "no fixture response")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def expected(pages: list) -> list:
+    return [{"title": p["title"], "iucn_code": p["iucn_code"], "iucn_text": p["iucn_text"]} for p in pages]
+
+
+def replay(args) -> None:
+    with open(args.fixture, "r", encoding="utf-8") as f:
+        fixture = json.load(f)
+    server = FixtureServer(fixture["api"])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    HttpClient.configure_cache(None, "off")
+    Constants.WIKI_API_URL = server.url
+    try:
+        t0 = time.perf_counter()
+        api_pages = WikiApi.fetch_titles(fixture["titles"], lang=fixture["lang"], batch_size=fixture["batch_size"])
+        dt = time.perf_counter() - t0
+    finally:
+        Constants.WIKI_API_URL = None
+        server.shutdown()
+    n_requests = sum(server.served.values()) + len(server.unmatched)
+    print(f"{len(fixture['titles'])} titles -> {len(api_pages)} pages in {n_requests} API requests "
+          f"(batch size {fixture['batch_size']}), {dt * 1000:.1f} ms")
+
+    problems = []
+    got = expected(api_pages)
+    if got != fixture["expected"]:
+        for g, e in zip(got, fixture["expected"]):
+            if g != e:
+                problems.append(f"got {g}, expected {e}")
+        if len(got) != len(fixture["expected"]):
+            problems.append(f"got {len(got)} pages, expected {len(fixture['expected'])}")
+    for page in got:
+        print(f"  {page['title']:28s} {str(page['iucn_code']):4s} {page['iucn_text']}")
+    problems += [f"request without a fixture response: {key}" for key in server.unmatched]
+    unused = len(server.responses) - len(server.served)
+    if unused:
+        problems.append(f"{unused} fixture responses were never requested")
+    if problems:
+        raise SystemExit("\n".join(problems))
+    print("api backend output matches the fixture")
+
+
+def record(args) -> None:
+    titles = args.titles or TITLES
+    api_url = WikiApi.api_url(args.lang)
+    recorded = []
+    get = HttpClient.get
+
+    def recording_get(url, params=None, **kwargs):
+        resp = get(url, params=params, **kwargs)
+        if url == api_url:
+            recorded.append({"params": dict(params or {}), "response": resp.json()})
+        return resp
+
+    HttpClient.configure_cache(None, "off")
+    HttpClient.get = staticmethod(recording_get)
+    try:
+        pages = WikiApi.fetch_titles(titles, lang=args.lang, batch_size=args.batch_size, workers=1)
+    finally:
+        HttpClient.get = staticmethod(get)
+    Path(args.fixture).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.fixture, "w", encoding="utf-8") as f:
+        json.dump({"lang": args.lang, "batch_size": args.batch_size, "titles": titles, "api": recorded,
+                   "expected": expected(pages)}, f, ensure_ascii=False, indent=1)
+    print(f"recorded {len(recorded)} API responses for {len(pages)} pages to {args.fixture}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixture", default=str(FIXTURE))
+    ap.add_argument("--record", action="store_true")
+    ap.add_argument("--titles", action="append", default=None)
+    ap.add_argument("--lang", default="vi")
+    ap.add_argument("--batch-size", type=int, default=3)
+    args = ap.parse_args()
+    if args.record:
+        record(args)
+    else:
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#app.py
+# Retrieval service over prepared artifacts (see data/base.py).
+#
+#   RAG_OUT_DIR=prepared_data_cpu uvicorn app:app --app-dir src --host 0.0.0.0 --port 8000
+#
+# Artifacts and the embedding model are loaded once at startup. Concurrent /search requests are
+# coalesced by a MicroBatcher into one encode call and one FAISS search per batch. Repeated queries are
+# answered from the QueryCache without queueing; a newly published manifest reloads the artifacts.
+# Filters (iucn_code, source, doc_id, section) are applied inside the search, not to its top k.
+import os
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+
+from fastapi import FastAPI
+from pydantic import BaseModel, ConfigDict, Field
+
+from data.constants import Constants
+from data.embedding import ModelRegistry
+from data.retrieval import Retriever, MicroBatcher
+from data.query_cache import QueryCache
+
+
+class SearchFilters(BaseModel):
+    # values of one field are alternatives ({"iucn_code": ["CR", "EN"]}), fields must all match
+    model_config = ConfigDict(extra="forbid")
+    iucn_code: Optional[list[str]] = None
+    source: Optional[list[str]] = None
+    doc_id: Optional[list[str]] = None
+    section: Optional[list[str]] = None
+
+
+class SearchRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    k: int = Field(Constants.SERVE_TOP_K, ge=1, le=Constants.SERVE_MAX_K)
+    mode: Optional[Literal["hybrid", "vector", "lexical"]] = None  # default Constants.SEARCH_MODE
+    filters: Optional[SearchFilters] = None
+
+
+class Hit(BaseModel):
+    id: Optional[str] = None
+    score: float
+    text: Optional[str] = None
+    doc_id: Optional[str] = None
+    source: Optional[str] = None
+    page: Optional[int] = None
+    section: Optional[str] = None
+    url: Optional[str] = None
+    image_url: Optional[str] = None
+    iucn_code: Optional[str] = None
+    iucn_text: Optional[str] = None
+
+
+class SearchResponse(BaseModel):
+    query: str
+    hits: list[Hit]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    out_dir = os.environ.get("RAG_OUT_DIR", Constants.SERVE_OUT_DIR)
+    cache = QueryCache() if Constants.QUERY_CACHE else None
+    retriever = Retriever.load(out_dir, mmap=True, lazy_chunks=True, cache=cache)
+    ModelRegistry.warm_up(retriever.model_name, Constants.EMBED_DEVICE)
+    batcher = MicroBatcher(retriever.search_batch,
+                           max_batch=int(os.environ.get("RAG_MAX_BATCH", Constants.SERVE_MAX_BATCH)),
+                           max_wait_ms=float(os.environ.get("RAG_MAX_WAIT_MS", Constants.SERVE_MAX_WAIT_MS)))
+    await batcher.start()
+    app.state.retriever = retriever
+    app.state.batcher = batcher
+    print(f"[serve] {out_dir}: {retriever.index.ntotal} vectors, model {retriever.model_name}")
+    yield
+    await batcher.stop()
+
+
+app = FastAPI(title="Vietnam endangered wildlife retrieval", lifespan=lifespan)
+
+
+@app.post("/search", response_model=SearchResponse)
+async def search(req: SearchRequest):
+    filters = req.filters.model_dump(exclude_none=True) if req.filters is not None else None
+    hits = app.state.retriever.lookup(req.query, req.k, mode=req.mode, filters=filters)
+    if hits is None:
+        hits = await app.state.batcher.submit(req.query, req.k, mode=req.mode, filters=filters)
+    return SearchResponse(query=req.query, hits=hits)
+
+
+@app.get("/health")
+async def health():
+    stats = dict(app.state.batcher.stats)
+    stats["mean_batch"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+    retriever = app.state.retriever
+    return {"status": "ok", "vectors": int(retriever.index.ntotal),
+            "lexical_rows": len(retriever.lexical) if retriever.lexical is not None else 0,
+            "filter_values": retriever.filters.n_values if retriever.filters is not None else 0, "batcher": stats,
+            "cache": retriever.cache.stats() if retriever.cache is not None else None}
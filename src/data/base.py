@@ -5,6 +5,8 @@
 
 
 import os
+import json
+import time
 import shutil
 import numpy as np
 import faiss
@@ -16,8 +18,14 @@ from .utils import Utils
 from .ingestion import Ingestion
 from .chunking import Chunker
 from .deduplication import Deduplicator
+from .near_dedup import MinHashIndex
+from .lexical_index import LexicalIndex
+from .filter_index import FilterIndex
 from .embedding import Embedder
 from .indexing import Indexer
+from .chunk_store import ChunkStore
+from .http_client import HttpClient
+from .fingerprint_cache import FingerprintCache
 
 
 import os
@@ -34,7 +42,8 @@ class Base:
     
 # Main orchestration function to prepare chunks, embeddings, and FAISS index from PDFs and Wikipedia pages.
 # - If the output directory already contains up-to-date data (based on manifest), it loads existing artifacts.
-# - If new files or wiki titles are added, it incrementally processes only new content.
+# - If new files or wiki titles are added, it incrementally processes only new content; removed or edited PDFs
+#   have their chunks tombstoned and removed from the index (see _prepare_incremental).
 # - If there are significant changes or force=True, it performs a full rebuild.
 # Returns (chunks, embeddings, index).
     
@@ -52,6 +61,20 @@ class Base:
         faiss_path = os.path.join(out_dir, Constants.FAISS_INDEX_FILE)
         pages_path = os.path.join(out_dir, Constants.PAGES_JSONL)
         manifest_path = os.path.join(out_dir, Constants.MANIFEST_JSON)
+        store_dir = os.path.join(out_dir, Constants.CHUNK_STORE_DIR)
+        # Embedding cache is shared by sibling out_dirs (one per chunking strategy) unless overridden
+        embed_cache_dir = params.get("EMBED_CACHE_DIR") or os.path.join(
+            os.path.dirname(os.path.abspath(out_dir)), Constants.EMBED_CACHE_DIR)
+        # OCR text cache, shared the same way and keyed by PDF sha1, so re-chunking never re-OCRs a scan
+        ocr_cache_dir = params.get("OCR_CACHE_DIR") or os.path.join(
+            os.path.dirname(os.path.abspath(out_dir)), Constants.OCR_CACHE_DIR)
+        # Worker counts do not change outputs, so they are kept out of the manifest. So is OCR_RENDER_IN_WORKER
+        # (parent PNG vs worker grayscale rendering): the OCR cache keys its texts by render mode instead
+        embed_workers = params.get("EMBED_WORKERS", Constants.EMBED_WORKERS)
+        # The index type only affects index.faiss, which is rebuilt from embeddings.npy when it differs
+        # from the stored index (see _reindex), so it is kept out of the manifest too
+        index_type = params.get("INDEX_TYPE", Constants.INDEX_TYPE)
+        wiki_backend = params.get("WIKI_BACKEND", Constants.WIKI_BACKEND)
 
         # Merge provided params with defaults for manifest tracking
         manifest_params = {
@@ -63,11 +86,44 @@ class Base:
             "OCR_WORKERS": params.get("OCR_WORKERS", Constants.OCR_WORKERS),
             "USE_TESSERACT_AUTO": params.get("USE_TESSERACT_AUTO", Constants.USE_TESSERACT_AUTO),
             "CHUNKING_STRATEGY": params.get("CHUNKING_STRATEGY", "paragraph"), #or "paragraph" or "sentences" or "wiki_sections"
-            "MAX_ANIMALS": params.get("MAX_ANIMALS", 10)
+            "MAX_ANIMALS": params.get("MAX_ANIMALS", 10),
         }
-        new_manifest = Utils.make_manifest(pdf_paths, wiki_titles, manifest_params)
+        # Near-duplicate removal is opt-in; its threshold only enters the manifest when enabled,
+        # so existing prepared dirs stay valid
+        if params.get("NEAR_DEDUP", Constants.NEAR_DEDUP):
+            manifest_params["NEAR_DEDUP_THRESHOLD"] = params.get("NEAR_DEDUP_THRESHOLD", Constants.NEAR_DEDUP_THRESHOLD)
+        # Likewise the wiki backend is only recorded when it is not the original wikipedia-library one
+        if wiki_backend != "library":
+            manifest_params["WIKI_BACKEND"] = wiki_backend
+        # PDF fingerprints: files whose (size, mtime_ns, inode) are unchanged are not re-read
+        fingerprints = FingerprintCache(params.get("FINGERPRINT_CACHE") or os.path.join(
+            os.path.dirname(os.path.abspath(out_dir)), Constants.FINGERPRINT_CACHE), Constants.FILE_DIGEST)
+        digests = fingerprints.digests(pdf_paths, workers=params.get("FINGERPRINT_WORKERS", Constants.FINGERPRINT_WORKERS))
+        new_manifest = Utils.make_manifest(pdf_paths, wiki_titles, manifest_params, digests=digests,
+                                           algo=Constants.FILE_DIGEST)
         old_manifest = Utils.load_manifest(manifest_path) if os.path.exists(manifest_path) else None
+        if old_manifest:
+            # manifests written while INDEX_TYPE and OCR_RENDER_IN_WORKER were manifest params
+            old_params = old_manifest.get("params", {})
+            old_params.pop("INDEX_TYPE", None)
+            old_params.pop("OCR_RENDER_IN_WORKER", None)
+            # and while WIKI_BACKEND was recorded even at its "library" default
+            if old_params.get("WIKI_BACKEND") == "library":
+                old_params.pop("WIKI_BACKEND")
         diff = Utils.manifests_differ(old_manifest, new_manifest)
+        pdf_sha1s = {info["path"]: info["sha1"] for info in new_manifest["pdfs"]}
+
+        # HTTP response cache shared by sibling out_dirs. A rebuild caused only by a params change, a forced
+        # rebuild, or the first build of an out_dir whose siblings already filled the cache replays cached
+        # wiki responses instead of revalidating them.
+        http_cache_dir = params.get("HTTP_CACHE_DIR") or os.path.join(
+            os.path.dirname(os.path.abspath(out_dir)), Constants.HTTP_CACHE_DIR)
+        http_cache_mode = params.get("HTTP_CACHE_MODE", Constants.HTTP_CACHE_MODE)
+        if http_cache_mode == "revalidate" and (
+                force or diff.get("reason") == "params changed"
+                or (old_manifest is None and os.path.isdir(http_cache_dir) and any(os.scandir(http_cache_dir)))):
+            http_cache_mode = "prefer_cache"
+        HttpClient.configure_cache(http_cache_dir, http_cache_mode)
 
         # If nothing changed and artifacts exist, load them
         if not force and old_manifest and diff.get("diff") is False \
@@ -75,24 +131,38 @@ class Base:
             print("No changes detected. Loading existing artifacts.")
             chunks = Utils.load_jsonl(chunks_path)
             embeddings = np.load(emb_path)
-            index = Indexer.load_index(faiss_path)
+            index = Indexer.load_index(faiss_path, old_manifest.get("index"))
+            if Base._index_outdated(index, index_type, embeddings.shape[0]):
+                return Base._reindex(out_dir, params, old_manifest, chunks, embeddings, index_type)
             return chunks, embeddings, index
 
-        # Determine if incremental update is applicable
-        incremental_ok = (not force and old_manifest is not None 
-                          and diff.get("reason") == "added_files_or_wiki"
+        # Determine if incremental update is applicable. Removed or edited PDFs can be handled in place
+        # once the stored chunks carry their document fingerprint (doc_sha1).
+        reason = diff.get("reason")
+        incremental_ok = (not force and old_manifest is not None
+                          and (reason == "added_files_or_wiki"
+                               or (reason == "removed_or_changed_files" and old_manifest.get("doc_fingerprints")))
                           and os.path.exists(chunks_path) and os.path.exists(emb_path) and os.path.exists(faiss_path))
 
-        # Prepare pdf for OCR
-        collected_pages = []
-        ocr_jobs = []
-        for pdf_path in pdf_paths:
-            if not os.path.exists(pdf_path):
-                print(f"[warn] missing pdf: {pdf_path}; skipping")
-                continue
-            pages_text, jobs = Ingestion.pdf_to_pages_with_jobs(pdf_path, dpi=manifest_params["OCR_DPI"])
-            collected_pages.extend(pages_text)
-            ocr_jobs.extend(jobs)
+        # Decide which OCR engine to use (Tesseract if available and enabled)
+        tesseract_binary_available = shutil.which("tesseract") is not None
+        use_tesseract = manifest_params["USE_TESSERACT_AUTO"] and Constants.TESSERACT_PY_AVAILABLE and tesseract_binary_available
+
+        # Incremental update path
+        if incremental_ok:
+            return Base._prepare_incremental(pdf_paths, wiki_titles, wiki_lang, out_dir, params, manifest_params,
+                                             new_manifest, old_manifest, diff, use_tesseract,
+                                             embed_cache_dir, embed_workers, ocr_cache_dir)
+
+        # Streaming full rebuild: pages flow through chunk/dedup/embed/index in bounded batches
+        if params.get("STREAMING", Constants.STREAMING):
+            return Base._prepare_streaming(pdf_paths, wiki_titles, wiki_lang, out_dir, params,
+                                           manifest_params, new_manifest, use_tesseract,
+                                           embed_cache_dir, embed_workers, ocr_cache_dir)
+
+        print("Performing full rebuild")
+        collected_pages, new_pages_from_ocr = Base._collect_pdf_pages(pdf_paths, params, manifest_params,
+                                                                      use_tesseract, ocr_cache_dir, pdf_sha1s)
 
         # Prepare wiki pages
         wiki_pages = []
@@ -102,114 +172,618 @@ class Base:
             for seed in wiki_titles:
                 seed_url = Ingestion.page_url_from_title(seed, lang=wiki_lang)
                 animal_titles.extend(Ingestion.extract_first_column_titles_from_url(seed_url, max_titles=max_animals))
-            wiki_pages = Ingestion.fetch_wikipedia_titles(animal_titles, lang=wiki_lang, include_links=False)
-
-        # Decide which OCR engine to use (Tesseract if available and enabled)
-        tesseract_binary_available = shutil.which("tesseract") is not None
-        use_tesseract = manifest_params["USE_TESSERACT_AUTO"] and Constants.TESSERACT_PY_AVAILABLE and tesseract_binary_available
+            wiki_pages = Ingestion.fetch_wiki_pages(animal_titles, lang=wiki_lang,
+                                                    backend=wiki_backend)
 
-        # Incremental update path
-        if incremental_ok:
-            print("Incremental update detected: processing only new files/wiki.")
-            existing_chunks = Utils.load_jsonl(chunks_path)
-            existing_hashes = {c["hash"] for c in existing_chunks}
-            existing_embeddings = np.load(emb_path)
-            index = Indexer.load_index(faiss_path)
-
-            # Perform OCR on new image pages if any
-            new_pages_from_ocr = []
-            if ocr_jobs:
-                print(f"[ocr] Running OCR on {len(ocr_jobs)} pages with {manifest_params['OCR_WORKERS']} workers (CPU mode). Using Tesseract: {use_tesseract}")
-                new_pages_from_ocr = Ingestion._run_parallel_ocr(ocr_jobs,
-                                                                 use_tesseract=use_tesseract,
-                                                                 tesseract_langs=Constants.TESSERACT_LANGS,
-                                                                 workers=manifest_params["OCR_WORKERS"],
-                                                                 downscale_max_width=manifest_params["DOWNSCALE_MAX_WIDTH"])
-            # If the set of wiki seed titles changed, re-fetch those pages
-            if diff.get("wiki_changed"):
-                wiki_pages = Ingestion.fetch_wikipedia_titles(wiki_titles, lang=wiki_lang)
-
-            all_new_pages = collected_pages + new_pages_from_ocr + wiki_pages
-            if not all_new_pages:
-                Utils.save_manifest(manifest_path, new_manifest)
-                return existing_chunks, existing_embeddings, index
-
-            new_chunks = Chunker.make_chunks(all_new_pages,
-                                             strategy=manifest_params["CHUNKING_STRATEGY"],
-                                             max_chars=manifest_params["CHUNK_MAX_CHARS"],
-                                             overlap_chars=manifest_params["CHUNK_OVERLAP"])
-            new_chunks_unique, added_hashes = Deduplicator.dedupe_chunks(new_chunks, existing_hashes=existing_hashes)
-            start_id = len(existing_chunks)
-            for i, chunk in enumerate(new_chunks_unique):
-                chunk["id"] = f"chunk_{start_id + i}"
-
-            new_embeddings = Embedder.embed_chunks(new_chunks_unique,
-                                                   model_name=manifest_params["EMBED_MODEL_NAME"],
-                                                   batch_size=Constants.EMBED_BATCH_SIZE)
-            if new_embeddings.shape[0] > 0:
-                faiss.normalize_L2(new_embeddings)
-                index.add(new_embeddings)
-                combined_embeddings = np.vstack([existing_embeddings, new_embeddings]).astype(Constants.EMBED_DTYPE)
-                combined_chunks = existing_chunks + new_chunks_unique
-                Utils.save_jsonl(chunks_path, combined_chunks)
-                np.save(emb_path, combined_embeddings)
-                Indexer.save_index(index, faiss_path)
-                prev_pages = Utils.load_jsonl(pages_path) if os.path.exists(pages_path) else []
-                prev_pages.extend(collected_pages + new_pages_from_ocr + wiki_pages)
-                Utils.save_jsonl(pages_path, prev_pages)
-                Utils.save_manifest(manifest_path, new_manifest)
-                print(f"Appended {len(new_chunks_unique)} chunks and {new_embeddings.shape[0]} embeddings.")
-                return combined_chunks, combined_embeddings, index
-            else:
-                # All new chunks were duplicates
-                Utils.save_manifest(manifest_path, new_manifest)
-                print("No unique chunks found (duplicates).")
-                return existing_chunks, existing_embeddings, index
-        print("Performing full rebuild")
-        print(f"[ocr] Image pages needing OCR: {len(ocr_jobs)}. Workers: {manifest_params['OCR_WORKERS']}. "
-              f"DPI: {manifest_params['OCR_DPI']}. Tesseract available: {use_tesseract}")
-        new_pages_from_ocr = []
-        if ocr_jobs:
-            new_pages_from_ocr = Ingestion._run_parallel_ocr(ocr_jobs,
-                                                             use_tesseract=use_tesseract,
-                                                             tesseract_langs=Constants.TESSERACT_LANGS,
-                                                             workers=manifest_params["OCR_WORKERS"],
-                                                             downscale_max_width=manifest_params["DOWNSCALE_MAX_WIDTH"])
         all_pages = collected_pages + new_pages_from_ocr + wiki_pages
         Utils.save_jsonl(pages_path, all_pages)
 
         # Chunk all pages, remove duplicates, embed and build index
-        chunks = Chunker.make_chunks(all_pages,
-                                     strategy=manifest_params["CHUNKING_STRATEGY"],
-                                     max_chars=manifest_params["CHUNK_MAX_CHARS"],
-                                     overlap_chars=manifest_params["CHUNK_OVERLAP"])
-        chunks, _ = Deduplicator.dedupe_chunks(chunks)
+        all_chunks = Chunker.make_chunks(all_pages,
+                                         strategy=manifest_params["CHUNKING_STRATEGY"],
+                                         max_chars=manifest_params["CHUNK_MAX_CHARS"],
+                                         overlap_chars=manifest_params["CHUNK_OVERLAP"],
+                                         workers=params.get("CHUNK_WORKERS", Constants.CHUNK_WORKERS))
+        near_index = Base._near_index(manifest_params)
+        dedup_stats = {}
+        chunks, _ = Deduplicator.dedupe_chunks(all_chunks, near_index=near_index, stats=dedup_stats)
+        doc_hashes = Base._add_doc_hashes({}, all_chunks, dedup_stats.get("near_map"))
         embeddings = Embedder.embed_chunks(chunks,
                                            model_name=manifest_params["EMBED_MODEL_NAME"],
-                                           batch_size=Constants.EMBED_BATCH_SIZE)
-        index = Indexer.build_faiss(embeddings)
+                                           batch_size=Constants.EMBED_BATCH_SIZE,
+                                           cache_dir=embed_cache_dir,
+                                           workers=embed_workers)
+        index = Indexer.build_faiss(embeddings, index_type=index_type)
 
         Utils.save_jsonl(chunks_path, chunks)
+        ChunkStore.write(store_dir, chunks)
         np.save(emb_path, embeddings)
         Indexer.save_index(index, faiss_path)
+        Base._save_doc_hashes(out_dir, doc_hashes)
+        Base._save_near_index(out_dir, near_index, dedup_stats, new_manifest)
+        Base._update_lexical(out_dir, params, chunks)
+        Base._update_filters(out_dir, params, chunks)
+        new_manifest["index"] = Base._index_info(index, embeddings)
+        new_manifest["doc_fingerprints"] = True
         Utils.save_manifest(manifest_path, new_manifest)
         print("Full rebuild complete.")
         return chunks, embeddings, index
 
 
+    #-------------------------
+    # Text pages and OCR pages of the given PDFs, tagged with their sha1 (doc_sha1).
+    # Text layers are extracted by TEXT_WORKERS processes in pdf_paths order; image-only pages are only
+    # recorded and then rendered by run_ocr in PAGE_RENDER_BATCH-sized windows (or by the OCR workers).
+    #------------------------
+    @staticmethod
+    def _collect_pdf_pages(pdf_paths: list, params: dict, manifest_params: dict, use_tesseract: bool,
+                           ocr_cache_dir: str, pdf_sha1s: dict) -> tuple:
+        collected_pages = []
+        ocr_pdfs = []
+        for pdf_path, pages_text, image_pages in Ingestion.iter_pdf_texts(
+                Base._existing_pdfs(pdf_paths), workers=params.get("TEXT_WORKERS", Constants.TEXT_WORKERS)):
+            sha = pdf_sha1s.get(os.path.abspath(pdf_path))
+            for page in pages_text:
+                page["doc_sha1"] = sha
+            collected_pages.extend(pages_text)
+            if image_pages:
+                ocr_pdfs.append((pdf_path, image_pages))
+        n_ocr_pages = sum(len(pages) for _, pages in ocr_pdfs)
+        print(f"[ocr] Image pages needing OCR: {n_ocr_pages}. Workers: {manifest_params['OCR_WORKERS']}. "
+              f"DPI: {manifest_params['OCR_DPI']}. Tesseract available: {use_tesseract}")
+        new_pages_from_ocr = []
+        if ocr_pdfs:
+            new_pages_from_ocr = Ingestion.run_ocr(ocr_pdfs,
+                                                   use_tesseract=use_tesseract,
+                                                   tesseract_langs=Constants.TESSERACT_LANGS,
+                                                   workers=manifest_params["OCR_WORKERS"],
+                                                   downscale_max_width=manifest_params["DOWNSCALE_MAX_WIDTH"],
+                                                   dpi=manifest_params["OCR_DPI"],
+                                                   render_batch=params.get("PAGE_RENDER_BATCH", Constants.PAGE_RENDER_BATCH),
+                                                   render_in_worker=params.get("OCR_RENDER_IN_WORKER", Constants.OCR_RENDER_IN_WORKER),
+                                                   cache_dir=ocr_cache_dir,
+                                                   pdf_sha1s=pdf_sha1s)
+        return collected_pages, new_pages_from_ocr
+
+
+    #-------------------------
+    # Incremental update. Chunks of removed or edited PDFs become tombstones ("deleted": true in chunks.jsonl)
+    # and are removed from the index; only added or edited PDFs are extracted, OCR'd, chunked and embedded.
+    # FAISS ids stay equal to row positions in chunks/embeddings: IVF indexes remove rows in place and
+    # compact once COMPACT_DEAD_RATIO of the rows are dead, flat/HNSW indexes are compacted right away.
+    # Compaction drops dead rows and rebuilds the index from the stored embeddings (nothing is re-embedded).
+    #------------------------
+    @staticmethod
+    def _prepare_incremental(pdf_paths: list, wiki_titles: list, wiki_lang: str, out_dir: str, params: dict,
+                             manifest_params: dict, new_manifest: dict, old_manifest: dict, diff: dict,
+                             use_tesseract: bool, embed_cache_dir: str, embed_workers: int, ocr_cache_dir: str):
+        print("Incremental update detected: processing only new or changed files/wiki.")
+        chunks_path = os.path.join(out_dir, Constants.CHUNKS_JSONL)
+        emb_path = os.path.join(out_dir, Constants.EMBEDDINGS_NPY)
+        faiss_path = os.path.join(out_dir, Constants.FAISS_INDEX_FILE)
+        pages_path = os.path.join(out_dir, Constants.PAGES_JSONL)
+        manifest_path = os.path.join(out_dir, Constants.MANIFEST_JSON)
+        store_dir = os.path.join(out_dir, Constants.CHUNK_STORE_DIR)
+
+        chunks = Utils.load_jsonl(chunks_path)
+        embeddings = np.load(emb_path)
+        index = Indexer.load_index(faiss_path, old_manifest.get("index"))
+        doc_hashes = Base._load_doc_hashes(out_dir)
+        pdf_sha1s = {info["path"]: info["sha1"] for info in new_manifest["pdfs"]}
+        removed = set(diff.get("removed", []))
+        added = set(diff.get("added", []))
+
+        # 1) Tombstone chunks of removed/edited documents. A chunk whose text also occurs in a document that
+        #    is still present (it was deduplicated against it) is handed over to that document instead.
+        n_removed = 0
+        dead_ids = []
+        if removed:
+            for sha in removed:
+                doc_hashes.pop(sha, None)
+            owners = {}
+            for sha, hashes in doc_hashes.items():
+                for h in hashes:
+                    owners.setdefault(h, sha)
+            for i, chunk in enumerate(chunks):
+                if chunk.get("deleted") or chunk.get("doc_sha1") not in removed:
+                    continue
+                owner = owners.get(chunk["hash"])
+                if owner:
+                    chunk["doc_sha1"] = owner
+                else:
+                    chunk["deleted"] = True
+                    dead_ids.append(i)
+            if dead_ids and Indexer.supports_remove(index):
+                Indexer.remove_ids(index, dead_ids)
+            n_removed = len(dead_ids)
+            print(f"[incremental] {len(removed)} removed/changed documents: {n_removed} chunks tombstoned.")
+
+        # 2) Pages of added/edited documents (and wiki pages when the seed titles changed)
+        new_paths = [p for p in pdf_paths if os.path.exists(p) and pdf_sha1s.get(os.path.abspath(p)) in added]
+        collected_pages, new_pages_from_ocr = Base._collect_pdf_pages(new_paths, params, manifest_params,
+                                                                      use_tesseract, ocr_cache_dir, pdf_sha1s)
+        wiki_pages = []
+        if diff.get("wiki_changed"):
+            wiki_pages = Ingestion.fetch_wiki_pages(wiki_titles, lang=wiki_lang,
+                                                    backend=wiki_backend)
+        new_pages = collected_pages + new_pages_from_ocr + wiki_pages
+
+        new_chunks = Chunker.make_chunks(new_pages,
+                                         strategy=manifest_params["CHUNKING_STRATEGY"],
+                                         max_chars=manifest_params["CHUNK_MAX_CHARS"],
+                                         overlap_chars=manifest_params["CHUNK_OVERLAP"],
+                                         workers=params.get("CHUNK_WORKERS", Constants.CHUNK_WORKERS))
+        live_hashes = {c["hash"] for c in chunks if not c.get("deleted")}
+        # near-duplicates are checked against the live chunks only (signatures of tombstones are dropped)
+        near_index = None
+        if "NEAR_DEDUP_THRESHOLD" in manifest_params:
+            near_index = MinHashIndex.load(os.path.join(out_dir, Constants.MINHASH_DIR),
+                                           manifest_params["NEAR_DEDUP_THRESHOLD"], keep=live_hashes) \
+                or MinHashIndex.from_chunks(chunks, manifest_params["NEAR_DEDUP_THRESHOLD"])
+        dedup_stats = {}
+        new_chunks_unique, _ = Deduplicator.dedupe_chunks(new_chunks, existing_hashes=live_hashes,
+                                                          near_index=near_index, stats=dedup_stats)
+        Base._add_doc_hashes(doc_hashes, new_chunks, dedup_stats.get("near_map"))
+        # chunk ids are not row positions (dedup leaves gaps), so continue after the largest one in use
+        next_id = 1 + max((int(c["id"].split("_")[-1]) for c in chunks if c.get("id", "").startswith("chunk_")),
+                          default=-1)
+        for i, chunk in enumerate(new_chunks_unique):
+            chunk["id"] = f"chunk_{next_id + i}"
+
+        # without new chunks (removals only) the model is not loaded just to learn its dimension
+        new_embeddings = Embedder.embed_chunks(new_chunks_unique,
+                                               model_name=manifest_params["EMBED_MODEL_NAME"],
+                                               batch_size=Constants.EMBED_BATCH_SIZE,
+                                               cache_dir=embed_cache_dir,
+                                               workers=embed_workers,
+                                               dim=index.d)
+        start_row = len(chunks)
+        if new_embeddings.shape[0] > 0:
+            faiss.normalize_L2(new_embeddings)
+            chunks = chunks + new_chunks_unique
+            embeddings = np.vstack([embeddings, new_embeddings]).astype(Constants.EMBED_DTYPE)
+
+        # 3) Rebuild the index when INDEX_TYPE changed, compact, or add the new rows to the existing index
+        n_dead = sum(1 for c in chunks if c.get("deleted"))
+        index_type = params.get("INDEX_TYPE", Constants.INDEX_TYPE)
+        compacted = False
+        rebuilt = False
+        if Base._index_outdated(index, index_type, len(chunks)):
+            chunks, embeddings, index, compacted = Base._rebuild_index(chunks, embeddings, index_type)
+            n_dead = 0 if compacted else n_dead
+            rebuilt = True
+        elif n_dead and (not Indexer.supports_remove(index) or n_dead > Constants.COMPACT_DEAD_RATIO * len(chunks)):
+            print(f"[incremental] compacting: dropping {n_dead} dead rows of {len(chunks)}")
+            chunks, embeddings, index = Base._compact(chunks, embeddings, index_type)
+            n_dead = 0
+            compacted = True
+            rebuilt = True
+        elif new_embeddings.shape[0] > 0:
+            Indexer.add_rows(index, new_embeddings, start_row)
+
+        if not new_chunks_unique and not n_removed:
+            # All new chunks were duplicates
+            print("No unique chunks found (duplicates).")
+        Utils.save_jsonl(chunks_path, chunks)
+        ChunkStore.write(store_dir, chunks)
+        np.save(emb_path, embeddings)
+        Indexer.save_index(index, faiss_path)
+        Base._save_doc_hashes(out_dir, doc_hashes)
+        Base._save_near_index(out_dir, near_index, dedup_stats, new_manifest)
+        if compacted:
+            Base._update_lexical(out_dir, params, chunks)
+            Base._update_filters(out_dir, params, chunks)
+        else:
+            Base._update_lexical(out_dir, params, chunks, new_chunks=new_chunks_unique, start_row=start_row,
+                                 dead_ids=dead_ids)
+            Base._update_filters(out_dir, params, chunks, new_chunks=new_chunks_unique, start_row=start_row,
+                                 dead_ids=dead_ids)
+        prev_pages = Utils.load_jsonl(pages_path) if os.path.exists(pages_path) else []
+        prev_pages = [p for p in prev_pages if p.get("doc_sha1") not in removed] if removed else prev_pages
+        Utils.save_jsonl(pages_path, prev_pages + new_pages)
+        if rebuilt:
+            live_ids = np.asarray([i for i, c in enumerate(chunks) if not c.get("deleted")], dtype=np.int64) if n_dead else None
+            new_manifest["index"] = Base._index_info(index, embeddings, live_ids)
+        else:
+            new_manifest["index"] = Base._index_info(index, previous=old_manifest.get("index"))
+        new_manifest["tombstones"] = n_dead
+        new_manifest["doc_fingerprints"] = old_manifest.get("doc_fingerprints", False)
+        Utils.save_manifest(manifest_path, new_manifest)
+        print(f"Appended {len(new_chunks_unique)} chunks, removed {n_removed}; {n_dead} tombstones pending compaction.")
+        return chunks, embeddings, index
+
+
+    #-------------------------
+    # Drop tombstoned rows and rebuild the index from the remaining (already normalized) embeddings.
+    #------------------------
+    @staticmethod
+    def _compact(chunks: list, embeddings: np.ndarray, index_type: str) -> tuple:
+        live = [i for i, c in enumerate(chunks) if not c.get("deleted")]
+        chunks = [chunks[i] for i in live]
+        embeddings = np.ascontiguousarray(embeddings[live], dtype=Constants.EMBED_DTYPE)
+        index = Indexer.build_faiss(embeddings, index_type=index_type, normalize=False)
+        return chunks, embeddings, index
+
+
+    #-------------------------
+    # True when the stored index is not of the type INDEX_TYPE asks for (for "auto": at n_rows vectors).
+    # An empty corpus always has a flat index.
+    #------------------------
+    @staticmethod
+    def _index_outdated(index: 'faiss.Index', index_type: str, n_rows: int) -> bool:
+        return n_rows > 0 and Indexer.describe(index)["type"] != Indexer.resolve_index_type(index_type, n_rows)
+
+    #-------------------------
+    # Build a new index of index_type from the stored (already normalized) embeddings. Tombstoned rows are
+    # removed from an IVF index, or dropped by compaction for flat/HNSW indexes (and above COMPACT_DEAD_RATIO).
+    # Returns (chunks, embeddings, index, compacted).
+    #------------------------
+    @staticmethod
+    def _rebuild_index(chunks: list, embeddings: np.ndarray, index_type: str) -> tuple:
+        dead = [i for i, c in enumerate(chunks) if c.get("deleted")]
+        removable = Indexer.resolve_index_type(index_type, len(chunks)) in ("ivf_flat", "ivf_pq")
+        if dead and (not removable or len(dead) > Constants.COMPACT_DEAD_RATIO * len(chunks)):
+            chunks, embeddings, index = Base._compact(chunks, embeddings, index_type)
+            return chunks, embeddings, index, True
+        index = Indexer.build_faiss(embeddings, index_type=index_type, normalize=False)
+        Indexer.remove_ids(index, dead)
+        return chunks, embeddings, index, False
+
+    #-------------------------
+    # INDEX_TYPE changed but the corpus did not: rebuild only index.faiss from embeddings.npy (nothing is
+    # re-extracted or re-embedded). The BM25 and filter indexes are rebuilt only if compaction renumbered rows.
+    # A fresh manifest timestamp tells running Retrievers to reload.
+    #------------------------
+    @staticmethod
+    def _reindex(out_dir: str, params: dict, manifest: dict, chunks: list, embeddings: np.ndarray,
+                 index_type: str) -> tuple:
+        print(f"[index] INDEX_TYPE={index_type}: rebuilding the index from the stored embeddings")
+        chunks, embeddings, index, compacted = Base._rebuild_index(chunks, embeddings, index_type)
+        if compacted:
+            Utils.save_jsonl(os.path.join(out_dir, Constants.CHUNKS_JSONL), chunks)
+            ChunkStore.write(os.path.join(out_dir, Constants.CHUNK_STORE_DIR), chunks)
+            np.save(os.path.join(out_dir, Constants.EMBEDDINGS_NPY), embeddings)
+            Base._update_lexical(out_dir, params, chunks)
+            Base._update_filters(out_dir, params, chunks)
+        Indexer.save_index(index, os.path.join(out_dir, Constants.FAISS_INDEX_FILE))
+        n_dead = sum(1 for c in chunks if c.get("deleted"))
+        live_ids = np.asarray([i for i, c in enumerate(chunks) if not c.get("deleted")], dtype=np.int64) if n_dead else None
+        manifest["index"] = Base._index_info(index, embeddings, live_ids)
+        manifest["tombstones"] = n_dead
+        manifest["timestamp"] = time.time()
+        Utils.save_manifest(os.path.join(out_dir, Constants.MANIFEST_JSON), manifest)
+        return chunks, embeddings, index
+
+
+    #-------------------------
+    # doc_hashes: PDF sha1 -> hashes of every chunk the document produced, including chunks dropped as
+    # duplicates of another document, so removing one copy can hand the text over to the other.
+    # aliases (near_map from Deduplicator stats) records a near-duplicate under the hash of the chunk kept for it.
+    #------------------------
+    @staticmethod
+    def _add_doc_hashes(doc_hashes: dict, chunks: list, aliases: dict = None) -> dict:
+        aliases = aliases or {}
+        for chunk in chunks:
+            sha = chunk.get("doc_sha1")
+            if sha:
+                h = aliases.get(chunk["hash"], chunk["hash"])
+                hashes = doc_hashes.setdefault(sha, [])
+                if not hashes or hashes[-1] != h:
+                    hashes.append(h)
+        return doc_hashes
+
+    @staticmethod
+    def _load_doc_hashes(out_dir: str) -> dict:
+        path = os.path.join(out_dir, Constants.DOC_HASHES_JSON)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _save_doc_hashes(out_dir: str, doc_hashes: dict):
+        path = os.path.join(out_dir, Constants.DOC_HASHES_JSON)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({sha: list(dict.fromkeys(hashes)) for sha, hashes in doc_hashes.items()}, f)
+        os.replace(path + ".tmp", path)
+
+
+    #-------------------------
+    # MinHash index for near-duplicate removal, or None when NEAR_DEDUP is off.
+    #------------------------
+    @staticmethod
+    def _near_index(manifest_params: dict):
+        if "NEAR_DEDUP_THRESHOLD" not in manifest_params:
+            return None
+        return MinHashIndex(manifest_params["NEAR_DEDUP_THRESHOLD"])
+
+    @staticmethod
+    def _save_near_index(out_dir: str, near_index, dedup_stats: dict, new_manifest: dict):
+        if near_index is None:
+            return
+        near_index.save(os.path.join(out_dir, Constants.MINHASH_DIR))
+        stats = {k: v for k, v in dedup_stats.items() if k != "near_map"}
+        print(f"[dedup] {stats.get('chunks', 0)} chunks: {stats.get('exact_dropped', 0)} exact and "
+              f"{stats.get('near_dropped', 0)} near duplicates dropped")
+        new_manifest["dedup"] = stats
+
+
+    #-------------------------
+    # BM25 index next to the FAISS index (rows aligned with chunks). With new_chunks, the existing index
+    # tombstones dead_ids and appends new_chunks as rows start_row..; it is built from all chunks instead
+    # when new_chunks is None (full rebuild, compaction renumbered rows), when it is missing, or when
+    # LEXICAL_FOLD_DIACRITICS changed.
+    #------------------------
+    @staticmethod
+    def _update_lexical(out_dir: str, params: dict, chunks: list, new_chunks: list = None, start_row: int = 0,
+                        dead_ids: list = ()):
+        if not params.get("LEXICAL_INDEX", Constants.LEXICAL_INDEX):
+            return
+        lexical_dir = os.path.join(out_dir, Constants.LEXICAL_DIR)
+        fold = params.get("LEXICAL_FOLD_DIACRITICS", Constants.LEXICAL_FOLD_DIACRITICS)
+        lexical = LexicalIndex.load(lexical_dir) if new_chunks is not None else None
+        if lexical is None or lexical.fold != fold or len(lexical) != start_row:
+            lexical = LexicalIndex.build(chunks, fold=fold)
+        else:
+            lexical.mark_deleted(dead_ids)
+            lexical.append(new_chunks, start_row)
+        Base._save_lexical(out_dir, lexical)
+
+    @staticmethod
+    def _save_lexical(out_dir: str, lexical: LexicalIndex):
+        lexical.save(os.path.join(out_dir, Constants.LEXICAL_DIR))
+        print(f"[lexical] {len(lexical)} rows, {len(lexical.segments)} segments")
+
+
+    #-------------------------
+    # Filter row lists next to the FAISS index, updated like the BM25 index: tombstone dead_ids and append
+    # new_chunks, or build from all chunks (full rebuild, compaction, missing index, FILTER_FIELDS changed).
+    #------------------------
+    @staticmethod
+    def _update_filters(out_dir: str, params: dict, chunks: list, new_chunks: list = None, start_row: int = 0,
+                        dead_ids: list = ()):
+        if not params.get("FILTER_INDEX", Constants.FILTER_INDEX):
+            return
+        filter_dir = os.path.join(out_dir, Constants.FILTER_DIR)
+        filters = FilterIndex.load(filter_dir) if new_chunks is not None else None
+        if filters is None or len(filters) != start_row:
+            filters = FilterIndex.build(chunks)
+        else:
+            filters.mark_deleted(dead_ids)
+            filters.append(new_chunks, start_row)
+        Base._save_filters(out_dir, filters)
+
+    @staticmethod
+    def _save_filters(out_dir: str, filters: FilterIndex):
+        filters.save(os.path.join(out_dir, Constants.FILTER_DIR))
+        print(f"[filters] {len(filters)} rows, {filters.n_values} values of {', '.join(filters.fields)}")
+
+
+    #-------------------------
+    # Manifest entry for the index: type, search parameters and measured recall@10 vs exact search.
+    # Recall is measured when an index is built; rows appended to or removed from an existing index
+    # (previous = its manifest entry) keep the recall measured at build time instead of re-measuring.
+    #------------------------
+    @staticmethod
+    def _index_info(index: 'faiss.Index', embeddings: np.ndarray = None, live_ids: np.ndarray = None,
+                    previous: dict = None) -> dict:
+        info = Indexer.describe(index)
+        if previous is not None:
+            if "recall_at_10" in previous and previous.get("type") == info["type"]:
+                info["recall_at_10"] = previous["recall_at_10"]
+        elif info["type"] != "flat":
+            # tombstoned rows are no longer in the index; measure against the live rows only
+            info["recall_at_10"] = round(Indexer.measure_recall(index, embeddings, k=10, live_ids=live_ids), 4)
+            print(f"[index] {info['type']} recall@10 vs exact: {info['recall_at_10']:.3f}")
+        return info
+
+
+    #-------------------------
+    # Drop (and warn about) PDF paths that do not exist.
+    #------------------------
+    @staticmethod
+    def _existing_pdfs(pdf_paths: list) -> list:
+        existing = []
+        for pdf_path in pdf_paths:
+            if not os.path.exists(pdf_path):
+                print(f"[warn] missing pdf: {pdf_path}; skipping")
+                continue
+            existing.append(pdf_path)
+        return existing
+
+
+    #-------------------------
+    # Yield pages in the same order as the list-based rebuild: PDF text pages, OCR pages sorted by
+    # (title, page), then wiki pages. At most PAGE_RENDER_BATCH rendered pages or one wiki batch is held at a time.
+    #------------------------
+    @staticmethod
+    def _iter_pages(pdf_paths: list, wiki_titles: list, wiki_lang: str, params: dict,
+                    manifest_params: dict, use_tesseract: bool, ocr_cache_dir: str = None,
+                    pdf_sha1s: dict = None):
+        ocr_todo = []
+        for pdf_path, pages_text, image_pages in Ingestion.iter_pdf_texts(
+                Base._existing_pdfs(pdf_paths), workers=params.get("TEXT_WORKERS", Constants.TEXT_WORKERS)):
+            if pdf_sha1s is not None:
+                sha = pdf_sha1s.get(os.path.abspath(pdf_path))
+                for page in pages_text:
+                    page["doc_sha1"] = sha
+            yield from pages_text
+            if image_pages:
+                ocr_todo.append((os.path.basename(pdf_path), pdf_path, image_pages))
+
+        for _, pdf_path, image_pages in sorted(ocr_todo, key=lambda x: x[0]):
+            print(f"[ocr] {os.path.basename(pdf_path)}: {len(image_pages)} image pages. Tesseract available: {use_tesseract}")
+            yield from Ingestion.run_ocr([(pdf_path, image_pages)],
+                                         use_tesseract=use_tesseract,
+                                         tesseract_langs=Constants.TESSERACT_LANGS,
+                                         workers=manifest_params["OCR_WORKERS"],
+                                         downscale_max_width=manifest_params["DOWNSCALE_MAX_WIDTH"],
+                                         dpi=manifest_params["OCR_DPI"],
+                                         render_batch=params.get("PAGE_RENDER_BATCH", Constants.PAGE_RENDER_BATCH),
+                                         render_in_worker=params.get("OCR_RENDER_IN_WORKER", Constants.OCR_RENDER_IN_WORKER),
+                                         cache_dir=ocr_cache_dir,
+                                         pdf_sha1s=pdf_sha1s)
+
+        if wiki_titles:
+            max_animals = params.get("MAX_ANIMALS", 10)
+            animal_titles = []
+            for seed in wiki_titles:
+                seed_url = Ingestion.page_url_from_title(seed, lang=wiki_lang)
+                animal_titles.extend(Ingestion.extract_first_column_titles_from_url(seed_url, max_titles=max_animals))
+            step = Constants.WIKI_API_BATCH if wiki_backend == "api" else Constants.STREAM_WIKI_BATCH
+            for i in range(0, len(animal_titles), step):
+                yield from Ingestion.fetch_wiki_pages(animal_titles[i:i + step], lang=wiki_lang,
+                                                      backend=wiki_backend)
+
+
+    #-------------------------
+    # Streaming full rebuild. Pages are chunked in small groups, deduplicated against every hash seen so
+    # far, and embedded/added to the index once STREAM_EMBED_BATCH chunks are pending; each embedded batch
+    # is also appended to the BM25 and filter indexes. pages, chunks and raw embeddings are appended to temp
+    # files and moved into place at the end, so peak memory follows the batch size rather than the corpus
+    # (the flat, BM25 and filter indexes themselves still grow with the corpus). Chunks are returned as the
+    # ChunkStore written from chunks.jsonl. Chunk ids match the list-based rebuild.
+    #------------------------
+    @staticmethod
+    def _prepare_streaming(pdf_paths: list, wiki_titles: list, wiki_lang: str, out_dir: str, params: dict,
+                           manifest_params: dict, new_manifest: dict, use_tesseract: bool,
+                           embed_cache_dir: str, embed_workers: int, ocr_cache_dir: str = None):
+        print("Performing streaming full rebuild")
+        chunks_path = os.path.join(out_dir, Constants.CHUNKS_JSONL)
+        emb_path = os.path.join(out_dir, Constants.EMBEDDINGS_NPY)
+        faiss_path = os.path.join(out_dir, Constants.FAISS_INDEX_FILE)
+        pages_path = os.path.join(out_dir, Constants.PAGES_JSONL)
+        manifest_path = os.path.join(out_dir, Constants.MANIFEST_JSON)
+        emb_raw_path = emb_path + ".raw.tmp"
+
+        page_batch = params.get("STREAM_PAGE_BATCH", Constants.STREAM_PAGE_BATCH)
+        embed_batch = params.get("STREAM_EMBED_BATCH", Constants.STREAM_EMBED_BATCH)
+        seen_hashes = set()
+        doc_hashes = {}
+        near_index = Base._near_index(manifest_params)
+        dedup_stats = {}
+        pending = []
+        state = {"index": None, "rows": 0, "dim": None, "chunk_offset": 0}
+        lexical = None
+        if params.get("LEXICAL_INDEX", Constants.LEXICAL_INDEX):
+            lexical = LexicalIndex(fold=params.get("LEXICAL_FOLD_DIACRITICS", Constants.LEXICAL_FOLD_DIACRITICS))
+        filters = FilterIndex() if params.get("FILTER_INDEX", Constants.FILTER_INDEX) else None
+
+        def flush(chunks_f, emb_f):
+            if not pending:
+                return
+            emb = Embedder.embed_chunks(pending,
+                                        model_name=manifest_params["EMBED_MODEL_NAME"],
+                                        batch_size=Constants.EMBED_BATCH_SIZE,
+                                        cache_dir=embed_cache_dir,
+                                        workers=embed_workers)
+            faiss.normalize_L2(emb)
+            if state["index"] is None:
+                state["dim"] = emb.shape[1]
+                state["index"] = faiss.IndexFlatIP(state["dim"])
+            state["index"].add(emb)
+            emb_f.write(np.ascontiguousarray(emb, dtype=Constants.EMBED_DTYPE).tobytes())
+            for chunk in pending:
+                chunks_f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+            # segments are merged once at the end instead of every LEXICAL/FILTER_MAX_SEGMENTS batches
+            if lexical is not None:
+                lexical.append(pending, state["rows"], merge=False)
+            if filters is not None:
+                filters.append(pending, state["rows"], merge=False)
+            state["rows"] += emb.shape[0]
+            pending.clear()
+
+        def chunk_group(group, pages_f, chunks_f, emb_f):
+            for page in group:
+                pages_f.write(json.dumps(page, ensure_ascii=False) + "\n")
+            chunks = Chunker.make_chunks(group,
+                                         strategy=manifest_params["CHUNKING_STRATEGY"],
+                                         max_chars=manifest_params["CHUNK_MAX_CHARS"],
+                                         overlap_chars=manifest_params["CHUNK_OVERLAP"])
+            # make_chunks numbers from 0 for each group; shift to the global counter
+            for chunk in chunks:
+                chunk["id"] = f"chunk_{state['chunk_offset'] + int(chunk['id'].split('_')[1])}"
+            state["chunk_offset"] += len(chunks)
+            unique, _ = Deduplicator.dedupe_chunks(chunks, near_index=near_index, stats=dedup_stats,
+                                                   seen=seen_hashes)
+            Base._add_doc_hashes(doc_hashes, chunks, dedup_stats.get("near_map"))
+            pending.extend(unique)
+            if len(pending) >= embed_batch:
+                flush(chunks_f, emb_f)
+
+        with open(pages_path + ".tmp", "w", encoding="utf-8") as pages_f, \
+             open(chunks_path + ".tmp", "w", encoding="utf-8") as chunks_f, \
+             open(emb_raw_path, "wb") as emb_f:
+            group = []
+            pdf_sha1s = {info["path"]: info["sha1"] for info in new_manifest["pdfs"]}
+            for page in Base._iter_pages(pdf_paths, wiki_titles, wiki_lang, params, manifest_params, use_tesseract,
+                                         ocr_cache_dir=ocr_cache_dir, pdf_sha1s=pdf_sha1s):
+                group.append(page)
+                if len(group) >= page_batch:
+                    chunk_group(group, pages_f, chunks_f, emb_f)
+                    group = []
+            if group:
+                chunk_group(group, pages_f, chunks_f, emb_f)
+            flush(chunks_f, emb_f)
+
+        dim = state["dim"] or Embedder.dimension(manifest_params["EMBED_MODEL_NAME"], cache_dir=embed_cache_dir)
+        index = state["index"] if state["index"] is not None else faiss.IndexFlatIP(dim)
+        Utils.raw_to_npy(emb_raw_path, emb_path, state["rows"], dim, Constants.EMBED_DTYPE)
+        os.remove(emb_raw_path)
+        os.replace(pages_path + ".tmp", pages_path)
+        os.replace(chunks_path + ".tmp", chunks_path)
+        chunks = ChunkStore.from_jsonl(chunks_path, os.path.join(out_dir, Constants.CHUNK_STORE_DIR))
+        # Embeddings are returned memory-mapped so the caller does not pull the whole matrix into RAM
+        embeddings = np.load(emb_path, mmap_mode="r")
+        # ANN indexes need a training sample, so they are built once the corpus size is known
+        index_type = params.get("INDEX_TYPE", Constants.INDEX_TYPE)
+        if Indexer.resolve_index_type(index_type, state["rows"]) != "flat":
+            index = Indexer.build_faiss(embeddings, index_type=index_type, normalize=False)
+        Indexer.save_index(index, faiss_path)
+        Base._save_doc_hashes(out_dir, doc_hashes)
+        Base._save_near_index(out_dir, near_index, dedup_stats, new_manifest)
+        if lexical is not None:
+            if len(lexical.segments) > 1:
+                lexical.merge()
+            Base._save_lexical(out_dir, lexical)
+        if filters is not None:
+            if len(filters.segments) > 1:
+                filters.merge()
+            Base._save_filters(out_dir, filters)
+        new_manifest["index"] = Base._index_info(index, embeddings)
+        new_manifest["doc_fingerprints"] = True
+        Utils.save_manifest(manifest_path, new_manifest)
+        print(f"Streaming rebuild complete: {state['rows']} chunks.")
+        return chunks, embeddings, index
+
+
     #-------------------------
     #Load previously prepared chunks, embeddings, and index from the specified output directory. Returns (chunks, embeddings, index)
+    # mmap=True maps embeddings (read-only) and, where the index type permits, the FAISS index instead of copying
+    # them into each process, so serving workers share the same physical pages.
+    # lazy_chunks=True returns a ChunkStore (indexable by FAISS row id) instead of parsing chunks.jsonl;
+    # a missing store is built once from chunks.jsonl.
     #------------------------
     @staticmethod
-    def load_prepared(out_dir: str = "prepared_data_cpu"):
+    def load_prepared(out_dir: str = "prepared_data_cpu", mmap: bool = Constants.LOAD_MMAP,
+                      lazy_chunks: bool = Constants.LOAD_CHUNK_STORE):
         chunks_path = os.path.join(out_dir, Constants.CHUNKS_JSONL)
         emb_path = os.path.join(out_dir, Constants.EMBEDDINGS_NPY)
         faiss_path = os.path.join(out_dir, Constants.FAISS_INDEX_FILE)
         if not (os.path.exists(chunks_path) and os.path.exists(emb_path) and os.path.exists(faiss_path)):
             raise FileNotFoundError("Prepared artifacts not found in out_dir")
-        chunks = Utils.load_jsonl(chunks_path)
-        embeddings = np.load(emb_path)
-        index = Indexer.load_index(faiss_path)
+        manifest_path = os.path.join(out_dir, Constants.MANIFEST_JSON)
+        manifest = Utils.load_manifest(manifest_path) if os.path.exists(manifest_path) else {}
+        if lazy_chunks:
+            store_dir = os.path.join(out_dir, Constants.CHUNK_STORE_DIR)
+            if os.path.exists(os.path.join(store_dir, ChunkStore.META_FILE)):
+                chunks = ChunkStore(store_dir)
+            else:
+                chunks = ChunkStore.from_jsonl(chunks_path, store_dir)
+        else:
+            chunks = Utils.load_jsonl(chunks_path)
+        embeddings = np.load(emb_path, mmap_mode="r" if mmap else None)
+        index = Indexer.load_index(faiss_path, manifest.get("index"), mmap=mmap)
         return chunks, embeddings, index
 
 if __name__ == "__main__":
@@ -223,9 +797,15 @@ if __name__ == "__main__":
         "OCR_DPI": Constants.OCR_DPI,
         "DOWNSCALE_MAX_WIDTH": Constants.DOWNSCALE_MAX_WIDTH,
         "OCR_WORKERS": Constants.OCR_WORKERS,
+        "OCR_RENDER_IN_WORKER": Constants.OCR_RENDER_IN_WORKER,
         "USE_TESSERACT_AUTO": Constants.USE_TESSERACT_AUTO,
         "CHUNKING_STRATEGY": "paragraph",  # or "sentences (DONE)" | "wiki_sections (DONE)" | "paragraph"
         "MAX_ANIMALS": 250, 
+        "EMBED_WORKERS": Constants.EMBED_WORKERS,
+        "TEXT_WORKERS": Constants.TEXT_WORKERS,
+        "CHUNK_WORKERS": Constants.CHUNK_WORKERS,
+        "INDEX_TYPE": Constants.INDEX_TYPE,     # "auto" | "flat" | "ivf_flat" | "ivf_pq" | "hnsw"
+        "WIKI_BACKEND": Constants.WIKI_BACKEND, # "library" | "api" (batched MediaWiki queries)
     }
 
     chunks, embeddings, index = Base.prepare_from_pdf_paths(
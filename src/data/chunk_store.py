@@ -0,0 +1,234 @@
+#chunk_store.py
+import os
+import json
+import numpy as np
+
+
+class ChunkStore:
+    """Columnar, memory-mapped chunk store with O(1) access by FAISS row id.
+
+    Layout of a store directory:
+      meta.json             row count, column kinds, dictionary values and per-row key orders
+      <col>.bin/.off.npy    variable-length UTF-8 columns (text, hash, id, extra): blob + uint64 offsets
+      <col>.codes.npy       dictionary-encoded string columns (doc_id, url, iucn_code, section, doc_sha1, ...), -1 = None
+      <col>.npy             integer columns (page)
+      <col>.null.npy        null mask for var/int columns
+    Keys not covered by a column are kept per row as JSON in the "extra" column, so export_jsonl
+    reproduces the original chunks.jsonl line for line.
+    """
+
+    VERSION = 1
+    VAR_COLUMNS = ("id", "text", "hash")
+    DICT_COLUMNS = ("doc_id", "source", "url", "image_url", "iucn_text", "iucn_code", "section", "doc_sha1")
+    INT_COLUMNS = ("page",)
+    META_FILE = "meta.json"
+
+    def __init__(self, store_dir: str):
+        self.dir = store_dir
+        with open(os.path.join(store_dir, self.META_FILE), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != self.VERSION:
+            raise ValueError(f"Unsupported chunk store version: {self.meta.get('version')}")
+        self.n = self.meta["n"]
+        self.kinds = self.meta["columns"]
+        self.dict_values = self.meta["dict_values"]
+        self.key_orders = [tuple(k) for k in self.meta["key_orders"]]
+        self._cols = {}
+        for name, kind in self.kinds.items():
+            self._cols[name] = self._open_column(name, kind)
+        self._key_order_codes = self._load("key_order.codes.npy")
+
+    def _load(self, fname: str):
+        path = os.path.join(self.dir, fname)
+        try:
+            return np.load(path, mmap_mode="r")
+        except ValueError:
+            # empty arrays cannot be memory-mapped
+            return np.load(path)
+
+    def _open_column(self, name: str, kind: str):
+        if kind == "var":
+            blob_path = os.path.join(self.dir, f"{name}.bin")
+            blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if os.path.getsize(blob_path) else b""
+            return blob, self._load(f"{name}.off.npy"), self._load(f"{name}.null.npy")
+        if kind == "int":
+            return self._load(f"{name}.npy"), self._load(f"{name}.null.npy")
+        return self._load(f"{name}.codes.npy")
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self.get(i)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.get(j) for j in range(*i.indices(self.n))]
+        return self.get(i)
+
+    #-------------------------
+    # Read one field of one row without touching the others (text is decoded only when asked for).
+    #------------------------
+    def field(self, name: str, i: int):
+        if i < 0:
+            i += self.n
+        kind = self.kinds[name]
+        col = self._cols[name]
+        if kind == "var":
+            blob, off, null = col
+            if null[i]:
+                return None
+            return bytes(blob[int(off[i]):int(off[i + 1])]).decode("utf-8")
+        if kind == "int":
+            values, null = col
+            return None if null[i] else int(values[i])
+        code = int(col[i])
+        return None if code < 0 else self.dict_values[name][code]
+
+    def text(self, i: int) -> str:
+        return self.field("text", i)
+
+    #-------------------------
+    # Rebuild the chunk dict for row i with its original key order.
+    # with_text=False skips decoding the chunk text (useful when only metadata is needed).
+    #------------------------
+    def get(self, i: int, with_text: bool = True) -> dict:
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        extra = self.field("extra", i) if "extra" in self.kinds else None
+        extra = json.loads(extra) if extra else {}
+        row = {}
+        for key in self.key_orders[int(self._key_order_codes[i])]:
+            if key == "text" and not with_text:
+                continue
+            # extra holds unknown keys and values whose type did not fit their column
+            if key in extra or key not in self.kinds or key == "extra":
+                row[key] = extra.get(key)
+            else:
+                row[key] = self.field(key, i)
+        return row
+
+    #-------------------------
+    # Export back to JSON Lines (same format as Utils.save_jsonl).
+    #------------------------
+    def export_jsonl(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for row in self:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+    #-------------------------
+    # Write chunks (any iterable of dicts) into store_dir. Written to a temp dir and swapped in.
+    #------------------------
+    @staticmethod
+    def write(store_dir: str, chunks):
+        tmp_dir = store_dir.rstrip("/\\") + ".tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        var_cols = {name: ChunkStore._VarWriter(tmp_dir, name) for name in ChunkStore.VAR_COLUMNS + ("extra",)}
+        dict_maps = {name: {} for name in ChunkStore.DICT_COLUMNS}
+        dict_codes = {name: [] for name in ChunkStore.DICT_COLUMNS}
+        int_values = {name: [] for name in ChunkStore.INT_COLUMNS}
+        key_order_map = {}
+        key_order_codes = []
+        n = 0
+        for chunk in chunks:
+            keys = tuple(chunk.keys())
+            key_order_codes.append(key_order_map.setdefault(keys, len(key_order_map)))
+            extra = {}
+            for name, writer in var_cols.items():
+                if name == "extra":
+                    continue
+                value = chunk.get(name)
+                if value is not None and not isinstance(value, str):
+                    extra[name] = value
+                    value = None
+                writer.add(value)
+            for name in ChunkStore.DICT_COLUMNS:
+                value = chunk.get(name)
+                if value is not None and not isinstance(value, str):
+                    extra[name] = value
+                    value = None
+                dict_codes[name].append(-1 if value is None else dict_maps[name].setdefault(value, len(dict_maps[name])))
+            for name in ChunkStore.INT_COLUMNS:
+                value = chunk.get(name)
+                if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+                    extra[name] = value
+                    value = None
+                int_values[name].append(value)
+            for key, value in chunk.items():
+                if key == "extra" or (key not in var_cols and key not in dict_maps and key not in int_values):
+                    extra[key] = value
+            var_cols["extra"].add(json.dumps(extra, ensure_ascii=False) if extra else None)
+            n += 1
+
+        kinds = {}
+        for name, writer in var_cols.items():
+            writer.close()
+            kinds[name] = "var"
+        for name, codes in dict_codes.items():
+            np.save(os.path.join(tmp_dir, f"{name}.codes.npy"), np.asarray(codes, dtype=np.int32))
+            kinds[name] = "dict"
+        for name, values in int_values.items():
+            null = np.asarray([v is None for v in values], dtype=np.bool_)
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray([v or 0 for v in values], dtype=np.int64))
+            np.save(os.path.join(tmp_dir, f"{name}.null.npy"), null)
+            kinds[name] = "int"
+        np.save(os.path.join(tmp_dir, "key_order.codes.npy"), np.asarray(key_order_codes, dtype=np.int32))
+        meta = {
+            "version": ChunkStore.VERSION,
+            "n": n,
+            "columns": kinds,
+            "dict_values": {name: list(m) for name, m in dict_maps.items()},
+            "key_orders": [list(k) for k in key_order_map],
+        }
+        with open(os.path.join(tmp_dir, ChunkStore.META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        if os.path.isdir(store_dir):
+            old_dir = store_dir.rstrip("/\\") + ".old"
+            os.replace(store_dir, old_dir)
+            os.replace(tmp_dir, store_dir)
+            for fname in os.listdir(old_dir):
+                os.remove(os.path.join(old_dir, fname))
+            os.rmdir(old_dir)
+        else:
+            os.replace(tmp_dir, store_dir)
+
+
+    #-------------------------
+    # Build a store from an existing chunks.jsonl, streaming line by line.
+    #------------------------
+    @staticmethod
+    def from_jsonl(jsonl_path: str, store_dir: str):
+        def rows():
+            with open(jsonl_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+        ChunkStore.write(store_dir, rows())
+        return ChunkStore(store_dir)
+
+
+    class _VarWriter:
+        # Appends UTF-8 values to <name>.bin and tracks offsets / nulls for <name>.off.npy / <name>.null.npy
+        def __init__(self, out_dir: str, name: str):
+            self.out_dir = out_dir
+            self.name = name
+            self.f = open(os.path.join(out_dir, f"{name}.bin"), "wb")
+            self.offsets = [0]
+            self.null = []
+
+        def add(self, value):
+            if value is None:
+                self.null.append(True)
+            else:
+                self.null.append(False)
+                self.f.write(str(value).encode("utf-8"))
+            self.offsets.append(self.f.tell())
+
+        def close(self):
+            self.f.close()
+            np.save(os.path.join(self.out_dir, f"{self.name}.off.npy"), np.asarray(self.offsets, dtype=np.uint64))
+            np.save(os.path.join(self.out_dir, f"{self.name}.null.npy"), np.asarray(self.null, dtype=np.bool_))
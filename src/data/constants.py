@@ -15,12 +15,19 @@ try:
 except ImportError:
     _easyocr_available = False
 
+try:
+    import lxml  # noqa: F401
+    _lxml_available = True
+except ImportError:
+    _lxml_available = False
+
 
 class Constants:
     """Shared configuration constants for the RAG preprocessing pipeline."""
     # Availability flags for OCR libraries
     TESSERACT_PY_AVAILABLE = _tesseract_available
     EASYOCR_AVAILABLE = _easyocr_available
+    LXML_AVAILABLE = _lxml_available
 # -----------------------
 # defaut for cpu run, change if run with gpu
 # -----------------------
@@ -28,7 +35,25 @@ class Constants:
     EMBED_BATCH_SIZE = 64
     CHUNK_MAX_CHARS = 300
     CHUNK_OVERLAP = 30
+    CHUNK_ENGINE = "auto"           # "spans" (offset-based packing) | "strings" (reference, same output) | "auto" (spans except for sentences)
+    CHUNK_WORKERS = 1               # >1 chunks page shards in worker processes (ids stay in page order; capped at the CPU count)
+    CHUNK_PARALLEL_MIN_PAGES = 512  # Below this many pages chunking stays in-process
+    NEAR_DEDUP = False              # Also drop near-duplicate chunks (MinHash/LSH) before embedding
+    NEAR_DEDUP_THRESHOLD = 0.9      # Estimated Jaccard of character shingles at which a chunk counts as a near duplicate
+    MINHASH_PERMS = 128             # Signature length (more = better Jaccard estimate, more memory)
+    MINHASH_SHINGLE = 5             # Characters per shingle
+    MINHASH_SEED = 1                # Fixes the hash permutations, so stored signatures stay comparable
     EMBED_DTYPE = "float32"
+    EMBED_DEVICE = "cpu"            # Models are cached per (name, device) by ModelRegistry
+    EMBED_CACHE_DIR = "embed_cache" # Shared embedding cache, created next to out_dir
+    EMBED_SORT_BY_LENGTH = True     # Bucket texts by token length to cut padding; output order is preserved
+    EMBED_TOKEN_BUDGET = None       # Optional cap on batch_size * longest tokens per batch (e.g. 16384)
+    EMBED_WORKERS = 1               # >1 shards embedding batches across CPU worker processes
+    EMBED_THREADS_PER_WORKER = None # torch threads per worker; None = cpu_count // EMBED_WORKERS
+    EMBED_PIN_CORES = True          # Pin each embedding worker to its own core range (Linux only)
+    NORMALIZE_VERSION = 1           # Bump when normalize_vi_text changes so cached vectors are not reused
+    NORMALIZE_WORKERS = 1           # >1 normalizes large batches in worker processes (TextNormalizer)
+    NORMALIZE_PARALLEL_MIN = 20000  # Batches smaller than this are normalized in-process
 
 # Output file names
     FAISS_INDEX_FILE = "index-paragraph.faiss"
@@ -36,6 +61,44 @@ class Constants:
     EMBEDDINGS_NPY = "embeddings-paragraph.npy"
     PAGES_JSONL = "pages-paragraph.jsonl"
     MANIFEST_JSON = "manifest-paragraph.json"
+    CHUNK_STORE_DIR = "chunkstore-paragraph"   # Columnar copy of chunks.jsonl (see ChunkStore)
+    DOC_HASHES_JSON = "doc_hashes-paragraph.json"  # PDF sha1 -> hashes of all its chunks (incl. deduplicated ones)
+    MINHASH_DIR = "minhash-paragraph"  # MinHash signatures of kept chunks (NEAR_DEDUP), keyed by chunk hash
+    LEXICAL_DIR = "lexical-paragraph"  # BM25 inverted index, row-aligned with the FAISS index (see LexicalIndex)
+    FILTER_DIR = "filters-paragraph"   # Rows per attribute value for filtered search (see FilterIndex)
+
+# FAISS index settings
+    INDEX_TYPE = "auto"             # "flat" | "ivf_flat" | "ivf_pq" | "hnsw" | "auto"
+    INDEX_AUTO_FLAT_MAX = 20000     # auto: exact flat index below this many vectors
+    INDEX_AUTO_IVF_FLAT_MAX = 1000000  # auto: IVF-Flat below this, IVF-PQ above
+    INDEX_TRAIN_POINTS_PER_LIST = 64   # IVF training sample size per list
+    IVF_NPROBE = 32                 # IVF lists visited per query
+    PQ_M = 64                       # PQ sub-quantizers (reduced to a divisor of dim)
+    PQ_NBITS = 8
+    HNSW_M = 32
+    HNSW_EF_CONSTRUCTION = 80
+    HNSW_EF_SEARCH = 64
+    COMPACT_DEAD_RATIO = 0.2        # Compact when this share of rows are tombstones (flat/HNSW compact at once)
+    LOAD_MMAP = False               # load_prepared: memory-map embeddings and index (shared across workers)
+    LOAD_CHUNK_STORE = False        # load_prepared: return a lazy ChunkStore instead of parsing chunks.jsonl
+
+# Lexical (BM25) index and hybrid search
+    LEXICAL_INDEX = True            # Build a BM25 index alongside the FAISS index (hybrid search)
+    LEXICAL_FOLD_DIACRITICS = False # Strip diacritics (and đ -> d) so queries typed without accents match
+    LEXICAL_BIGRAMS = True          # Also index adjacent syllables ("sao_la"); Vietnamese words span syllables
+    LEXICAL_MAX_SEGMENTS = 8        # Appended posting segments before they are merged into one
+    LEXICAL_NAME_MAX_TOKENS = 4     # Queries up to this many syllables that equal a known name skip the encoder
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    SEARCH_MODE = "hybrid"          # "hybrid" (BM25 + vector, RRF) | "vector" | "lexical"
+    HYBRID_CANDIDATES = 50          # Candidates taken from each ranking before fusion
+    RRF_K = 60                      # Reciprocal rank fusion constant: score = sum 1 / (RRF_K + rank)
+
+# Filtered search
+    FILTER_INDEX = True             # Build row lists per attribute value alongside the FAISS index
+    FILTER_FIELDS = ("iucn_code", "source", "doc_id", "section")  # Chunk fields queries can filter on
+    FILTER_MAX_SEGMENTS = 8         # Appended row-list segments before they are merged into one
+    FILTER_EXACT_MAX_ROWS = 10000   # ANN indexes: subsets up to this size are scored exactly from the embeddings
 
 # OCR settings
     USE_TESSERACT_AUTO = True       # Use Tesseract if available, default EasyOCR
@@ -43,7 +106,21 @@ class Constants:
     OCR_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))  # Number of OCR worker processes
     OCR_DPI = 100                   # Higher = higher accuracy, keep low for big pdf
     DOWNSCALE_MAX_WIDTH = 1200      # Max width (px) to downscale images before OCR
-    PAGE_RENDER_BATCH = 32          # Page render batch size for memory control
+    PAGE_RENDER_BATCH = 32          # Max rendered pages queued for OCR at once (memory bound)
+    OCR_RENDER_IN_WORKER = True     # OCR workers render their own grayscale pages (no PNG encode/pickle/decode)
+    OCR_CACHE_DIR = "ocr_cache"     # Per-page OCR text cache, created next to out_dir (keyed by PDF sha1)
+    TEXT_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))  # Processes extracting PDF text layers
+    TEXT_PAGES_PER_TASK = 64        # Large PDFs are split into page ranges of this size across workers
+    TEXT_PARALLEL_MIN_PAGES = 128   # Below this many pages (all PDFs together) text layers are read in-process
+    FILE_DIGEST = "sha1"            # hashlib algorithm for PDF fingerprints (recorded in the manifest; changing it rebuilds)
+    FINGERPRINT_CACHE = "fingerprint_cache.json"  # (path, size, mtime_ns, inode) -> digest, created next to out_dir
+    FINGERPRINT_WORKERS = max(1, min(8, os.cpu_count() or 1))  # Threads hashing new or modified PDFs
+
+# Streaming rebuild (bounded memory)
+    STREAMING = False               # Stream pages through chunk/dedup/embed/index instead of building full lists
+    STREAM_PAGE_BATCH = 16          # Pages chunked together
+    STREAM_EMBED_BATCH = 512        # Pending unique chunks before embedding + index.add
+    STREAM_WIKI_BATCH = 16          # Wiki titles fetched per step
 
     # Regex patterns for text processing
     PARA_SPLIT_RE = re.compile(r"\n{2,}")  # Split on blank lines (paragraph delimiter)
@@ -51,3 +128,32 @@ class Constants:
 
     # Base URL
     WIKI_ORIGIN = "https://vi.wikipedia.org"
+
+# HTTP / wiki fetching
+    WIKI_BACKEND = "library"        # "library" (wikipedia package, per page) | "api" (batched MediaWiki API)
+    WIKI_API_BATCH = 50             # Titles per MediaWiki API query (50 is the anonymous limit)
+    WIKI_API_URL = None             # Override the api.php endpoint (e.g. a local fixture server)
+    HTML_PARSER = "lxml" if _lxml_available else "html.parser"  # Parser for infobox / wikitable extraction
+    WIKI_FETCH_WORKERS = 8          # Concurrent page fetches in fetch_wikipedia_titles
+    HTTP_MAX_PER_HOST = 4           # Concurrent requests per host
+    HTTP_MIN_INTERVAL = 0.0         # Minimum seconds between request starts per host (0 = no spacing)
+    HTTP_POOL_SIZE = 16             # Keep-alive connections kept per host
+    HTTP_RETRIES = 3                # Retries on connection errors, 429 and 5xx
+    HTTP_BACKOFF = 0.5              # First retry delay in seconds, doubled each attempt
+    HTTP_TIMEOUT = 30
+    HTTP_USER_AGENT = "Mozilla/5.0 (RAG-bot/1.0)"
+    HTTP_CACHE_DIR = "http_cache"   # On-disk response cache, created next to out_dir
+    HTTP_CACHE_MODE = "revalidate"  # "revalidate" | "prefer_cache" | "offline" | "off"
+
+# Retrieval service (src/app.py)
+    QUERY_PREFIX = "query: "        # e5 query prefix, prepended before encoding a question
+    SERVE_OUT_DIR = "prepared_data_cpu"  # Artifacts served when RAG_OUT_DIR is not set
+    SERVE_TOP_K = 5                 # Default hits per query
+    SERVE_MAX_K = 50                # Largest k a request may ask for
+    SERVE_MAX_BATCH = 64            # Queries encoded and searched together
+    SERVE_MAX_WAIT_MS = 0           # Extra wait for a batch to fill; 0 = batches only form while the previous one runs
+    QUERY_CACHE = True              # Cache query vectors and ranked results in the service
+    QUERY_CACHE_EMBEDDINGS = 4096   # Query vectors kept (LRU); 4 KB each for a 1024-dim model
+    QUERY_CACHE_RESULTS = 20000     # Ranked result lists kept (LRU)
+    QUERY_CACHE_TTL = 3600          # Seconds before a cached entry expires (None = never)
+    MANIFEST_CHECK_SECONDS = 2.0    # How often the service looks for a newly published manifest
@@ -2,10 +2,18 @@
 class Deduplicator:
     # ---------------------
     #Remove duplicate chunks by comparing their hash values.
+    # With near_index (a MinHashIndex), chunks that survive the exact check are also dropped when an
+    # earlier or indexed chunk is a near duplicate; kept chunks are added to the index.
+    # stats (optional dict) accumulates "chunks", "exact_dropped", "near_dropped" and "near_map"
+    # (dropped hash -> hash of the chunk that was kept instead) across calls.
+    # seen (optional set) is updated in place with the kept hashes, for callers deduplicating a stream
+    # group by group; existing_hashes is copied instead.
     # ---------------------
     @staticmethod
-    def dedupe_chunks(chunks: list, existing_hashes: set = None) -> tuple:
-        seen = set(existing_hashes) if existing_hashes else set()
+    def dedupe_chunks(chunks: list, existing_hashes: set = None, near_index=None, stats: dict = None,
+                      seen: set = None) -> tuple:
+        if seen is None:
+            seen = set(existing_hashes) if existing_hashes else set()
         unique_chunks = []
         added_hashes = set()
         for chunk in chunks:
@@ -14,4 +22,26 @@ class Deduplicator:
                 seen.add(h)
                 unique_chunks.append(chunk)
                 added_hashes.add(h)
+        n_exact = len(unique_chunks)
+
+        near_map = {}
+        if near_index is not None and unique_chunks:
+            sigs = near_index.signatures([chunk["text"] for chunk in unique_chunks])
+            kept = []
+            for chunk, sig in zip(unique_chunks, sigs):
+                match = near_index.query(sig)
+                if match is not None:
+                    near_map[chunk["hash"]] = match
+                    added_hashes.discard(chunk["hash"])
+                    seen.discard(chunk["hash"])
+                    continue
+                near_index.insert(chunk["hash"], sig)
+                kept.append(chunk)
+            unique_chunks = kept
+
+        if stats is not None:
+            stats["chunks"] = stats.get("chunks", 0) + len(chunks)
+            stats["exact_dropped"] = stats.get("exact_dropped", 0) + len(chunks) - n_exact
+            stats["near_dropped"] = stats.get("near_dropped", 0) + len(near_map)
+            stats.setdefault("near_map", {}).update(near_map)
         return unique_chunks, added_hashes
@@ -1,28 +1,271 @@
 #embedding.py
+import os
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
 
 from .constants import Constants
 from .utils import Utils
+from .embedding_cache import EmbeddingCache
+from .normalizer import TextNormalizer
+
+
+class ModelRegistry:
+    # Process-wide cache of loaded SentenceTransformer models, keyed by (model_name, device)
+    _models = {}
+    _lock = threading.Lock()
+
+    #-------------------------
+    # Return a loaded model, loading it once per process on first use.
+    #------------------------
+    @staticmethod
+    def get_model(model_name: str = Constants.EMBED_MODEL_NAME, device: str = Constants.EMBED_DEVICE):
+        key = (model_name, device)
+        model = ModelRegistry._models.get(key)
+        if model is not None:
+            return model
+        with ModelRegistry._lock:
+            model = ModelRegistry._models.get(key)
+            if model is None:
+                print(f"[embed] Loading model {model_name} on {device}")
+                model = SentenceTransformer(model_name, device=device)
+                ModelRegistry._models[key] = model
+        return model
+
+    #-------------------------
+    # Load the model and run one tiny encode so the first real batch does not pay lazy init costs.
+    #------------------------
+    @staticmethod
+    def warm_up(model_name: str = Constants.EMBED_MODEL_NAME, device: str = Constants.EMBED_DEVICE):
+        model = ModelRegistry.get_model(model_name, device)
+        model.encode(["warm up"], convert_to_numpy=True, show_progress_bar=False)
+        return model
+
+    #-------------------------
+    # Drop cached models. Without arguments every model is released.
+    #------------------------
+    @staticmethod
+    def release(model_name: str = None, device: str = None):
+        with ModelRegistry._lock:
+            for key in list(ModelRegistry._models):
+                if model_name is not None and key[0] != model_name:
+                    continue
+                if device is not None and key[1] != device:
+                    continue
+                del ModelRegistry._models[key]
+
+    @staticmethod
+    def loaded() -> list:
+        return list(ModelRegistry._models)
+
 
 class Embedder:
+    #-------------------------
+    # Vector size of a model, e.g. for the empty index of a run without chunks. Taken from the embedding
+    # cache when cache_dir already holds vectors of this model; otherwise the model is loaded.
+    #------------------------
+    @staticmethod
+    def dimension(model_name: str = Constants.EMBED_MODEL_NAME, cache_dir: str = None) -> int:
+        dim = EmbeddingCache.stored_dim(cache_dir, model_name) if cache_dir else None
+        if dim:
+            return int(dim)
+        return int(ModelRegistry.get_model(model_name, Constants.EMBED_DEVICE).get_sentence_embedding_dimension())
+
     #-------------------------
     #Embed text chunks into vectors using a SentenceTransformer model."""
+    # With cache_dir set, vectors are looked up by chunk hash first and only unseen texts hit the model.
+    # No chunks give an empty (0, dim) matrix; pass dim when it is known (e.g. index.d) so the model
+    # is not loaded just for its vector size.
     #------------------------
     @staticmethod
-    def embed_chunks(chunks: list, model_name: str = Constants.EMBED_MODEL_NAME, 
-                      batch_size: int = Constants.EMBED_BATCH_SIZE):
+    def embed_chunks(chunks: list, model_name: str = Constants.EMBED_MODEL_NAME,
+                      batch_size: int = Constants.EMBED_BATCH_SIZE, cache_dir: str = None,
+                      workers: int = Constants.EMBED_WORKERS, dim: int = None):
         if len(chunks) == 0:
-            return np.zeros((0, 384), dtype=Constants.EMBED_DTYPE)
-        device = "cpu"
+            dim = dim or Embedder.dimension(model_name, cache_dir=cache_dir)
+            return np.zeros((0, dim), dtype=Constants.EMBED_DTYPE)
+        if cache_dir:
+            return Embedder._embed_chunks_cached(chunks, model_name, batch_size, cache_dir, workers)
+        texts = TextNormalizer.normalize_vi_batch([chunk["text"] for chunk in chunks])
+        return Embedder._encode_texts(texts, model_name, batch_size, workers=workers)
+
+
+    #-------------------------
+    # Encode already-normalized texts in batches and return a float32 matrix.
+    # With sort_by_length, texts are bucketed by token length so each batch pads to similar lengths;
+    # token_budget additionally caps batch_size * longest_len. Output rows keep the input order.
+    #------------------------
+    @staticmethod
+    def _encode_texts(texts: list, model_name: str, batch_size: int,
+                      sort_by_length: bool = Constants.EMBED_SORT_BY_LENGTH,
+                      token_budget: int = Constants.EMBED_TOKEN_BUDGET,
+                      workers: int = Constants.EMBED_WORKERS):
+        if workers and workers > 1 and len(texts) > batch_size:
+            return Embedder._encode_texts_parallel(texts, model_name, batch_size, workers,
+                                                   sort_by_length, token_budget)
+        device = Constants.EMBED_DEVICE
         print(f"[embed] Using device: {device}")
-        model = SentenceTransformer(model_name, device=device)
-        texts = [Utils.normalize_vi_text(chunk["text"]) for chunk in chunks]
-        embeddings_list = []
-        for i in tqdm(range(0, len(texts), batch_size), desc="Embedding"):
-            batch_texts = texts[i:i + batch_size]
-            emb_batch = model.encode(batch_texts, convert_to_numpy=True, show_progress_bar=False)
-            embeddings_list.append(emb_batch)
-        embeddings = np.vstack(embeddings_list).astype(Constants.EMBED_DTYPE)
+        model = ModelRegistry.get_model(model_name, device)
+        if not sort_by_length:
+            embeddings_list = []
+            for i in tqdm(range(0, len(texts), batch_size), desc="Embedding"):
+                batch_texts = texts[i:i + batch_size]
+                emb_batch = model.encode(batch_texts, convert_to_numpy=True, show_progress_bar=False)
+                embeddings_list.append(emb_batch)
+            embeddings = np.vstack(embeddings_list).astype(Constants.EMBED_DTYPE)
+            return embeddings
+
+        lengths = Embedder._token_lengths(model, texts)
+        batches = Embedder._length_buckets(lengths, batch_size, token_budget)
+        embeddings = None
+        for idx in tqdm(batches, desc="Embedding"):
+            emb_batch = model.encode([texts[i] for i in idx], convert_to_numpy=True, show_progress_bar=False)
+            if embeddings is None:
+                embeddings = np.empty((len(texts), emb_batch.shape[1]), dtype=Constants.EMBED_DTYPE)
+            embeddings[idx] = emb_batch
         return embeddings
+
+
+    #-------------------------
+    # Multi-process encoding: batches are sent to a pool of CPU workers, each holding its own model,
+    # pinned to its own slice of cores with a fixed torch thread count. Results stream back as they finish
+    # and are written into an ordered float32 matrix.
+    #------------------------
+    @staticmethod
+    def _encode_texts_parallel(texts: list, model_name: str, batch_size: int, workers: int,
+                               sort_by_length: bool, token_budget: int):
+        if sort_by_length:
+            # The parent does not load the model, so estimate tokens from characters (~4 chars/token)
+            lengths = [len(t) // 4 + 2 for t in texts]
+            batches = Embedder._length_buckets(lengths, batch_size, token_budget)
+        else:
+            batches = [list(range(i, min(i + batch_size, len(texts)))) for i in range(0, len(texts), batch_size)]
+        threads = Constants.EMBED_THREADS_PER_WORKER or max(1, (os.cpu_count() or 1) // workers)
+        print(f"[embed] {len(batches)} batches on {workers} workers x {threads} threads")
+
+        # spawn avoids forking a parent whose torch thread pools are already running
+        ctx = mp.get_context("spawn")
+        slot_counter = ctx.Value("i", 0)
+        embeddings = None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=Embedder._init_embed_worker,
+                                 initargs=(model_name, threads, slot_counter, Constants.EMBED_PIN_CORES)) as executor:
+            futures = [executor.submit(Embedder._embed_worker_batch, idx, [texts[i] for i in idx], model_name)
+                       for idx in batches]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Embedding", unit="batch"):
+                idx, emb_batch = future.result()
+                if embeddings is None:
+                    embeddings = np.empty((len(texts), emb_batch.shape[1]), dtype=Constants.EMBED_DTYPE)
+                embeddings[idx] = emb_batch
+        return embeddings
+
+
+    #-------------------------
+    # Worker initializer: claim a slot, pin to a core range, set torch threads and load the model once.
+    #------------------------
+    @staticmethod
+    def _init_embed_worker(model_name: str, threads: int, slot_counter, pin_cores: bool):
+        with slot_counter.get_lock():
+            slot = slot_counter.value
+            slot_counter.value += 1
+        if pin_cores and hasattr(os, "sched_setaffinity"):
+            try:
+                cpus = sorted(os.sched_getaffinity(0))
+                start = (slot * threads) % len(cpus)
+                os.sched_setaffinity(0, cpus[start:start + threads] or cpus)
+            except OSError:
+                pass
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except Exception:
+            pass
+        ModelRegistry.get_model(model_name, Constants.EMBED_DEVICE)
+
+
+    @staticmethod
+    def _embed_worker_batch(idx: list, texts: list, model_name: str):
+        model = ModelRegistry.get_model(model_name, Constants.EMBED_DEVICE)
+        emb = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        return idx, np.asarray(emb, dtype=Constants.EMBED_DTYPE)
+
+
+    #-------------------------
+    # Token count per text (capped at the model's max_seq_length); falls back to char length.
+    #------------------------
+    @staticmethod
+    def _token_lengths(model, texts: list) -> list:
+        tokenizer = getattr(model, "tokenizer", None)
+        max_len = getattr(model, "max_seq_length", None) or 512
+        if tokenizer is None:
+            return [len(t) for t in texts]
+        enc = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=max_len)
+        return [len(ids) for ids in enc["input_ids"]]
+
+
+    #-------------------------
+    # Group positions into batches of similar length, longest first.
+    # A batch closes at batch_size items or when (items * longest) would exceed token_budget.
+    #------------------------
+    @staticmethod
+    def _length_buckets(lengths: list, batch_size: int, token_budget: int = None) -> list:
+        order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+        batches = []
+        cur = []
+        cur_max = 0
+        for i in order:
+            if cur:
+                full = len(cur) >= batch_size
+                over = token_budget and (len(cur) + 1) * cur_max > token_budget
+                if full or over:
+                    batches.append(cur)
+                    cur = []
+            if not cur:
+                cur_max = max(1, lengths[i])
+            cur.append(i)
+        if cur:
+            batches.append(cur)
+        return batches
+
+
+    #-------------------------
+    # Cache-aware embedding: reuse vectors for known chunk hashes, encode the rest, store them.
+    #------------------------
+    @staticmethod
+    def _embed_chunks_cached(chunks: list, model_name: str, batch_size: int, cache_dir: str,
+                             workers: int = Constants.EMBED_WORKERS):
+        cache = EmbeddingCache(cache_dir, model_name=model_name)
+        hashes = [chunk.get("hash") or Utils.sha1(chunk["text"]) for chunk in chunks]
+        found_pos, found_vecs, missing = cache.lookup(hashes)
+        print(f"[embed] Cache hits: {len(found_pos)}/{len(chunks)}")
+        new_vecs = None
+        if missing:
+            texts = TextNormalizer.normalize_vi_batch([chunks[i]["text"] for i in missing])
+            new_vecs = Embedder._encode_texts(texts, model_name, batch_size, workers=workers)
+            cache.add([hashes[i] for i in missing], new_vecs)
+        dim = new_vecs.shape[1] if new_vecs is not None else found_vecs.shape[1]
+        embeddings = np.empty((len(chunks), dim), dtype=Constants.EMBED_DTYPE)
+        if found_pos:
+            embeddings[found_pos] = found_vecs
+        if missing:
+            embeddings[missing] = new_vecs
+        return embeddings
+
+
+    #-------------------------
+    # Embed query strings with the same cached model used for ingestion.
+    # normalize=False encodes texts that were already passed through TextNormalizer.normalize_vi.
+    #------------------------
+    @staticmethod
+    def embed_queries(queries: list, model_name: str = Constants.EMBED_MODEL_NAME,
+                      batch_size: int = Constants.EMBED_BATCH_SIZE, normalize: bool = True):
+        model = ModelRegistry.get_model(model_name, Constants.EMBED_DEVICE)
+        texts = TextNormalizer.normalize_vi_batch(queries) if normalize else list(queries)
+        if not texts:
+            dim = model.get_sentence_embedding_dimension()
+            return np.zeros((0, dim), dtype=Constants.EMBED_DTYPE)
+        emb = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        return np.asarray(emb, dtype=Constants.EMBED_DTYPE)
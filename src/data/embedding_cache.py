@@ -0,0 +1,163 @@
+#embedding_cache.py
+import os
+import json
+import numpy as np
+
+from .constants import Constants
+from .utils import Utils
+
+
+class EmbeddingCache:
+    """Content-addressed store of chunk embeddings on disk.
+
+    Vectors live in a raw float32 file that is read through np.memmap; keys.txt holds
+    one chunk hash per line in the same row order, so adding vectors appends to both
+    files instead of rewriting the index. index.json only records the model,
+    normalization version and dim. Each (model, normalization version) pair gets its
+    own namespace directory, so switching models never returns stale vectors.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    KEYS_FILE = "keys.txt"
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: str, model_name: str = Constants.EMBED_MODEL_NAME,
+                 norm_version: int = Constants.NORMALIZE_VERSION):
+        self.model_name = model_name
+        self.norm_version = norm_version
+        self.dir = EmbeddingCache._namespace_dir(cache_dir, model_name, norm_version)
+        self.vectors_path = os.path.join(self.dir, self.VECTORS_FILE)
+        self.keys_path = os.path.join(self.dir, self.KEYS_FILE)
+        self.index_path = os.path.join(self.dir, self.INDEX_FILE)
+        self.dim = None
+        self.keys = []
+        self.rows = {}
+        self._keys_bytes = 0
+        self._mm = None
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim = meta.get("dim")
+            if "keys" in meta:
+                # caches written before keys.txt kept every key in index.json
+                self.keys = meta["keys"]
+                self._write_keys()
+                self._write_index()
+            else:
+                self._read_keys()
+            self.rows = {k: i for i, k in enumerate(self.keys)}
+
+    @staticmethod
+    def _namespace_dir(cache_dir: str, model_name: str, norm_version: int) -> str:
+        return os.path.join(cache_dir, Utils.sha1(f"{model_name}|norm-v{norm_version}"))
+
+    # Vector size stored for model_name (None if nothing was cached yet); reads only index.json.
+    @staticmethod
+    def stored_dim(cache_dir: str, model_name: str = Constants.EMBED_MODEL_NAME,
+                   norm_version: int = Constants.NORMALIZE_VERSION):
+        path = os.path.join(EmbeddingCache._namespace_dir(cache_dir, model_name, norm_version),
+                            EmbeddingCache.INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("dim")
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Keys of the rows written completely. A crash while appending can leave a partial last line
+    # (ignored, and truncated by the next add) or vectors without keys (see _matrix).
+    def _read_keys(self):
+        if not os.path.exists(self.keys_path):
+            return
+        with open(self.keys_path, "rb") as f:
+            data = f.read()
+        self._keys_bytes = data.rfind(b"\n") + 1
+        self.keys = data[:self._keys_bytes].decode("ascii").splitlines()
+        n_vectors = os.path.getsize(self.vectors_path) // (4 * self.dim) if self.dim and \
+            os.path.exists(self.vectors_path) else 0
+        if len(self.keys) > n_vectors:
+            self.keys = self.keys[:n_vectors]
+            self._keys_bytes = sum(len(k) + 1 for k in self.keys)
+
+    def _write_keys(self):
+        os.makedirs(self.dir, exist_ok=True)
+        data = "".join(k + "\n" for k in self.keys).encode("ascii")
+        with open(self.keys_path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(self.keys_path + ".tmp", self.keys_path)
+        self._keys_bytes = len(data)
+
+    def _write_index(self):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "norm_version": self.norm_version, "dim": self.dim}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _matrix(self):
+        # Only the first len(keys) rows are trusted; a crash between writing vectors
+        # and their keys can leave extra rows at the end of the file.
+        if self._mm is None and self.keys:
+            self._mm = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                 shape=(len(self.keys), self.dim))
+        return self._mm
+
+    #-------------------------
+    # Split hashes into cached rows and missing positions.
+    # Returns (positions_found, vectors_found, positions_missing).
+    #------------------------
+    def lookup(self, hashes: list) -> tuple:
+        found_pos, found_rows, missing = [], [], []
+        for pos, h in enumerate(hashes):
+            row = self.rows.get(h)
+            if row is None:
+                missing.append(pos)
+            else:
+                found_pos.append(pos)
+                found_rows.append(row)
+        if found_rows:
+            vectors = np.asarray(self._matrix()[found_rows], dtype=Constants.EMBED_DTYPE)
+        else:
+            vectors = np.zeros((0, self.dim or 0), dtype=Constants.EMBED_DTYPE)
+        return found_pos, vectors, missing
+
+    #-------------------------
+    # Append new vectors. Hashes already present are skipped.
+    #------------------------
+    def add(self, hashes: list, vectors: np.ndarray):
+        if len(hashes) == 0:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {vectors.shape[1]} does not match cache dim {self.dim}")
+        keep, new_keys = [], []
+        for i, h in enumerate(hashes):
+            if h in self.rows:
+                continue
+            self.rows[h] = len(self.keys) + len(new_keys)
+            new_keys.append(h)
+            keep.append(i)
+        if not new_keys:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        if not os.path.exists(self.index_path):
+            self._write_index()
+        self._mm = None
+        # vectors first, then their keys: a key is only listed once its row is on disk
+        valid_bytes = len(self.keys) * self.dim * 4
+        with open(self.vectors_path, "ab") as f:
+            if f.tell() != valid_bytes:
+                f.truncate(valid_bytes)
+                f.seek(valid_bytes)
+            f.write(vectors[keep].tobytes())
+        data = "".join(k + "\n" for k in new_keys).encode("ascii")
+        with open(self.keys_path, "ab") as f:
+            if f.tell() != self._keys_bytes:
+                f.truncate(self._keys_bytes)
+                f.seek(self._keys_bytes)
+            f.write(data)
+        self._keys_bytes += len(data)
+        self.keys.extend(new_keys)
@@ -0,0 +1,247 @@
+#filter_index.py
+import os
+import json
+import shutil
+import numpy as np
+
+from .constants import Constants
+from .chunk_store import ChunkStore
+
+
+class FilterIndex:
+    """Per-attribute row lists for pre-filtered search, row-aligned with the FAISS index.
+
+    For every FILTER_FIELDS column (iucn_code, source, doc_id, section) the rows are grouped by value
+    (CSR: one argsort per field and segment), so storage follows the number of rows, not rows x values.
+    select() turns the rows of the requested values into a packed bitmap in FAISS IDSelectorBitmap
+    order (bit i & 7 of byte i >> 3), ANDed with the bitmap of live (not tombstoned) rows.
+
+    Layout of an index directory (segments are immutable, appends add a segment):
+      meta.json                  version, fields, row count, values per field (value id = position), segments
+      live.npy                   uint8 packed bitmap of live rows
+      seg_<n>/<field>.offsets    int64 row offsets per value id (CSR), as .npy
+      seg_<n>/<field>.rows       uint32 rows ascending within each value, as .npy
+    Segments are merged once there are more than FILTER_MAX_SEGMENTS.
+    """
+
+    VERSION = 2
+    META_FILE = "meta.json"
+    LIVE_FILE = "live.npy"
+
+    def __init__(self, fields: tuple = Constants.FILTER_FIELDS):
+        self.fields = tuple(fields)
+        self.n = 0
+        self.values = {field: [] for field in self.fields}
+        self._value_ids = {field: {} for field in self.fields}
+        self.live = np.zeros(0, dtype=np.uint8)
+        self.segments = []      # [name, {field: (offsets, rows)}]
+        self._next_segment = 0
+        self._written = set()
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def n_values(self) -> int:
+        return sum(len(values) for values in self.values.values())
+
+    @property
+    def nbytes(self) -> int:
+        return self.live.nbytes + sum(offsets.nbytes + rows.nbytes for _, seg in self.segments
+                                      for offsets, rows in seg.values())
+
+
+    #-------------------------
+    # Index chunks (a list or a ChunkStore) as rows start_row.. (one new segment). Tombstoned chunks are
+    # not live. merge=False leaves segments for a later merge() (streaming appends many small batches).
+    #------------------------
+    def append(self, chunks, start_row: int = None, merge: bool = True):
+        start_row = len(self) if start_row is None else start_row
+        n_new = len(chunks)
+        if n_new == 0:
+            return self
+        self._grow(start_row + n_new)
+        segment = {}
+        for field in self.fields:
+            codes = self._codes(chunks, field)
+            order = np.argsort(codes, kind="stable")
+            sorted_codes = codes[order]
+            first = int(np.searchsorted(sorted_codes, 0))
+            offsets = np.searchsorted(sorted_codes[first:], np.arange(len(self.values[field]) + 1)).astype(np.int64)
+            segment[field] = (offsets, (order[first:] + start_row).astype(np.uint32))
+        self.segments.append([f"seg_{self._next_segment:04d}", segment])
+        self._next_segment += 1
+        deleted = np.fromiter((bool(c.get("deleted")) for c in FilterIndex._metadata(chunks)), dtype=bool,
+                              count=n_new)
+        rows = np.arange(start_row, start_row + n_new, dtype=np.int64)[~deleted]
+        np.bitwise_or.at(self.live, rows >> 3, (1 << (rows & 7)).astype(np.uint8))
+        if merge and len(self.segments) > Constants.FILTER_MAX_SEGMENTS:
+            self.merge()
+        return self
+
+    def _grow(self, n: int):
+        if n > self.n:
+            n_bytes = (n + 7) // 8
+            if n_bytes > self.live.shape[0]:
+                self.live = np.pad(self.live, (0, n_bytes - self.live.shape[0]))
+            self.n = n
+
+    # value id per chunk for a field (-1 = None); new values get the next ids. A ChunkStore answers from
+    # its dictionary codes without reading the rows.
+    def _codes(self, chunks, field: str) -> np.ndarray:
+        ids = self._value_ids[field]
+        if isinstance(chunks, ChunkStore) and chunks.kinds.get(field) == "dict":
+            remap = np.asarray([ids.setdefault(v, len(ids)) for v in chunks.dict_values[field]] + [-1],
+                               dtype=np.int64)
+            codes = remap[np.asarray(chunks._cols[field], dtype=np.int64)]
+        else:
+            codes = np.fromiter((-1 if c.get(field) is None else ids.setdefault(str(c.get(field)), len(ids))
+                                 for c in chunks), dtype=np.int64, count=len(chunks))
+        self.values[field].extend(list(ids)[len(self.values[field]):])
+        return codes
+
+    @staticmethod
+    def _metadata(chunks):
+        if isinstance(chunks, ChunkStore):
+            return (chunks.get(i, with_text=False) for i in range(len(chunks)))
+        return chunks
+
+    #-------------------------
+    # Tombstone rows (removed documents): they are dropped from every selection.
+    #------------------------
+    def mark_deleted(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[rows < len(self)]
+        np.bitwise_and.at(self.live, rows >> 3, ~(1 << (rows & 7)).astype(np.uint8))
+
+    #-------------------------
+    # Merge all segments into one, dropping rows that are no longer live.
+    #------------------------
+    def merge(self):
+        live = self.mask(self.live)
+        segment = {}
+        for field in self.fields:
+            parts = [seg[field] for _, seg in self.segments]
+            codes = np.concatenate([np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+                                    for offsets, _ in parts] or [np.zeros(0, dtype=np.int64)])
+            rows = np.concatenate([np.asarray(rows) for _, rows in parts] or [np.zeros(0, dtype=np.uint32)])
+            keep = live[rows.astype(np.int64)]
+            codes, rows = codes[keep], rows[keep]
+            order = np.lexsort((rows, codes))
+            offsets = np.searchsorted(codes[order], np.arange(len(self.values[field]) + 1)).astype(np.int64)
+            segment[field] = (offsets, rows[order].astype(np.uint32))
+        self.segments = [[f"seg_{self._next_segment:04d}", segment]]
+        self._next_segment += 1
+
+
+    #-------------------------
+    # Packed bitmap of the live rows matching filters ({field: value or list of values}): values of one
+    # field are OR-ed, fields are AND-ed. Unknown values match nothing; unknown fields raise ValueError.
+    #------------------------
+    def select(self, filters: dict) -> np.ndarray:
+        selected = self.live.copy()
+        for field, values in filters.items():
+            if field not in self.fields:
+                raise ValueError(f"Unknown filter field: {field} (expected one of {', '.join(self.fields)})")
+            if isinstance(values, str) or not isinstance(values, (list, tuple, set, frozenset)):
+                values = [values]
+            matched = np.zeros(len(self), dtype=bool)
+            for value in values:
+                vid = self._value_ids[field].get(str(value))
+                if vid is None:
+                    continue
+                for _, seg in self.segments:
+                    offsets, rows = seg[field]
+                    if vid + 1 < len(offsets):
+                        matched[rows[offsets[vid]:offsets[vid + 1]]] = True
+            selected &= np.packbits(matched, bitorder="little")
+        return selected
+
+    #-------------------------
+    # Row ids set in a packed bitmap, ascending.
+    #------------------------
+    def rows(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bitmap, count=len(self), bitorder="little")).astype(np.int64)
+
+    def mask(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.unpackbits(bitmap, count=len(self), bitorder="little").astype(bool)
+
+
+    #-------------------------
+    # Build from all chunks (row i = chunks[i]).
+    #------------------------
+    @staticmethod
+    def build(chunks, fields: tuple = Constants.FILTER_FIELDS):
+        return FilterIndex(fields).append(chunks, 0)
+
+    #-------------------------
+    # Write new segments, then live.npy and meta.json (the commit point); segments no longer listed
+    # (merged away) are deleted afterwards.
+    #------------------------
+    def save(self, index_dir: str):
+        os.makedirs(index_dir, exist_ok=True)
+        for name, seg in self.segments:
+            seg_dir = os.path.join(index_dir, name)
+            if name in self._written and os.path.isdir(seg_dir):
+                continue
+            os.makedirs(seg_dir, exist_ok=True)
+            for field, (offsets, rows) in seg.items():
+                np.save(os.path.join(seg_dir, f"{field}.offsets.npy"), offsets)
+                np.save(os.path.join(seg_dir, f"{field}.rows.npy"), rows)
+            self._written.add(name)
+        live_path = os.path.join(index_dir, self.LIVE_FILE)
+        with open(live_path + ".tmp", "wb") as f:
+            np.save(f, self.live)
+        os.replace(live_path + ".tmp", live_path)
+        meta_path = os.path.join(index_dir, self.META_FILE)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "fields": list(self.fields), "n": self.n, "values": self.values,
+                       "segments": [seg[0] for seg in self.segments], "next_segment": self._next_segment},
+                      f, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+        listed = {seg[0] for seg in self.segments}
+        for entry in os.listdir(index_dir):
+            if entry.startswith("seg_") and entry not in listed:
+                shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+        return self
+
+    #-------------------------
+    # Index from index_dir, or None when it is missing, incomplete or built for other fields/version.
+    # Row lists are memory-mapped; the live bitmap is read into memory since tombstones update it.
+    #------------------------
+    @staticmethod
+    def load(index_dir: str, fields: tuple = Constants.FILTER_FIELDS):
+        meta_path = os.path.join(index_dir, FilterIndex.META_FILE)
+        live_path = os.path.join(index_dir, FilterIndex.LIVE_FILE)
+        if not (os.path.exists(meta_path) and os.path.exists(live_path)):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FilterIndex.VERSION or tuple(meta.get("fields", ())) != tuple(fields):
+            return None
+        live = np.array(np.load(live_path), dtype=np.uint8)
+        if live.shape != ((meta["n"] + 7) // 8,):
+            return None
+        index = FilterIndex(fields)
+        index.n = meta["n"]
+        index.live = live
+        for field in index.fields:
+            index.values[field] = list(meta["values"][field])
+            index._value_ids[field] = {value: i for i, value in enumerate(index.values[field])}
+        index._next_segment = meta["next_segment"]
+        for name in meta["segments"]:
+            seg_dir = os.path.join(index_dir, name)
+            index.segments.append([name, {
+                field: (FilterIndex._load_array(os.path.join(seg_dir, f"{field}.offsets.npy")),
+                        FilterIndex._load_array(os.path.join(seg_dir, f"{field}.rows.npy")))
+                for field in index.fields}])
+            index._written.add(name)
+        return index
+
+    @staticmethod
+    def _load_array(path: str):
+        try:
+            return np.load(path, mmap_mode="r")
+        except ValueError:
+            # empty arrays cannot be memory-mapped
+            return np.load(path)
@@ -0,0 +1,79 @@
+#fingerprint_cache.py
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import Constants
+from .utils import Utils
+
+
+class FingerprintCache:
+    """Content digests of PDFs, reused while a file's stat signature is unchanged.
+
+    One JSON file maps absolute path -> {size, mtime_ns, inode, algo, digest}. A file whose
+    (size, mtime_ns, inode) still match its entry is not read at all, so checking an unchanged
+    collection costs one stat per PDF. Files that did change are hashed by a thread pool
+    (hashlib releases the GIL while digesting large buffers). The cache is shared by sibling
+    out_dirs; entries of files that no longer exist are dropped on save.
+    """
+
+    def __init__(self, path: str, algo: str = Constants.FILE_DIGEST):
+        self.path = path
+        self.algo = algo
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                # a corrupt cache only costs a rehash
+                self.entries = {}
+
+    @staticmethod
+    def _signature(st: os.stat_result) -> dict:
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "inode": st.st_ino}
+
+
+    #-------------------------
+    # {abspath: digest} for the given files (missing files are skipped). Only files whose stat
+    # signature changed, or that were hashed with another algorithm, are read.
+    #------------------------
+    def digests(self, paths: list, workers: int = Constants.FINGERPRINT_WORKERS) -> dict:
+        out = {}
+        todo = []
+        for p in paths:
+            path = os.path.abspath(p)
+            try:
+                sig = FingerprintCache._signature(os.stat(path))
+            except FileNotFoundError:
+                continue
+            entry = self.entries.get(path)
+            if entry and entry.get("algo") == self.algo and all(entry.get(k) == v for k, v in sig.items()):
+                out[path] = entry["digest"]
+            else:
+                todo.append((path, sig))
+
+        if todo:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as ex:
+                hashed = list(ex.map(lambda item: Utils.file_digest(item[0], self.algo), todo))
+            for (path, sig), digest in zip(todo, hashed):
+                # the signature is taken before reading, so a file modified mid-hash is rehashed next run
+                self.entries[path] = {**sig, "algo": self.algo, "digest": digest}
+                out[path] = digest
+            print(f"[fingerprint] {len(out) - len(todo)} cached, {len(todo)} hashed ({self.algo})")
+            self.save()
+        return out
+
+
+    #-------------------------
+    # Atomically rewrite the cache, dropping entries of deleted files.
+    #------------------------
+    def save(self):
+        if not self.path:
+            return
+        self.entries = {p: e for p, e in self.entries.items() if os.path.exists(p)}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
@@ -0,0 +1,236 @@
+#http_client.py
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .constants import Constants
+
+
+class HttpClient:
+    """Shared keep-alive HTTP session for ingestion.
+
+    All wiki requests go through one requests.Session with a pooled adapter, a per-host concurrency
+    limit, an optional per-host minimum interval, and retry with exponential backoff on connection
+    errors, 429 and 5xx responses.
+
+    With a cache directory configured, GET responses are stored on disk (body + ETag/Last-Modified):
+      "revalidate"    conditional request; a 304 is served from the cache
+      "prefer_cache"  cached responses are used without touching the network; misses are fetched
+      "offline"       cache only; a miss raises requests.ConnectionError
+      "off"           no cache
+    """
+
+    _session = None
+    _session_lock = threading.Lock()
+    _host_slots = {}
+    _host_last = {}
+    _host_lock = threading.Lock()
+    _cache_dir = None
+    _cache_mode = Constants.HTTP_CACHE_MODE
+
+    #-------------------------
+    # Lazily create the process-wide session (one connection pool per host).
+    #------------------------
+    @staticmethod
+    def session() -> requests.Session:
+        if HttpClient._session is None:
+            with HttpClient._session_lock:
+                if HttpClient._session is None:
+                    s = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=Constants.HTTP_POOL_SIZE,
+                                          pool_maxsize=Constants.HTTP_POOL_SIZE)
+                    s.mount("http://", adapter)
+                    s.mount("https://", adapter)
+                    s.headers.update({"User-Agent": Constants.HTTP_USER_AGENT})
+                    HttpClient._session = s
+        return HttpClient._session
+
+    @staticmethod
+    def reset():
+        with HttpClient._session_lock:
+            if HttpClient._session is not None:
+                HttpClient._session.close()
+            HttpClient._session = None
+        with HttpClient._host_lock:
+            HttpClient._host_slots.clear()
+            HttpClient._host_last.clear()
+
+    #-------------------------
+    # Hold one of the per-host concurrency slots; also spaces requests by HTTP_MIN_INTERVAL.
+    # Usable around calls that do not go through HttpClient.get; must not be nested around calls that do.
+    #------------------------
+    @staticmethod
+    @contextmanager
+    def host_slot(url: str):
+        host = urlparse(url).netloc
+        with HttpClient._host_lock:
+            slot = HttpClient._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(Constants.HTTP_MAX_PER_HOST)
+                HttpClient._host_slots[host] = slot
+        with slot:
+            if Constants.HTTP_MIN_INTERVAL > 0:
+                with HttpClient._host_lock:
+                    now = time.monotonic()
+                    start = max(now, HttpClient._host_last.get(host, 0.0) + Constants.HTTP_MIN_INTERVAL)
+                    HttpClient._host_last[host] = start
+                if start > now:
+                    time.sleep(start - now)
+            yield
+
+    #-------------------------
+    # Point the response cache at cache_dir (None disables it) and set the mode.
+    #------------------------
+    @staticmethod
+    def configure_cache(cache_dir: str = None, mode: str = Constants.HTTP_CACHE_MODE):
+        if mode not in ("off", "revalidate", "prefer_cache", "offline"):
+            raise ValueError(f"Unknown HTTP cache mode: {mode}")
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        HttpClient._cache_dir = cache_dir
+        HttpClient._cache_mode = mode
+
+    @staticmethod
+    def cache_active() -> bool:
+        return HttpClient._cache_dir is not None and HttpClient._cache_mode != "off"
+
+    @staticmethod
+    def _cache_paths(key: str) -> tuple:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        sub = os.path.join(HttpClient._cache_dir, digest[:2])
+        return os.path.join(sub, digest + ".body"), os.path.join(sub, digest + ".json")
+
+    @staticmethod
+    def _cache_read(key: str):
+        body_path, meta_path = HttpClient._cache_paths(key)
+        if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+            return None, None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            return f.read(), meta
+
+    @staticmethod
+    def _cache_write(key: str, body: bytes, meta: dict):
+        body_path, meta_path = HttpClient._cache_paths(key)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        # unique temp names: several threads may store the same URL at once
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(body_path + suffix, "wb") as f:
+            f.write(body)
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(body_path + suffix, body_path)
+        os.replace(meta_path + suffix, meta_path)
+
+    @staticmethod
+    def _cached_response(url: str, body: bytes, meta: dict) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = body
+        resp.url = meta.get("url", url)
+        resp.headers = CaseInsensitiveDict(meta.get("headers", {}))
+        resp.encoding = meta.get("encoding")
+        return resp
+
+
+    #-------------------------
+    # GET through the response cache (see class docstring for modes). use_cache=False skips it for callers
+    # that cache whole results themselves (cached_json), keeping session, host limits and retries.
+    #------------------------
+    @staticmethod
+    def get(url: str, params: dict = None, headers: dict = None, timeout: float = Constants.HTTP_TIMEOUT,
+            retries: int = Constants.HTTP_RETRIES, use_cache: bool = True) -> requests.Response:
+        if not use_cache or not HttpClient.cache_active():
+            return HttpClient._get_network(url, params, headers, timeout, retries)
+        key = requests.Request("GET", url, params=params).prepare().url
+        body, meta = HttpClient._cache_read(key)
+        mode = HttpClient._cache_mode
+        if body is not None and mode in ("prefer_cache", "offline"):
+            return HttpClient._cached_response(url, body, meta)
+        if mode == "offline":
+            raise requests.ConnectionError(f"offline mode: {key} is not cached")
+
+        headers = dict(headers or {})
+        if body is not None:
+            if meta["headers"].get("ETag"):
+                headers["If-None-Match"] = meta["headers"]["ETag"]
+            if meta["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+        try:
+            resp = HttpClient._get_network(url, params, headers, timeout, retries)
+        except (requests.ConnectionError, requests.Timeout):
+            if body is None:
+                raise
+            # network down: a stale copy beats no copy
+            return HttpClient._cached_response(url, body, meta)
+        if resp.status_code == 304 and body is not None:
+            return HttpClient._cached_response(url, body, meta)
+        kept = {h: resp.headers[h] for h in ("ETag", "Last-Modified", "Content-Type") if h in resp.headers}
+        HttpClient._cache_write(key, resp.content, {"url": resp.url, "headers": kept,
+                                                    "encoding": resp.encoding, "fetched_at": time.time()})
+        return resp
+
+
+    #-------------------------
+    # Cache an arbitrary JSON-serializable result (e.g. whole wikipedia library lookups, several requests each).
+    # "revalidate" always calls producer and refreshes the entry, falling back to the cached value on errors.
+    #------------------------
+    @staticmethod
+    def cached_json(key: str, producer):
+        if not HttpClient.cache_active():
+            return producer()
+        key = "json:" + key
+        body, _ = HttpClient._cache_read(key)
+        cached = json.loads(body.decode("utf-8")) if body is not None else None
+        mode = HttpClient._cache_mode
+        if cached is not None and mode in ("prefer_cache", "offline"):
+            return cached
+        if mode == "offline":
+            raise requests.ConnectionError(f"offline mode: {key} is not cached")
+        try:
+            value = producer()
+        except Exception:
+            if cached is not None:
+                return cached
+            raise
+        HttpClient._cache_write(key, json.dumps(value, ensure_ascii=False).encode("utf-8"),
+                                {"url": key, "headers": {}, "fetched_at": time.time()})
+        return value
+
+
+    #-------------------------
+    # GET with retries. Raises requests.HTTPError for non-retryable or exhausted failures (304 is returned).
+    #------------------------
+    @staticmethod
+    def _get_network(url: str, params: dict = None, headers: dict = None,
+                     timeout: float = Constants.HTTP_TIMEOUT,
+                     retries: int = Constants.HTTP_RETRIES) -> requests.Response:
+        delay = Constants.HTTP_BACKOFF
+        for attempt in range(retries + 1):
+            try:
+                with HttpClient.host_slot(url):
+                    resp = HttpClient.session().get(url, params=params, headers=headers, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == retries:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+                continue
+            if resp.status_code == 429 or resp.status_code >= 500:
+                if attempt < retries:
+                    retry_after = resp.headers.get("Retry-After")
+                    wait = float(retry_after) if retry_after and retry_after.isdigit() else delay
+                    time.sleep(wait)
+                    delay *= 2
+                    continue
+            resp.raise_for_status()
+            return resp
@@ -2,23 +2,211 @@
 import faiss
 import numpy as np
 
+from .constants import Constants
+
 class Indexer:
     #-------------------------
     # FAISS indexing construction
+    # index_type: "flat" | "ivf_flat" | "ivf_pq" | "hnsw" | "auto" (picked from the number of vectors).
+    # Set normalize=False when the embeddings are already L2-normalized (e.g. read-only memmaps).
+    # embeddings must be 2-D even when empty: its width is the index dimension.
     #------------------------
     @staticmethod
-    def build_faiss(embeddings: np.ndarray):
+    def build_faiss(embeddings: np.ndarray, index_type: str = Constants.INDEX_TYPE, normalize: bool = True):
+        if embeddings.ndim != 2:
+            raise ValueError(f"Expected a 2-D embedding matrix, got shape {embeddings.shape}")
         if embeddings.shape[0] == 0:
-            dim = embeddings.shape[1] if embeddings.size else 384
-            return faiss.IndexFlatIP(dim)
+            return faiss.IndexFlatIP(embeddings.shape[1])
         # Normalize embeddings for cosine similarity (L2 norm = 1)
-        faiss.normalize_L2(embeddings)
-        dim = embeddings.shape[1]
-        index = faiss.IndexFlatIP(dim)
-        index.add(embeddings)
+        if normalize:
+            faiss.normalize_L2(embeddings)
+        n, dim = embeddings.shape
+        index_type = Indexer.resolve_index_type(index_type, n)
+        if index_type == "flat":
+            index = faiss.IndexFlatIP(dim)
+        elif index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, Constants.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = Constants.HNSW_EF_CONSTRUCTION
+        elif index_type in ("ivf_flat", "ivf_pq"):
+            nlist = Indexer._nlist_for(n)
+            quantizer = faiss.IndexFlatIP(dim)
+            if index_type == "ivf_flat":
+                index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexIVFPQ(quantizer, dim, nlist, Indexer._pq_m_for(dim),
+                                         Constants.PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+            index.train(Indexer._training_sample(embeddings, nlist))
+        else:
+            raise ValueError(f"Unknown index type: {index_type}")
+        Indexer.set_search_params(index)
+        for i in range(0, n, 65536):
+            index.add(np.ascontiguousarray(embeddings[i:i + 65536], dtype=np.float32))
         return index
 
 
+    #-------------------------
+    # Pick an index type for a corpus size when index_type is "auto".
+    #------------------------
+    @staticmethod
+    def resolve_index_type(index_type: str, n_vectors: int) -> str:
+        if index_type != "auto":
+            return index_type
+        if n_vectors < Constants.INDEX_AUTO_FLAT_MAX:
+            return "flat"
+        if n_vectors < Constants.INDEX_AUTO_IVF_FLAT_MAX:
+            return "ivf_flat"
+        return "ivf_pq"
+
+
+    @staticmethod
+    def _nlist_for(n_vectors: int) -> int:
+        # ~4*sqrt(n) lists, keeping at least 39 training points per list as FAISS recommends
+        nlist = int(4 * np.sqrt(n_vectors))
+        return max(1, min(nlist, n_vectors // 39))
+
+
+    @staticmethod
+    def _pq_m_for(dim: int) -> int:
+        m = Constants.PQ_M
+        while m > 1 and dim % m:
+            m -= 1
+        return m
+
+
+    @staticmethod
+    def _training_sample(embeddings: np.ndarray, nlist: int) -> np.ndarray:
+        n = embeddings.shape[0]
+        # PQ codebooks (256 centroids per sub-quantizer) also want ~39 points per centroid
+        size = min(n, max(nlist * Constants.INDEX_TRAIN_POINTS_PER_LIST, 256 * 39))
+        if size >= n:
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
+        rows = np.sort(np.random.default_rng(0).choice(n, size=size, replace=False))
+        return np.ascontiguousarray(embeddings[rows], dtype=np.float32)
+
+
+    #-------------------------
+    # Apply nprobe / efSearch. Missing values fall back to Constants.
+    #------------------------
+    @staticmethod
+    def set_search_params(index: 'faiss.Index', nprobe: int = None, ef_search: int = None):
+        ivf = Indexer._ivf(index)
+        if ivf is not None:
+            ivf.nprobe = min(nprobe or Constants.IVF_NPROBE, ivf.nlist)
+        hnsw = getattr(index, "hnsw", None)
+        if hnsw is not None:
+            hnsw.efSearch = ef_search or Constants.HNSW_EF_SEARCH
+
+
+    #-------------------------
+    # SearchParameters restricting a search to the ids of an IDSelector. FAISS search parameters replace
+    # the index's own nprobe / efSearch instead of inheriting them, so they are copied over.
+    #------------------------
+    @staticmethod
+    def search_params(index: 'faiss.Index', selector: 'faiss.IDSelector'):
+        ivf = Indexer._ivf(index)
+        if ivf is not None:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+        hnsw = getattr(index, "hnsw", None)
+        if hnsw is not None:
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=hnsw.efSearch)
+        return faiss.SearchParameters(sel=selector)
+
+
+    @staticmethod
+    def _ivf(index: 'faiss.Index'):
+        try:
+            return faiss.downcast_index(faiss.extract_index_ivf(index))
+        except Exception:
+            return None
+
+
+    #-------------------------
+    # Describe an index for the manifest so load_prepared can restore its search parameters.
+    #------------------------
+    @staticmethod
+    def describe(index: 'faiss.Index') -> dict:
+        info = {"ntotal": int(index.ntotal), "dim": int(index.d)}
+        ivf = Indexer._ivf(index)
+        if ivf is not None:
+            info["type"] = "ivf_pq" if isinstance(ivf, faiss.IndexIVFPQ) else "ivf_flat"
+            info["nlist"] = int(ivf.nlist)
+            info["nprobe"] = int(ivf.nprobe)
+        elif getattr(index, "hnsw", None) is not None:
+            info["type"] = "hnsw"
+            info["efSearch"] = int(index.hnsw.efSearch)
+        else:
+            info["type"] = "flat"
+        return info
+
+
+    #-------------------------
+    # Row removal. IVF indexes store explicit ids, so rows can be removed in place and later rows keep
+    # their ids; flat and HNSW indexes renumber (or cannot remove) and are rebuilt by compaction instead.
+    #------------------------
+    @staticmethod
+    def supports_remove(index: 'faiss.Index') -> bool:
+        return Indexer._ivf(index) is not None
+
+    @staticmethod
+    def remove_ids(index: 'faiss.Index', ids) -> int:
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.size == 0:
+            return 0
+        if not Indexer.supports_remove(index):
+            raise ValueError(f"{Indexer.describe(index)['type']} index does not support removal; compact instead")
+        return int(index.remove_ids(ids))
+
+
+    #-------------------------
+    # Append rows whose ids are their positions start_id.. in the chunk list.
+    #------------------------
+    @staticmethod
+    def add_rows(index: 'faiss.Index', embeddings: np.ndarray, start_id: int):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if Indexer.supports_remove(index):
+            # after removals ntotal no longer equals the next position, so ids are explicit
+            index.add_with_ids(embeddings, np.arange(start_id, start_id + embeddings.shape[0], dtype=np.int64))
+        else:
+            index.add(embeddings)
+
+
+    #-------------------------
+    # Recall@k of an approximate index against exact search on a sample of the indexed vectors.
+    # Index ids are row positions of embeddings; live_ids lists the rows still in the index when some were
+    # removed (tombstones). Exact top-k is computed block by block straight from embeddings (which may be
+    # memory-mapped), so neither a copy of the vectors nor a second (flat) index is built.
+    #------------------------
+    @staticmethod
+    def measure_recall(index: 'faiss.Index', embeddings: np.ndarray, k: int = 10, n_queries: int = 200,
+                       live_ids: np.ndarray = None, block: int = 16384) -> float:
+        n = embeddings.shape[0]
+        pool = np.arange(n) if live_ids is None else np.asarray(live_ids, dtype=np.int64)
+        if pool.size == 0 or Indexer.describe(index)["type"] == "flat":
+            return 1.0
+        k = min(k, pool.size)
+        rows = np.sort(np.random.default_rng(1).choice(pool, size=min(n_queries, pool.size), replace=False))
+        queries = np.ascontiguousarray(embeddings[rows], dtype=np.float32)
+        dead = None
+        if live_ids is not None:
+            dead = np.ones(n, dtype=bool)
+            dead[pool] = False
+        top_scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+        top_ids = np.full((len(rows), k), -1, dtype=np.int64)
+        for start in range(0, n, block):
+            scores = queries @ np.asarray(embeddings[start:start + block], dtype=np.float32).T
+            if dead is not None:
+                scores[:, dead[start:start + block]] = -np.inf
+            scores = np.concatenate([top_scores, scores], axis=1)
+            ids = np.concatenate([top_ids, np.broadcast_to(np.arange(start, start + scores.shape[1] - k),
+                                                           (len(rows), scores.shape[1] - k))], axis=1)
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, best, axis=1)
+            top_ids = np.take_along_axis(ids, best, axis=1)
+        _, approx = index.search(queries, k)
+        hits = sum(len(set(t) & set(a)) for t, a in zip(top_ids, approx))
+        return hits / float(top_ids.size)
+
+
     #-------------------------
     # Save a FAISS index to the specified file path.
     #------------------------
@@ -27,7 +215,32 @@ class Indexer:
         faiss.write_index(index, path)
     #-------------------------
     # Load a FAISS index from the specified file path.
+    # index_info is the manifest "index" entry; its nprobe / efSearch are re-applied after loading.
+    # With mmap=True the index data is memory-mapped read-only so worker processes share pages via the
+    # OS cache; falls back to a normal read if this FAISS build or index type does not support it.
     #------------------------
     @staticmethod
-    def load_index(path: str):
-        return faiss.read_index(path)
+    def load_index(path: str, index_info: dict = None, mmap: bool = False):
+        index = None
+        if mmap:
+            for flags in Indexer._mmap_flags((index_info or {}).get("type")):
+                try:
+                    index = faiss.read_index(path, flags | faiss.IO_FLAG_READ_ONLY)
+                    break
+                except RuntimeError:
+                    continue
+        if index is None:
+            index = faiss.read_index(path)
+        if index_info:
+            Indexer.set_search_params(index, nprobe=index_info.get("nprobe"),
+                                      ef_search=index_info.get("efSearch"))
+        return index
+
+
+    @staticmethod
+    def _mmap_flags(index_type: str = None) -> list:
+        # IVF inverted lists map with IO_FLAG_MMAP; flat/HNSW storage needs IO_FLAG_MMAP_IFC (newer FAISS)
+        ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+        if index_type in ("ivf_flat", "ivf_pq"):
+            return [faiss.IO_FLAG_MMAP]
+        return [ifc, faiss.IO_FLAG_MMAP] if ifc is not None else [faiss.IO_FLAG_MMAP]
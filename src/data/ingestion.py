@@ -2,24 +2,31 @@
 import os
 import io
 import shutil
-import requests
 import numpy as np
 import pymupdf  
 from PIL import Image
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import re 
+import time
 
+from types import SimpleNamespace
 from urllib.parse import urlparse, unquote, quote
 from functools import partial
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from tqdm import tqdm
+import requests
 
 from .constants import Constants
 from .utils import Utils
+from .http_client import HttpClient
+from .ocr_cache import OcrCache
+from .normalizer import TextNormalizer
 
 class Ingestion:
     # Static variable for EasyOCR reader (one per worker process)
     _worker_easy_reader = None
+    # Last PDF opened by an OCR worker that renders its own pages: (pdf_path, document)
+    _worker_doc = None
 
     @staticmethod
     def _select_wikipedia_image(page) -> str:
@@ -61,35 +68,34 @@ class Ingestion:
     #------------------------
     @staticmethod
     def extract_first_column_titles_from_url(main_url: str, max_titles: int = None) -> list:
-        headers = {"User-Agent": "Mozilla/5.0 (RAG-bot/1.0)"}
-        response = requests.get(main_url, headers=headers, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
+        response = HttpClient.get(main_url)
+        return Ingestion.extract_first_column_titles_from_html(response.content, max_titles=max_titles)
+
+
+    #-------------------------
+    # Titles from the first column of each wikitable in an HTML document.
+    # fast=True skips building a BeautifulSoup tree of the whole page: with lxml the tree is walked directly
+    # (only each row's first cell is visited), otherwise only the wikitable subtrees are parsed.
+    #------------------------
+    @staticmethod
+    def extract_first_column_titles_from_html(html, max_titles: int = None, fast: bool = True) -> list:
+        if fast and Constants.HTML_PARSER == "lxml":
+            links = Ingestion._first_cell_links_lxml(html)
+        else:
+            soup = (Ingestion._parse_tables(html, lambda classes: "wikitable" in classes) if fast
+                    else BeautifulSoup(html, "html.parser"))
+            links = Ingestion._first_cell_links_soup(soup)
         titles = []
-        tables = soup.select("table.wikitable")
-        if not tables:
-            return titles
-        for table in tables:
-            for row in table.select("tr"):
-                cells = row.find_all(["th", "td"])
-                if not cells:
-                    continue
-                first_cell = cells[0]
-                a_tag = first_cell.find("a", href=True)
-                if not a_tag:
-                    continue
-                href = a_tag["href"]
-                if not href.startswith("/wiki/"):
-                    continue
-                if "redlink=1" in href or ("new" in (a_tag.get("class") or [])):
-                    continue
-                # Convert URL path to title
-                path = urlparse(href).path
-                title = unquote(path.split("/wiki/", 1)[-1]).replace("_", " ")
-                if title:
-                    titles.append(title)
-                if max_titles and len(titles) >= max_titles:
-                    break
+        for href, a_classes in links:
+            if not href.startswith("/wiki/"):
+                continue
+            if "redlink=1" in href or ("new" in a_classes):
+                continue
+            # Convert URL path to title
+            path = urlparse(href).path
+            title = unquote(path.split("/wiki/", 1)[-1]).replace("_", " ")
+            if title:
+                titles.append(title)
             if max_titles and len(titles) >= max_titles:
                 break
         # Deduplicate while preserving order
@@ -102,110 +108,169 @@ class Ingestion:
         return unique_titles
 
 
+    #-------------------------
+    # Fetch wiki pages with the configured backend: "library" (fetch_wikipedia_titles) or "api"
+    # (batched MediaWiki API queries, see WikiApi).
+    #------------------------
+    @staticmethod
+    def fetch_wiki_pages(titles: list, lang: str = "vi", backend: str = Constants.WIKI_BACKEND) -> list:
+        if backend == "api":
+            from .wiki_api import WikiApi
+            return WikiApi.fetch_titles(titles, lang=lang)
+        return Ingestion.fetch_wikipedia_titles(titles, lang=lang, include_links=False)
+
+
     #-------------------------
     #Fetch content of Wikipedia pages given their titles. Optionally include direct linked pages
+    # Pages are fetched by a thread pool (workers) sharing HttpClient's keep-alive session and per-host
+    # limits; output keeps the input order (each seed followed by its linked pages).
     #------------------------
     @staticmethod
     def fetch_wikipedia_titles(titles: list, lang: str = "vi", include_links: bool = False,
-                                link_filter=None, max_linked_pages: int = None) -> list:
+                                link_filter=None, max_linked_pages: int = None,
+                                workers: int = Constants.WIKI_FETCH_WORKERS) -> list:
         import wikipedia
         wikipedia.set_lang(lang)
-        pages = []
-        visited = set()
-        total_linked_fetched = 0
         linked_cap = max_linked_pages if (isinstance(max_linked_pages, int) and max_linked_pages >= 0) else None
 
         # 1) Fetch the seed pages
-        for seed in titles or []:
-            if seed in visited:
-                continue
-            visited.add(seed)
-            try:
-                seed_page = wikipedia.page(seed)
-            except Exception:
-                hits = wikipedia.search(seed, results=1)
-                if not hits:
+        seeds = list(dict.fromkeys(titles or []))
+        visited = set(seeds)
+        fetch = partial(Ingestion._fetch_wiki_page, lang=lang)
+        fetch_seed = partial(Ingestion._fetch_wiki_page, lang=lang, with_links=include_links)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            seed_results = list(executor.map(fetch_seed, seeds))
+
+            pages = []
+            total_linked_fetched = 0
+            for result in seed_results:
+                if result is None:
                     continue
-                try:
-                    seed_page = wikipedia.page(hits[0])
-                except Exception:
+                page_dict, seed_page = result
+                pages.append(page_dict)
+                # Optionally fetch direct linked pages from this seed page
+                if not include_links:
                     continue
-            image_url = Ingestion._select_wikipedia_image(seed_page)
-            url = getattr(seed_page, "url", None)
-
-            # 1) Try HTML-based extraction (infobox with Conservation status row)
-            html = Ingestion._fetch_page_html(url)
-            iucn_text, iucn_code = Ingestion._extract_iucn_from_html(html)
-
-            # 2) If that fails and we're on Vietnamese wiki, try wikitext-based extraction
-            if iucn_text is None and iucn_code is None and lang == "vi":
-                raw = Ingestion._fetch_page_wikitext(url)
-                iucn_text, iucn_code = Ingestion._extract_iucn_from_wikitext(raw)
-
-            page_text = Utils.clean_ocr_text(seed_page.content)
-            if iucn_text:
-                page_text = f"IUCN conservation status: {iucn_text}\n\n{page_text}"
-
-            pages.append({
-                "page": 1,
-                "text": page_text,
-                "source": "wiki",
-                "url": seed_page.url,
-                "title": seed_page.title,
-                "image_url": image_url,
-                "iucn_text": iucn_text,
-                "iucn_code": iucn_code,
-            })
-            # Optionally fetch direct linked pages from this seed page
-            if not include_links:
-                continue
-            links = list(getattr(seed_page, "links", []) or [])
-            if link_filter:
-                links = [t for t in links if link_filter(t)]
-            for t in links:
+                links = list(getattr(seed_page, "links", []) or [])
+                if link_filter:
+                    links = [t for t in links if link_filter(t)]
+                links = [t for t in dict.fromkeys(links) if t not in visited]
+                # Fetch in waves no larger than the remaining cap so failed pages can be replaced
+                while links:
+                    room = len(links) if linked_cap is None else linked_cap - total_linked_fetched
+                    if room <= 0:
+                        break
+                    wave, links = links[:room], links[room:]
+                    visited.update(wave)
+                    for linked in executor.map(fetch, wave):
+                        if linked is not None:
+                            pages.append(linked[0])
+                            total_linked_fetched += 1
                 if linked_cap is not None and total_linked_fetched >= linked_cap:
-                    break
-                if t in visited:
-                    continue
-                visited.add(t)
+                    # Stop adding further linked pages beyond the cap (still fetch remaining seeds)
+                    include_links = False
+        return pages
+
+
+    #-------------------------
+    # Look up a page with the wikipedia library (falling back to the top search hit) and return its
+    # title/url/content/images (and links if asked) as a plain dict, or None if nothing was found.
+    # The library's API requests go through HttpClient (see _route_wikipedia_requests) and the whole
+    # lookup through HttpClient.cached_json, so cache modes apply to it as well.
+    #------------------------
+    @staticmethod
+    def _wikipedia_lookup(title: str, lang: str = "vi", with_links: bool = False):
+        def producer():
+            import wikipedia
+            Ingestion._route_wikipedia_requests()
+            try:
+                page = wikipedia.page(title)
+            except requests.RequestException:
+                raise
+            except Exception:
                 try:
-                    lp = wikipedia.page(t)
-                except Exception:
-                    hits = wikipedia.search(t, results=1)
+                    hits = wikipedia.search(title, results=1)
                     if not hits:
-                        continue
-                    try:
-                        lp = wikipedia.page(hits[0])
-                    except Exception:
-                        continue
-                image_url = Ingestion._select_wikipedia_image(lp)
-                
-                url = getattr(lp, "url", None)
-                html = Ingestion._fetch_page_html(url)
-                iucn_text, iucn_code = Ingestion._extract_iucn_from_html(html)
-                if iucn_text is None and iucn_code is None and lang == "vi":
-                    raw = Ingestion._fetch_page_wikitext(url)
-                    iucn_text, iucn_code = Ingestion._extract_iucn_from_wikitext(raw)
-
-                page_text = Utils.clean_ocr_text(lp.content)
-                if iucn_text:
-                    page_text = f"IUCN conservation status: {iucn_text}\n\n{page_text}"
-
-                pages.append({
-                    "page": 1,
-                    "text": page_text,
-                    "source": "wiki",
-                    "url": lp.url,
-                    "title": lp.title,
-                    "image_url": image_url,
-                    "iucn_text": iucn_text,
-                    "iucn_code": iucn_code,
-                })
-                total_linked_fetched += 1
-            if linked_cap is not None and total_linked_fetched >= linked_cap:
-                # Stop adding further linked pages beyond the cap (still fetch remaining seeds)
-                include_links = False
-        return pages
+                        return {"missing": True}
+                    page = wikipedia.page(hits[0])
+                except requests.RequestException:
+                    raise
+                except Exception:
+                    return {"missing": True}
+            # content/images/links are lazy properties that hit the API
+            info = {
+                "title": page.title,
+                "url": page.url,
+                "content": page.content,
+                "images": list(getattr(page, "images", []) or []),
+            }
+            if with_links:
+                info["links"] = list(getattr(page, "links", []) or [])
+            return info
+
+        try:
+            info = HttpClient.cached_json(f"wikipedia:{lang}:{title}:links={with_links}", producer)
+        except Exception:
+            return None
+        return None if info.get("missing") else SimpleNamespace(**info)
+
+
+    #-------------------------
+    # Send the wikipedia library's API requests (wikipedia.wikipedia._wiki_request, a bare requests.get)
+    # through HttpClient: shared keep-alive session, per-host limits, retries on 429/5xx and https.
+    # Responses are not cached per request; _wikipedia_lookup caches whole lookups.
+    #------------------------
+    @staticmethod
+    def _route_wikipedia_requests():
+        from wikipedia import wikipedia as wiki_module
+        if getattr(wiki_module._wiki_request, "via_http_client", False):
+            return
+
+        def _wiki_request(params):
+            params["format"] = "json"
+            params.setdefault("action", "query")
+            api_url = wiki_module.API_URL.replace("http://", "https://", 1)
+            return HttpClient.get(api_url, params=params, use_cache=False).json()
+
+        _wiki_request.via_http_client = True
+        wiki_module._wiki_request = _wiki_request
+
+
+    #-------------------------
+    # Fetch one Wikipedia page plus its IUCN status. Returns (page_dict, wikipedia_page) or None.
+    #------------------------
+    @staticmethod
+    def _fetch_wiki_page(title: str, lang: str = "vi", with_links: bool = False):
+        page = Ingestion._wikipedia_lookup(title, lang=lang, with_links=with_links)
+        if page is None:
+            return None
+        image_url = Ingestion._select_wikipedia_image(page)
+        content = page.content
+        url = getattr(page, "url", None)
+
+        # 1) Try HTML-based extraction (infobox with Conservation status row)
+        html = Ingestion._fetch_page_html(url)
+        iucn_text, iucn_code = Ingestion._extract_iucn_from_html(html)
+
+        # 2) If that fails and we're on Vietnamese wiki, try wikitext-based extraction
+        if iucn_text is None and iucn_code is None and lang == "vi":
+            raw = Ingestion._fetch_page_wikitext(url)
+            iucn_text, iucn_code = Ingestion._extract_iucn_from_wikitext(raw)
+
+        page_text = TextNormalizer.clean_ocr(content)
+        if iucn_text:
+            page_text = f"IUCN conservation status: {iucn_text}\n\n{page_text}"
+
+        return {
+            "page": 1,
+            "text": page_text,
+            "source": "wiki",
+            "url": page.url,
+            "title": page.title,
+            "image_url": image_url,
+            "iucn_text": iucn_text,
+            "iucn_code": iucn_code,
+        }, page
 
 
     #-------------------------
@@ -235,6 +300,45 @@ class Ingestion:
             img = PILImage.open(io.BytesIO(png_bytes)).convert("RGB")
         except Exception as e:
             return f"[ocr_error] failed to open image: {e}"
+        return Ingestion._ocr_image(img, use_tesseract, tesseract_langs, downscale_max_width)
+
+
+    #-------------------------
+    # Worker process function that renders its own page: job is (pdf_path, page_no, dpi).
+    # The page is rendered straight to a grayscale pixmap and wrapped as a PIL image over the raw
+    # samples, so no PNG is encoded, pickled to the worker or decoded again.
+    #------------------------
+    @staticmethod
+    def _ocr_worker_pdf_page(job: tuple, use_tesseract: bool,
+                             tesseract_langs: str, downscale_max_width: int):
+        pdf_path, page_no, dpi = job
+        try:
+            from PIL import Image as PILImage
+        except Exception as e:
+            return f"[ocr_error] missing PIL in worker: {e}"
+
+        try:
+            # pages of one PDF arrive in order, so keeping the last document open avoids re-opening it per page
+            if Ingestion._worker_doc is None or Ingestion._worker_doc[0] != pdf_path:
+                if Ingestion._worker_doc is not None:
+                    Ingestion._worker_doc[1].close()
+                    Ingestion._worker_doc = None
+                Ingestion._worker_doc = (pdf_path, pymupdf.open(pdf_path))
+            page = Ingestion._worker_doc[1][page_no - 1]
+            mat = pymupdf.Matrix(dpi / 72.0, dpi / 72.0)
+            pix = page.get_pixmap(matrix=mat, colorspace=pymupdf.csGRAY, alpha=False)
+            img = PILImage.frombuffer("L", (pix.width, pix.height), pix.samples, "raw", "L", pix.stride, 1)
+        except Exception as e:
+            return f"[ocr_error] failed to render page: {e}"
+        return Ingestion._ocr_image(img, use_tesseract, tesseract_langs, downscale_max_width)
+
+
+    #-------------------------
+    # OCR one PIL image (RGB or grayscale) with Tesseract, falling back to EasyOCR.
+    #------------------------
+    @staticmethod
+    def _ocr_image(img, use_tesseract: bool, tesseract_langs: str, downscale_max_width: int):
+        from PIL import Image as PILImage
 
         # Downscale image
         try:
@@ -251,7 +355,7 @@ class Ingestion:
                 import pytesseract as _pt
                 config = "--psm 6"
                 txt = _pt.image_to_string(img, lang=tesseract_langs, config=config)
-                return Utils.clean_ocr_text(txt)
+                return TextNormalizer.clean_ocr(txt)
             except Exception:
                 # If Tesseract OCR fails, fall through to EasyOCR
                 pass
@@ -267,7 +371,7 @@ class Ingestion:
                 np_img = np.array(img)
                 result = Ingestion._worker_easy_reader.readtext(np_img)
                 text = "\n".join([r[1] for r in result])
-                return Utils.clean_ocr_text(text)
+                return TextNormalizer.clean_ocr(text)
             except Exception as e:
                 return f"[ocr_easy_error] {e}"
 
@@ -277,39 +381,151 @@ class Ingestion:
 
     #-------------------------
     #Run OCR on multiple page images in parallel processes.
+    # ocr_jobs may be any iterable of (title, page_no, payload), e.g. the lazy iter_pdf_ocr_jobs: at most
+    # render_batch pages are rendered and waiting in the pool at once, and the next pages are rendered
+    # in this process while the workers recognize the previous ones. payload is PNG bytes for the default
+    # worker, or (pdf_path, page_no, dpi) for worker=_ocr_worker_pdf_page.
+    # on_result(job_index, page_dict) is called in this process as each page finishes.
     #------------------------
     @staticmethod
-    def _run_parallel_ocr(ocr_jobs: list, use_tesseract: bool,
-                           tesseract_langs: str, workers: int, downscale_max_width: int) -> list:
+    def _run_parallel_ocr(ocr_jobs, use_tesseract: bool,
+                           tesseract_langs: str, workers: int, downscale_max_width: int,
+                           render_batch: int = Constants.PAGE_RENDER_BATCH, total: int = None,
+                           worker=None, on_result=None) -> list:
         pages_out = []
-        if not ocr_jobs:
+        if total is None and hasattr(ocr_jobs, "__len__"):
+            total = len(ocr_jobs)
+        if total == 0:
             return pages_out
+        # keep every worker busy even when render_batch is smaller than the pool
+        window = max(render_batch or 1, workers)
 
         # Prepare the worker function with fixed parameters using partial
-        worker_func = partial(Ingestion._ocr_worker_png_bytes,
+        worker_func = partial(worker or Ingestion._ocr_worker_png_bytes,
                               use_tesseract=use_tesseract,
                               tesseract_langs=tesseract_langs,
                               downscale_max_width=downscale_max_width)
-        with ProcessPoolExecutor(max_workers=workers) as executor:
-            futures = {executor.submit(worker_func, png_bytes): (title, page_no) 
-                       for (title, page_no, png_bytes) in ocr_jobs}
-            for future in tqdm(as_completed(futures), total=len(futures), desc="OCR pages", unit="page"):
-                title, page_no = futures[future]
+
+        def collect(done, futures, progress):
+            for future in done:
+                job_index, title, page_no = futures.pop(future)
                 try:
                     text = future.result()
                 except Exception as e:
                     text = f"[ocr_exception] {e}"
-                pages_out.append({
+                page = {
                     "page": page_no,
                     "text": text if text else "",
                     "source": "pdf_ocr",
                     "title": title
-                })
+                }
+                pages_out.append(page)
+                if on_result is not None:
+                    on_result(job_index, page)
+                progress.update(1)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor, \
+             tqdm(total=total, desc="OCR pages", unit="page") as progress:
+            futures = {}
+            for job_index, (title, page_no, payload) in enumerate(ocr_jobs):
+                if len(futures) >= window:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    collect(done, futures, progress)
+                futures[executor.submit(worker_func, payload)] = (job_index, title, page_no)
+            collect(as_completed(list(futures)), futures, progress)
         # Sort results by document title and page number for consistency
         pages_out.sort(key=lambda x: (x.get("title", ""), x.get("page", 0)))
         return pages_out
 
 
+    #-------------------------
+    # OCR the image-only pages of several PDFs. ocr_pdfs is a list of (pdf_path, page_numbers).
+    # render_in_worker=True sends (pdf_path, page_no, dpi) and each worker renders its own grayscale page;
+    # otherwise pages are rendered to PNG here, lazily and in bounded batches, while the pool recognizes earlier ones.
+    # With cache_dir set, pages already in the OcrCache for this configuration are not scheduled at all and
+    # new results are stored as they arrive. pdf_sha1s maps absolute PDF paths to their sha1 (e.g. from the
+    # manifest; missing entries are hashed here) and, when given, is also recorded on each page as doc_sha1.
+    #------------------------
+    @staticmethod
+    def run_ocr(ocr_pdfs: list, use_tesseract: bool, tesseract_langs: str, workers: int,
+                downscale_max_width: int, dpi: int = Constants.OCR_DPI,
+                render_batch: int = Constants.PAGE_RENDER_BATCH,
+                render_in_worker: bool = Constants.OCR_RENDER_IN_WORKER,
+                cache_dir: str = None, pdf_sha1s: dict = None) -> list:
+        if not sum(len(pages) for _, pages in ocr_pdfs):
+            return []
+        engine = Ingestion.ocr_engine_id(use_tesseract, tesseract_langs)
+        cache = None
+        if cache_dir and engine != "none":
+            cache = OcrCache(cache_dir, engine, dpi, downscale_max_width,
+                             "worker_gray" if render_in_worker else "parent_png")
+
+        # pages are tagged with their PDF's sha1 (doc_sha1) whenever pdf_sha1s is given
+        tag = pdf_sha1s is not None
+        cached_pages = []
+        todo = []
+        job_shas = []
+        for pdf_path, pages in ocr_pdfs:
+            sha = None
+            if cache is not None or tag:
+                sha = (pdf_sha1s or {}).get(os.path.abspath(pdf_path)) or Utils.file_digest(pdf_path)
+            done = cache.get(sha) if cache is not None else {}
+            missing = [p for p in pages if p not in done]
+            for p in pages:
+                if p in done:
+                    page = {"page": p, "text": done[p], "source": "pdf_ocr", "title": os.path.basename(pdf_path)}
+                    if tag:
+                        page["doc_sha1"] = sha
+                    cached_pages.append(page)
+            if missing:
+                todo.append((pdf_path, missing))
+                job_shas.extend([sha] * len(missing))
+        if cache is not None:
+            print(f"[ocr] cache: {len(cached_pages)} pages reused, {len(job_shas)} to recognize")
+
+        def on_result(job_index, page):
+            if tag:
+                page["doc_sha1"] = job_shas[job_index]
+            # error markers from the workers are retried next run instead of being cached
+            if cache is not None and not page["text"].startswith("[ocr_"):
+                cache.add(job_shas[job_index], page["page"], page["text"])
+
+        total = sum(len(pages) for _, pages in todo)
+        if render_in_worker:
+            jobs = ((os.path.basename(pdf_path), page_no, (pdf_path, page_no, dpi))
+                    for pdf_path, pages in todo for page_no in pages)
+            worker = Ingestion._ocr_worker_pdf_page
+        else:
+            jobs = Ingestion.iter_pdf_ocr_jobs(todo, dpi=dpi)
+            worker = Ingestion._ocr_worker_png_bytes
+        pages_out = Ingestion._run_parallel_ocr(jobs,
+                                                use_tesseract=use_tesseract,
+                                                tesseract_langs=tesseract_langs,
+                                                workers=workers,
+                                                downscale_max_width=downscale_max_width,
+                                                render_batch=render_batch,
+                                                total=total,
+                                                worker=worker,
+                                                on_result=on_result)
+        if not cached_pages:
+            return pages_out
+        pages_out.extend(cached_pages)
+        pages_out.sort(key=lambda x: (x.get("title", ""), x.get("page", 0)))
+        return pages_out
+
+
+    #-------------------------
+    # Identifier of the OCR engine _ocr_image will use, for cache keys.
+    #------------------------
+    @staticmethod
+    def ocr_engine_id(use_tesseract: bool, tesseract_langs: str) -> str:
+        if use_tesseract and Constants.TESSERACT_PY_AVAILABLE:
+            return f"tesseract:{tesseract_langs}:psm6"
+        if Constants.EASYOCR_AVAILABLE:
+            return "easyocr:en+vi"
+        return "none"
+
+
     #-------------------------
     #Read a PDF file and separate its content into text pages and OCR jobs for image-only pages.
     #------------------------
@@ -326,7 +542,7 @@ class Ingestion:
             if page_text:
                 pages_with_text.append({
                     "page": i,
-                    "text": Utils.clean_ocr_text(page_text),
+                    "text": TextNormalizer.clean_ocr(page_text),
                     "source": "pdf",
                     "title": base_title
                 })
@@ -336,20 +552,187 @@ class Ingestion:
         return pages_with_text, ocr_jobs
 
 
+    #-------------------------
+    # Like pdf_to_pages_with_jobs, but image-only pages are returned as page numbers instead of being
+    # rendered up front; pass them to run_ocr as (pdf_path, page_numbers).
+    #------------------------
+    @staticmethod
+    def pdf_to_pages_with_image_pages(pdf_path: str) -> tuple:
+        pages_with_text = []
+        image_pages = []
+        for page_no, page in Ingestion.iter_pdf_text_pages(pdf_path):
+            if page is None:
+                image_pages.append(page_no)
+            else:
+                pages_with_text.append(page)
+        return pages_with_text, image_pages
+
+
+    #-------------------------
+    # Streaming variant of pdf_to_pages_with_jobs: yield (page_no, page_dict) one page at a time.
+    # page_dict is None for image-only pages, which the caller OCRs later via iter_ocr_jobs.
+    #------------------------
+    @staticmethod
+    def iter_pdf_text_pages(pdf_path: str):
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        base_title = os.path.basename(pdf_path)
+        with pymupdf.open(pdf_path) as doc:
+            for i, page in enumerate(doc, start=1):
+                page_text = page.get_text().strip()
+                if not page_text:
+                    yield i, None
+                    continue
+                yield i, {
+                    "page": i,
+                    "text": TextNormalizer.clean_ocr(page_text),
+                    "source": "pdf",
+                    "title": base_title
+                }
+
+
+    #-------------------------
+    # Worker process function: text pages of pdf_path for page numbers [start, end).
+    # Returns ([(page_no, page_dict or None), ...], seconds spent).
+    #------------------------
+    @staticmethod
+    def _extract_text_range(pdf_path: str, start: int, end: int) -> tuple:
+        t0 = time.perf_counter()
+        base_title = os.path.basename(pdf_path)
+        out = []
+        with pymupdf.open(pdf_path) as doc:
+            for i in range(start, end):
+                page_text = doc[i - 1].get_text().strip()
+                if not page_text:
+                    out.append((i, None))
+                    continue
+                out.append((i, {
+                    "page": i,
+                    "text": TextNormalizer.clean_ocr(page_text),
+                    "source": "pdf",
+                    "title": base_title
+                }))
+        return out, time.perf_counter() - t0
+
+
+    #-------------------------
+    # Extract text pages of many PDFs in a process pool. Each PDF is split into ranges of at most
+    # pages_per_task pages, so one large volume is spread over several workers too. Below
+    # TEXT_PARALLEL_MIN_PAGES pages in total the PDFs are read in-process (no pool start-up).
+    # Yields (pdf_path, pages_with_text, image_page_numbers) in input order, same content as
+    # pdf_to_pages_with_image_pages, and prints per-document throughput.
+    #------------------------
+    @staticmethod
+    def iter_pdf_texts(pdf_paths: list, workers: int = Constants.TEXT_WORKERS,
+                       pages_per_task: int = Constants.TEXT_PAGES_PER_TASK):
+        page_counts = []
+        if workers > 1:
+            for pdf_path in pdf_paths:
+                with pymupdf.open(pdf_path) as doc:
+                    page_counts.append(doc.page_count)
+            if sum(page_counts) < Constants.TEXT_PARALLEL_MIN_PAGES:
+                workers = 1
+        if workers <= 1 or not pdf_paths:
+            for pdf_path in pdf_paths:
+                t0 = time.perf_counter()
+                pages_text, image_pages = Ingestion.pdf_to_pages_with_image_pages(pdf_path)
+                Ingestion._report_text_throughput(pdf_path, len(pages_text) + len(image_pages),
+                                                  len(image_pages), time.perf_counter() - t0)
+                yield pdf_path, pages_text, image_pages
+            return
+
+        tasks = []
+        n_ranges = []
+        for doc_idx, n_pages in enumerate(page_counts):
+            ranges = [(s, min(s + pages_per_task, n_pages + 1)) for s in range(1, n_pages + 1, pages_per_task)]
+            ranges = ranges or [(1, 1)]
+            n_ranges.append(len(ranges))
+            tasks.extend((doc_idx, start, end) for start, end in ranges)
+
+        workers = min(workers, len(tasks))
+        # results are buffered until every range of a document is in; bounding the number of
+        # submitted tasks keeps that buffer small when an early document is slow
+        window = workers * 4
+        parts = {}
+        next_doc = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            task_iter = iter(tasks)
+            pending = True
+            while pending or futures:
+                while pending and len(futures) < window:
+                    task = next(task_iter, None)
+                    if task is None:
+                        pending = False
+                        break
+                    doc_idx, start, end = task
+                    futures[executor.submit(Ingestion._extract_text_range, pdf_paths[doc_idx], start, end)] = task
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    doc_idx, start, _ = futures.pop(future)
+                    parts.setdefault(doc_idx, []).append((start,) + future.result())
+                # emit finished documents in input order
+                while next_doc in parts and len(parts[next_doc]) == n_ranges[next_doc]:
+                    doc_parts = sorted(parts.pop(next_doc), key=lambda x: x[0])
+                    pages_text, image_pages = [], []
+                    for _, rows, _ in doc_parts:
+                        for page_no, page in rows:
+                            if page is None:
+                                image_pages.append(page_no)
+                            else:
+                                pages_text.append(page)
+                    Ingestion._report_text_throughput(pdf_paths[next_doc], len(pages_text) + len(image_pages),
+                                                      len(image_pages), sum(p[2] for p in doc_parts))
+                    yield pdf_paths[next_doc], pages_text, image_pages
+                    next_doc += 1
+
+
+    @staticmethod
+    def _report_text_throughput(pdf_path: str, n_pages: int, n_image: int, seconds: float):
+        rate = n_pages / seconds if seconds > 0 else float("inf")
+        print(f"[pdf] {os.path.basename(pdf_path)}: {n_pages} pages ({n_image} image-only) "
+              f"in {seconds:.2f}s worker time, {rate:.0f} pages/s")
+
+
+    #-------------------------
+    # Render the given pages of a PDF lazily, yielding (title, page_no, png_bytes) OCR jobs.
+    #------------------------
+    @staticmethod
+    def iter_ocr_jobs(pdf_path: str, page_numbers: list, dpi: int = Constants.OCR_DPI):
+        base_title = os.path.basename(pdf_path)
+        with pymupdf.open(pdf_path) as doc:
+            for page_no in page_numbers:
+                png_bytes = Ingestion.render_page_to_png_bytes(doc[page_no - 1], dpi=dpi)
+                yield base_title, page_no, png_bytes
+
+
+
+    #-------------------------
+    # Chain iter_ocr_jobs over several PDFs given as (pdf_path, page_numbers).
+    #------------------------
+    @staticmethod
+    def iter_pdf_ocr_jobs(ocr_pdfs: list, dpi: int = Constants.OCR_DPI):
+        for pdf_path, page_numbers in ocr_pdfs:
+            yield from Ingestion.iter_ocr_jobs(pdf_path, page_numbers, dpi=dpi)
+
 
     #-------------------------
     #Extract IUCN conservation status from a Wikipedia page HTML.
     #------------------------
     @staticmethod
-    def _extract_iucn_from_html(html: str):
+    def _extract_iucn_from_html(html: str, fast: bool = True):
         """Extract IUCN conservation status from a Wikipedia page HTML.
 
+        fast=True parses only infobox tables (see _parse_tables); fast=False builds the full page tree.
         Returns (iucn_text, iucn_code) or (None, None).
         """
         if not html:
             return None, None
 
-        soup = BeautifulSoup(html, "html.parser")
+        if fast:
+            soup = Ingestion._parse_tables(html, lambda classes: any("infobox" in c for c in classes))
+        else:
+            soup = BeautifulSoup(html, "html.parser")
 
         # Find any infobox table
         infobox = soup.find("table", class_=lambda c: c and "infobox" in c)
@@ -385,16 +768,66 @@ class Ingestion:
 
         return None, None
 
+    #-------------------------
+    # Parse only <table> elements whose class list satisfies class_match (plus everything nested in them).
+    # Tables are the only regions the extractors read, so skipping the rest of the article does not
+    # change their output; with lxml the skipped markup never becomes Python objects at all.
+    #------------------------
+    @staticmethod
+    def _parse_tables(html, class_match) -> BeautifulSoup:
+        # the strainer sees the raw attribute string, so split it like bs4 does for class
+        def match(value):
+            if value is None:
+                return False
+            return class_match(value.split() if isinstance(value, str) else list(value))
+        strainer = SoupStrainer("table", class_=match)
+        try:
+            return BeautifulSoup(html, Constants.HTML_PARSER, parse_only=strainer)
+        except Exception:
+            return BeautifulSoup(html, "html.parser", parse_only=strainer)
+
+    #-------------------------
+    # (href, link classes) of the first linked <a> in the first cell of every wikitable row, in document order.
+    #------------------------
+    @staticmethod
+    def _first_cell_links_soup(soup: BeautifulSoup):
+        for table in soup.select("table.wikitable"):
+            for row in table.select("tr"):
+                cells = row.find_all(["th", "td"])
+                if not cells:
+                    continue
+                a_tag = cells[0].find("a", href=True)
+                if a_tag:
+                    yield a_tag["href"], a_tag.get("class") or []
+
+    @staticmethod
+    def _first_cell_links_lxml(html):
+        # same traversal as _first_cell_links_soup (descendant tr / th|td / a[href]) on an lxml tree
+        import lxml.html
+        from bs4.dammit import UnicodeDammit
+        if isinstance(html, bytes):
+            html = UnicodeDammit(html, is_html=True).unicode_markup
+        if not html or not html.strip():
+            return
+        root = lxml.html.document_fromstring(html)
+        for table in root.iter("table"):
+            if "wikitable" not in (table.get("class") or "").split():
+                continue
+            for row in table.iter("tr"):
+                cell = next(row.iter("th", "td"), None)
+                if cell is None:
+                    continue
+                a_tag = next((a for a in cell.iter("a") if a.get("href") is not None), None)
+                if a_tag is not None:
+                    yield a_tag.get("href"), (a_tag.get("class") or "").split()
+
     @staticmethod
     def _fetch_page_html(url: str) -> str | None:
         """Download the full HTML for a Wikipedia page URL."""
         if not url:
             return None
         try:
-            headers = {"User-Agent": "Mozilla/5.0 (RAG-bot/1.0)"}
-            resp = requests.get(url, headers=headers, timeout=30)
-            resp.raise_for_status()
-            return resp.text
+            return HttpClient.get(url).text
         except Exception:
             return None
 
@@ -407,10 +840,7 @@ class Ingestion:
             parsed = urlparse(url)
             # keep path, force ?action=raw
             raw_url = parsed._replace(query="action=raw").geturl()
-            headers = {"User-Agent": "Mozilla/5.0 (RAG-bot/1.0)"}
-            resp = requests.get(raw_url, headers=headers, timeout=30)
-            resp.raise_for_status()
-            return resp.text
+            return HttpClient.get(raw_url).text
         except Exception:
             return None
 
@@ -0,0 +1,272 @@
+#lexical_index.py
+import os
+import re
+import json
+import shutil
+import unicodedata
+import numpy as np
+
+from .constants import Constants
+from .normalizer import TextNormalizer
+
+
+_TOKEN_RE = re.compile(r"\w+")
+# Latin binomials as they appear in the sources: "Sao la (Pseudoryx nghetinhensis)"
+_BINOMIAL_RE = re.compile(r"\(\s*([A-Z][a-z]{2,}\s+[a-z]{2,})")
+
+
+class LexicalIndex:
+    """BM25 inverted index over chunk texts, row-aligned with the FAISS index.
+
+    Tokens are the lowercased syllables of TextNormalizer.normalize_vi output; with bigrams, adjacent
+    syllables are also indexed as one term ("sao_la"), since Vietnamese words span several syllables.
+    fold strips diacritics (and đ -> d) on both sides, so queries typed without accents still match.
+
+    Layout of an index directory (postings are immutable segments, appends add a segment):
+      meta.json            version, tokenizer settings, segment names, known names (titles, binomials)
+      doc_len.npy          uint32 terms per row; 0 = tombstoned or empty row (never returned)
+      seg_<n>/terms.json   sorted terms of the segment
+      seg_<n>/offsets.npy  int64 posting offsets per term (CSR)
+      seg_<n>/rows.npy     uint32 row ids, seg_<n>/tfs.npy uint16 term frequencies
+    Segments are merged once there are more than LEXICAL_MAX_SEGMENTS.
+    """
+
+    VERSION = 1
+    META_FILE = "meta.json"
+    DOC_LEN_FILE = "doc_len.npy"
+
+    def __init__(self, fold: bool = Constants.LEXICAL_FOLD_DIACRITICS, bigrams: bool = Constants.LEXICAL_BIGRAMS):
+        self.fold = fold
+        self.bigrams = bigrams
+        self.doc_len = np.zeros(0, dtype=np.uint32)
+        self.names = set()
+        self.segments = []      # [name, {term: i}, offsets, rows, tfs]
+        self._next_segment = 0
+        self._written = set()
+
+    def __len__(self):
+        return int(self.doc_len.shape[0])
+
+
+    #-------------------------
+    # Query/document tokenization: syllables (no bigrams), after normalize_vi, lowercasing and folding.
+    #------------------------
+    def tokens(self, text: str) -> list:
+        t = TextNormalizer.normalize_vi(text or "").lower()
+        if self.fold and not t.isascii():
+            t = "".join(c for c in unicodedata.normalize("NFD", t.replace("đ", "d")) if not unicodedata.combining(c))
+        return _TOKEN_RE.findall(t)
+
+    def terms(self, text: str) -> list:
+        toks = self.tokens(text)
+        if self.bigrams and len(toks) > 1:
+            return toks + [f"{a}_{b}" for a, b in zip(toks, toks[1:])]
+        return toks
+
+    def _name_key(self, text: str) -> str:
+        return " ".join(self.tokens(text))
+
+
+    #-------------------------
+    # True when the whole query is a known name (species page title or Latin binomial) of at most
+    # LEXICAL_NAME_MAX_TOKENS syllables; such queries are answered by BM25 alone.
+    #------------------------
+    def is_name(self, query: str) -> bool:
+        key = self._name_key(query)
+        return bool(key) and len(key.split()) <= Constants.LEXICAL_NAME_MAX_TOKENS and key in self.names
+
+
+    #-------------------------
+    # Index chunks as rows start_row.. (one new segment). Tombstoned chunks get doc_len 0.
+    # merge=False leaves segments for a later merge() (streaming appends many small batches).
+    #------------------------
+    def append(self, chunks, start_row: int = None, merge: bool = True):
+        start_row = len(self) if start_row is None else start_row
+        postings = {}
+        lengths = []
+        for i, chunk in enumerate(chunks):
+            if chunk.get("deleted"):
+                lengths.append(0)
+                continue
+            terms = self.terms(chunk.get("text"))
+            lengths.append(len(terms))
+            row = start_row + i
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(row)
+                postings[term][1].append(tf)
+            self._add_names(chunk)
+        if start_row + len(lengths) > len(self):
+            grown = np.zeros(start_row + len(lengths), dtype=np.uint32)
+            grown[:len(self)] = self.doc_len
+            self.doc_len = grown
+        self.doc_len[start_row:start_row + len(lengths)] = np.asarray(lengths, dtype=np.uint32)
+        if postings:
+            self._add_segment(postings)
+        if merge and len(self.segments) > Constants.LEXICAL_MAX_SEGMENTS:
+            self.merge()
+        return self
+
+    def _add_names(self, chunk: dict):
+        if chunk.get("source") == "wiki" and chunk.get("doc_id"):
+            self.names.add(self._name_key(chunk["doc_id"]))
+        text = chunk.get("text") or ""
+        if "(" in text:
+            for name in _BINOMIAL_RE.findall(text):
+                self.names.add(self._name_key(name))
+
+    def _add_segment(self, postings: dict):
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[t][0]) for t in terms])
+        rows = np.fromiter((r for t in terms for r in postings[t][0]), dtype=np.uint32, count=int(offsets[-1]))
+        tfs = np.fromiter((min(f, 65535) for t in terms for f in postings[t][1]), dtype=np.uint16,
+                          count=int(offsets[-1]))
+        name = f"seg_{self._next_segment:04d}"
+        self._next_segment += 1
+        self.segments.append([name, {t: i for i, t in enumerate(terms)}, offsets, rows, tfs])
+
+    #-------------------------
+    # Tombstone rows (removed documents): they keep their postings until the next merge but never score.
+    #------------------------
+    def mark_deleted(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        self.doc_len[rows[rows < len(self)]] = 0
+
+    #-------------------------
+    # Merge all segments into one, dropping postings of tombstoned rows (no re-tokenization).
+    #------------------------
+    def merge(self):
+        postings = {}
+        for _, term_ids, offsets, rows, tfs in self.segments:
+            for term, i in term_ids.items():
+                r = np.asarray(rows[offsets[i]:offsets[i + 1]])
+                f = np.asarray(tfs[offsets[i]:offsets[i + 1]])
+                live = self.doc_len[r] > 0
+                if live.any():
+                    entry = postings.setdefault(term, ([], []))
+                    entry[0].extend(r[live].tolist())
+                    entry[1].extend(f[live].tolist())
+        self.segments = []
+        if postings:
+            self._add_segment(postings)
+
+
+    #-------------------------
+    # Top-k rows by BM25 as (rows, scores), best first. mask (bool per row) restricts the candidates;
+    # term statistics stay those of the whole index.
+    #------------------------
+    def search(self, query: str, k: int, mask: np.ndarray = None) -> tuple:
+        live = self.doc_len > 0
+        n_live = int(np.count_nonzero(live))
+        if n_live == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        avgdl = float(self.doc_len[live].mean())
+        k1, b = Constants.BM25_K1, Constants.BM25_B
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in dict.fromkeys(self.terms(query)):
+            parts = []
+            for _, term_ids, offsets, rows, tfs in self.segments:
+                i = term_ids.get(term)
+                if i is not None:
+                    parts.append((rows[offsets[i]:offsets[i + 1]], tfs[offsets[i]:offsets[i + 1]]))
+            if not parts:
+                continue
+            rows = np.concatenate([p[0] for p in parts]).astype(np.int64)
+            tf = np.concatenate([p[1] for p in parts]).astype(np.float32)
+            dl = self.doc_len[rows].astype(np.float32)
+            df = int(np.count_nonzero(dl))
+            if df == 0:
+                continue
+            idf = np.log(1.0 + (n_live - df + 0.5) / (df + 0.5))
+            scores[rows] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+        scores[~live] = 0
+        if mask is not None:
+            scores[~mask] = 0
+        hits = np.flatnonzero(scores)
+        if hits.size > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return hits.astype(np.int64), scores[hits]
+
+
+    #-------------------------
+    # Build from all chunks (row i = chunks[i]).
+    #------------------------
+    @staticmethod
+    def build(chunks, fold: bool = Constants.LEXICAL_FOLD_DIACRITICS, bigrams: bool = Constants.LEXICAL_BIGRAMS):
+        return LexicalIndex(fold, bigrams).append(chunks, 0)
+
+    def _meta(self) -> dict:
+        return {"version": self.VERSION, "fold": self.fold, "bigrams": self.bigrams,
+                "segments": [seg[0] for seg in self.segments], "next_segment": self._next_segment,
+                "names": sorted(self.names)}
+
+    #-------------------------
+    # Write new segments, then doc_len and meta.json (the commit point); segments no longer listed
+    # (merged away) are deleted afterwards.
+    #------------------------
+    def save(self, index_dir: str):
+        os.makedirs(index_dir, exist_ok=True)
+        for name, term_ids, offsets, rows, tfs in self.segments:
+            seg_dir = os.path.join(index_dir, name)
+            if name in self._written and os.path.isdir(seg_dir):
+                continue
+            os.makedirs(seg_dir, exist_ok=True)
+            with open(os.path.join(seg_dir, "terms.json"), "w", encoding="utf-8") as f:
+                json.dump(list(term_ids), f, ensure_ascii=False)
+            np.save(os.path.join(seg_dir, "offsets.npy"), offsets)
+            np.save(os.path.join(seg_dir, "rows.npy"), rows)
+            np.save(os.path.join(seg_dir, "tfs.npy"), tfs)
+            self._written.add(name)
+        doc_len_path = os.path.join(index_dir, self.DOC_LEN_FILE)
+        with open(doc_len_path + ".tmp", "wb") as f:
+            np.save(f, self.doc_len)
+        os.replace(doc_len_path + ".tmp", doc_len_path)
+        meta_path = os.path.join(index_dir, self.META_FILE)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self._meta(), f, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+        listed = {seg[0] for seg in self.segments}
+        for entry in os.listdir(index_dir):
+            if entry.startswith("seg_") and entry not in listed:
+                shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+        return self
+
+    #-------------------------
+    # Index from index_dir, or None when it is missing or was written by another version.
+    # Postings are memory-mapped; doc_len is read into memory since appends and tombstones update it.
+    #------------------------
+    @staticmethod
+    def load(index_dir: str):
+        meta_path = os.path.join(index_dir, LexicalIndex.META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != LexicalIndex.VERSION:
+            return None
+        index = LexicalIndex(meta["fold"], meta["bigrams"])
+        index.doc_len = np.array(np.load(os.path.join(index_dir, LexicalIndex.DOC_LEN_FILE)), dtype=np.uint32)
+        index.names = set(meta.get("names", []))
+        index._next_segment = meta.get("next_segment", len(meta["segments"]))
+        for name in meta["segments"]:
+            seg_dir = os.path.join(index_dir, name)
+            with open(os.path.join(seg_dir, "terms.json"), "r", encoding="utf-8") as f:
+                terms = json.load(f)
+            arrays = [LexicalIndex._load_array(os.path.join(seg_dir, fname))
+                      for fname in ("offsets.npy", "rows.npy", "tfs.npy")]
+            index.segments.append([name, {t: i for i, t in enumerate(terms)}, *arrays])
+            index._written.add(name)
+        return index
+
+    @staticmethod
+    def _load_array(path: str):
+        try:
+            return np.load(path, mmap_mode="r")
+        except ValueError:
+            # empty arrays cannot be memory-mapped
+            return np.load(path)
@@ -0,0 +1,201 @@
+#near_dedup.py
+import os
+import json
+import numpy as np
+
+from .constants import Constants
+
+
+_SHIFT_32 = np.uint64(32)
+_MAX_32 = np.uint64(0xFFFFFFFF)
+_SHINGLE_PRIME = np.uint64(1099511628211)
+_BLOCK_SHINGLES = 65536      # shingles hashed per numpy block (perms x block uint64 values in memory)
+
+
+class MinHashIndex:
+    """MinHash signatures of chunk texts with an LSH table for near-duplicate lookup.
+
+    Texts are lowercased, whitespace-collapsed and cut into character shingles of MINHASH_SHINGLE
+    characters, which tolerates OCR noise and small edits. Each signature holds MINHASH_PERMS minimum
+    hash values; it is split into bands of rows, where (bands, rows) is chosen for the Jaccard threshold,
+    and every band is a dict key. A query only looks at chunks that share at least one band, then keeps
+    the best candidate whose estimated Jaccard (fraction of equal signature values) reaches the threshold.
+
+    Signatures are stored per chunk hash (save/load), so appends can be checked against earlier runs
+    without recomputing them; load(keep=...) drops entries of chunks that are no longer live.
+    """
+
+    SIGNATURES_FILE = "signatures.npy"
+    META_FILE = "meta.json"
+
+    def __init__(self, threshold: float = Constants.NEAR_DEDUP_THRESHOLD, num_perm: int = Constants.MINHASH_PERMS,
+                 shingle: int = Constants.MINHASH_SHINGLE, seed: int = Constants.MINHASH_SEED):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        # multiply-shift hashing: high 32 bits of (a*x + b) mod 2^64 with odd a, no modulo needed
+        self._a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = MinHashIndex.lsh_params(threshold, num_perm)
+        self._tables = [{} for _ in range(self.bands)]
+        self._sigs = np.empty((0, num_perm), dtype=np.uint32)
+        self.keys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+
+    #-------------------------
+    # (bands, rows) minimizing the false positive + false negative area around threshold,
+    # for the LSH collision probability 1 - (1 - s^rows)^bands.
+    #------------------------
+    @staticmethod
+    def lsh_params(threshold: float, num_perm: int) -> tuple:
+        # midpoint rule on a fine grid (np.trapz is gone in recent numpy)
+        step = 1.0 / 400
+        xs = np.arange(step / 2, 1.0, step)
+        best = None
+        for rows in range(1, num_perm + 1):
+            bands = num_perm // rows
+            p = 1.0 - (1.0 - xs ** rows) ** bands
+            fp = p[xs < threshold].sum() * step
+            fn = (1.0 - p[xs >= threshold]).sum() * step
+            if best is None or fp + fn < best[0]:
+                best = (fp + fn, bands, rows)
+        return best[1], best[2]
+
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        t = " ".join((text or "").lower().split())
+        codes = np.frombuffer(t.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        k = min(self.shingle, len(codes))
+        if k == 0:
+            return np.zeros(1, dtype=np.uint64)
+        n = len(codes) - k + 1
+        h = np.zeros(n, dtype=np.uint64)
+        for j in range(k):
+            h = h * _SHINGLE_PRIME + codes[j:j + n]
+        # fmix64 so nearby shingles spread over the 32-bit range
+        h ^= h >> np.uint64(33)
+        h *= np.uint64(0xFF51AFD7ED558CCD)
+        h ^= h >> np.uint64(33)
+        return np.unique(h & _MAX_32)
+
+
+    #-------------------------
+    # Signatures (len(texts) x num_perm, uint32) for a batch of texts, computed block-wise.
+    #------------------------
+    def signatures(self, texts: list) -> np.ndarray:
+        out = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        a, b = self._a[:, None], self._b[:, None]
+        i = 0
+        while i < len(texts):
+            hashes = []
+            total = 0
+            j = i
+            while j < len(texts) and (not hashes or total < _BLOCK_SHINGLES):
+                hs = self._shingle_hashes(texts[j])
+                hashes.append(hs)
+                total += len(hs)
+                j += 1
+            flat = np.concatenate(hashes)
+            offsets = np.cumsum([0] + [len(hs) for hs in hashes[:-1]])
+            phv = a * flat[None, :]
+            phv += b
+            phv >>= _SHIFT_32
+            out[i:j] = np.minimum.reduceat(phv, offsets, axis=1).T
+            i = j
+        return out
+
+
+    def _band_keys(self, sig: np.ndarray) -> list:
+        r = self.rows
+        return [sig[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+
+    #-------------------------
+    # Key of the most similar indexed chunk with estimated Jaccard >= threshold, else None.
+    #------------------------
+    def query(self, sig: np.ndarray):
+        candidates = set()
+        for table, band in zip(self._tables, self._band_keys(sig)):
+            rows = table.get(band)
+            if rows:
+                candidates.update(rows)
+        if not candidates:
+            return None
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        sims = (self._sigs[rows] == sig).mean(axis=1)
+        best = int(np.argmax(sims))
+        return self.keys[rows[best]] if sims[best] >= self.threshold else None
+
+
+    def insert(self, key: str, sig: np.ndarray):
+        row = len(self.keys)
+        if row == self._sigs.shape[0]:
+            grown = np.empty((max(1024, row * 2), self.num_perm), dtype=np.uint32)
+            grown[:row] = self._sigs[:row]
+            self._sigs = grown
+        self._sigs[row] = sig
+        self.keys.append(key)
+        for table, band in zip(self._tables, self._band_keys(sig)):
+            table.setdefault(band, []).append(row)
+
+
+    def _meta(self) -> dict:
+        return {"num_perm": self.num_perm, "shingle": self.shingle, "seed": self.seed}
+
+
+    #-------------------------
+    # Persist signatures + keys (the LSH tables are rebuilt on load, they depend on the threshold).
+    #------------------------
+    def save(self, store_dir: str):
+        os.makedirs(store_dir, exist_ok=True)
+        sig_path = os.path.join(store_dir, self.SIGNATURES_FILE)
+        meta_path = os.path.join(store_dir, self.META_FILE)
+        with open(sig_path + ".tmp", "wb") as f:
+            np.save(f, self._sigs[:len(self.keys)])
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({**self._meta(), "keys": self.keys}, f)
+        os.replace(sig_path + ".tmp", sig_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+
+    #-------------------------
+    # Index from a saved store, or None when it is missing or was built with other MinHash settings.
+    # keep (a set of chunk hashes) drops entries of chunks that were deleted since.
+    #------------------------
+    @staticmethod
+    def load(store_dir: str, threshold: float = Constants.NEAR_DEDUP_THRESHOLD, keep: set = None,
+             num_perm: int = Constants.MINHASH_PERMS, shingle: int = Constants.MINHASH_SHINGLE,
+             seed: int = Constants.MINHASH_SEED):
+        sig_path = os.path.join(store_dir, MinHashIndex.SIGNATURES_FILE)
+        meta_path = os.path.join(store_dir, MinHashIndex.META_FILE)
+        if not (os.path.exists(sig_path) and os.path.exists(meta_path)):
+            return None
+        index = MinHashIndex(threshold, num_perm, shingle, seed)
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if any(meta.get(k) != v for k, v in index._meta().items()):
+            return None
+        sigs = np.load(sig_path)
+        if sigs.shape[0] != len(meta["keys"]):
+            return None
+        for key, sig in zip(meta["keys"], sigs):
+            if keep is None or key in keep:
+                index.insert(key, sig)
+        return index
+
+
+    #-------------------------
+    # Index over existing chunks (e.g. when no store was saved yet), skipping tombstoned ones.
+    #------------------------
+    @staticmethod
+    def from_chunks(chunks: list, threshold: float = Constants.NEAR_DEDUP_THRESHOLD):
+        index = MinHashIndex(threshold)
+        live = [c for c in chunks if not c.get("deleted")]
+        for chunk, sig in zip(live, index.signatures([c["text"] for c in live])):
+            index.insert(chunk["hash"], sig)
+        return index
@@ -0,0 +1,77 @@
+#normalizer.py
+import re
+import html
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+from .constants import Constants
+
+
+_HYPHEN_WS_RE = re.compile(r"(\w)-\s+(\w)")
+_HYPHEN_NL_RE = re.compile(r"(\w)-\n(\w)")
+_CITATION_RE = re.compile(r"\[\s*[0-9A-Za-z]+\s*\]")
+
+
+class TextNormalizer:
+    """Fast equivalents of Utils.normalize_vi_text and Utils.clean_ocr_text (identical output).
+
+    Patterns are compiled once and each pass is skipped when its trigger character is absent
+    ("&" for entities, "-" for hyphenation, "[" for citations, non-ASCII for NFKC and zero-width spaces),
+    and NFKC only runs on text that fails unicodedata.is_normalized.
+    The final whitespace collapse is " ".join(s.split()): str.split and the regex \\s use the same
+    definition of whitespace, which also makes the separate single-newline and NBSP passes redundant.
+    benchmarks/bench_normalize.py checks the output against the Utils versions.
+    """
+
+    #-------------------------
+    # Same result as Utils.normalize_vi_text.
+    #------------------------
+    @staticmethod
+    def normalize_vi(s: str) -> str:
+        if not s:
+            return ""
+        if "&" in s:
+            s = html.unescape(s)
+        if not s.isascii():
+            # is_normalized is a quick check; normalize() does the full decomposition even for NFKC input.
+            # NFKC also maps U+00A0 to a plain space
+            if not unicodedata.is_normalized("NFKC", s):
+                s = unicodedata.normalize("NFKC", s)
+            if "\u200B" in s:
+                s = s.replace("\u200B", "")
+        if "-" in s:
+            s = _HYPHEN_WS_RE.sub(r"\1\2", s)
+        if "[" in s:
+            s = _CITATION_RE.sub("", s)
+        return " ".join(s.split())
+
+
+    #-------------------------
+    # Same result as Utils.clean_ocr_text.
+    #------------------------
+    @staticmethod
+    def clean_ocr(text: str) -> str:
+        if "-\n" in text:
+            text = _HYPHEN_NL_RE.sub(r"\1\2", text)
+        return " ".join(text.split())
+
+
+    #-------------------------
+    # Batch versions. workers > 1 spreads batches of at least NORMALIZE_PARALLEL_MIN texts over
+    # worker processes (order is kept); smaller batches are not worth the pickling.
+    #------------------------
+    @staticmethod
+    def normalize_vi_batch(texts: list, workers: int = Constants.NORMALIZE_WORKERS) -> list:
+        return TextNormalizer._map(TextNormalizer.normalize_vi, texts, workers)
+
+    @staticmethod
+    def clean_ocr_batch(texts: list, workers: int = Constants.NORMALIZE_WORKERS) -> list:
+        return TextNormalizer._map(TextNormalizer.clean_ocr, texts, workers)
+
+    @staticmethod
+    def _map(fn, texts: list, workers: int) -> list:
+        if workers > 1 and len(texts) >= Constants.NORMALIZE_PARALLEL_MIN:
+            chunksize = max(1, len(texts) // (workers * 8))
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                return list(ex.map(fn, texts, chunksize=chunksize))
+        return [fn(t) for t in texts]
@@ -0,0 +1,55 @@
+#ocr_cache.py
+import os
+import json
+
+from .utils import Utils
+
+
+class OcrCache:
+    """Per-page OCR text on disk, keyed by PDF content hash and page number.
+
+    Each OCR configuration (engine + languages, DPI, downscale width, render mode) gets its own
+    namespace directory, so changing any of them never returns text recognized under other settings.
+    Inside a namespace every PDF has an append-only <pdf_sha1>.jsonl of {"page", "text"} records,
+    written as pages finish; a run that crashes half-way through a scan keeps the pages it already did.
+    """
+
+    META_FILE = "meta.json"
+
+    def __init__(self, cache_dir: str, engine: str, dpi: int, downscale_max_width: int, render_mode: str):
+        self.config = {"engine": engine, "dpi": dpi, "downscale_max_width": downscale_max_width,
+                       "render_mode": render_mode}
+        namespace = Utils.sha1(json.dumps(self.config, sort_keys=True))
+        self.dir = os.path.join(cache_dir, namespace)
+
+    def _path(self, pdf_sha1: str) -> str:
+        return os.path.join(self.dir, f"{pdf_sha1}.jsonl")
+
+    #-------------------------
+    # Cached pages of one PDF as {page_no: text}.
+    #------------------------
+    def get(self, pdf_sha1: str) -> dict:
+        path = self._path(pdf_sha1)
+        if not os.path.exists(path):
+            return {}
+        pages = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    # torn last line from an interrupted write
+                    continue
+                pages[int(rec["page"])] = rec["text"]
+        return pages
+
+    #-------------------------
+    # Record the text of one page.
+    #------------------------
+    def add(self, pdf_sha1: str, page_no: int, text: str):
+        if not os.path.isdir(self.dir):
+            os.makedirs(self.dir, exist_ok=True)
+            with open(os.path.join(self.dir, self.META_FILE), "w", encoding="utf-8") as f:
+                json.dump(self.config, f, ensure_ascii=False)
+        with open(self._path(pdf_sha1), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"page": page_no, "text": text}, ensure_ascii=False) + "\n")
@@ -0,0 +1,115 @@
+#query_cache.py
+import time
+import threading
+from collections import OrderedDict
+
+from .constants import Constants
+
+
+class LruTtlCache:
+    """Thread-safe in-memory map bounded by entry count (LRU eviction), with optional per-entry TTL.
+
+    Expired entries are dropped when they are read. Counters (hits, misses, evictions, expired) are
+    kept for the service's /health metrics.
+    """
+
+    def __init__(self, max_entries: int, ttl: float = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expired = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    #-------------------------
+    # count_miss=False for probes whose miss is counted again by a later lookup of the same key.
+    #------------------------
+    def get(self, key, count_miss: bool = True):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += count_miss
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expired += 1
+                self.misses += count_miss
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"size": len(self._data), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0, "evictions": self.evictions,
+                "expired": self.expired}
+
+
+class QueryCache:
+    """Two-level cache in front of retrieval.
+
+    embeddings: normalized query text -> query vector, per model (vectors do not depend on the index).
+    results:    (normalized query text, k, filters, index version, search mode) -> ranked (rows, scores).
+    The index version comes from the manifest, so results of an older index are never returned;
+    invalidate() also frees them when a new manifest is published, and drops the vectors too when
+    the embedding model changed.
+    """
+
+    def __init__(self, max_embeddings: int = Constants.QUERY_CACHE_EMBEDDINGS,
+                 max_results: int = Constants.QUERY_CACHE_RESULTS, ttl: float = Constants.QUERY_CACHE_TTL):
+        self.embeddings = LruTtlCache(max_embeddings, ttl)
+        self.results = LruTtlCache(max_results, ttl)
+        self.model_name = None
+        self.version = None
+        self.invalidations = 0
+
+    #-------------------------
+    # Bind the cache to an index version and model; clears what they make stale.
+    #------------------------
+    def invalidate(self, version, model_name: str):
+        if version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+            self.results.clear()
+            self.version = version
+        if model_name != self.model_name:
+            self.embeddings.clear()
+            self.model_name = model_name
+
+    def get_embedding(self, text: str):
+        return self.embeddings.get(text)
+
+    def put_embedding(self, text: str, vector):
+        self.embeddings.put(text, vector)
+
+    @staticmethod
+    def result_key(text: str, k: int, filters: dict = None, version=None, mode: str = None) -> tuple:
+        frozen = tuple(sorted((name, tuple(sorted(values)) if isinstance(values, (list, tuple, set, frozenset))
+                               else values) for name, values in (filters or {}).items()))
+        return text, k, frozen, version, mode
+
+    def get_results(self, key: tuple, count_miss: bool = True):
+        return self.results.get(key, count_miss)
+
+    def put_results(self, key: tuple, rows_scores: tuple):
+        self.results.put(key, rows_scores)
+
+    def stats(self) -> dict:
+        return {"version": self.version, "invalidations": self.invalidations,
+                "embeddings": self.embeddings.stats(), "results": self.results.stats()}
@@ -0,0 +1,435 @@
+#retrieval.py
+import os
+import json
+import time
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import faiss
+
+from .constants import Constants
+from .utils import Utils
+from .base import Base
+from .embedding import Embedder
+from .normalizer import TextNormalizer
+from .query_cache import QueryCache
+from .lexical_index import LexicalIndex
+from .filter_index import FilterIndex
+from .indexing import Indexer
+
+
+class Retriever:
+    """Top-k chunk retrieval over prepared artifacts (chunks, FAISS index) for a batch of queries.
+
+    All queries of a batch go through one encode call and one FAISS search. Chunks may be a list
+    (chunks.jsonl) or a ChunkStore; hits carry the chunk metadata the chatbot needs to cite and
+    illustrate an answer. Tombstoned chunks ("deleted") are never returned.
+
+    With a LexicalIndex, mode "hybrid" fuses the BM25 and vector rankings by reciprocal rank fusion
+    (sum of 1 / (RRF_K + rank) over both lists); queries that are exactly a known species name or Latin
+    binomial are ranked by BM25 alone and never reach the encoder. Modes "vector" and "lexical" use
+    one ranking.
+
+    With a FilterIndex, filters ({"iucn_code": ["CR", "EN"], "source": "pdf"}) restrict the search to the
+    matching rows before ranking: FAISS searches through an IDSelectorBitmap, and on ANN indexes subsets
+    of at most FILTER_EXACT_MAX_ROWS rows are scored exactly from the embeddings (an ANN walk finds few
+    of them), so a filtered query still returns k hits when k rows match.
+
+    With a QueryCache, repeated queries skip the encoder (cached vector) or the whole search (cached
+    ranking). A Retriever created by load() watches its manifest: once prepare_from_pdf_paths publishes
+    a new one, the artifacts are reloaded and the cache is invalidated.
+    """
+
+    HIT_FIELDS = ("id", "doc_id", "source", "page", "section", "url", "image_url", "iucn_code", "iucn_text")
+
+    def __init__(self, chunks, index: 'faiss.Index', model_name: str = Constants.EMBED_MODEL_NAME,
+                 query_prefix: str = Constants.QUERY_PREFIX, manifest: dict = None, cache: QueryCache = None,
+                 lexical: LexicalIndex = None, filters: FilterIndex = None, embeddings: np.ndarray = None):
+        self.query_prefix = query_prefix
+        self.cache = cache
+        self.out_dir = None
+        self._load_args = {}
+        self._manifest_sig = None
+        self._next_check = 0.0
+        self._published = False
+        self._set_artifacts(chunks, index, lexical, filters, embeddings, model_name, manifest or {})
+
+    # chunks, indexes and version are swapped together, so a reader never pairs rows of one index
+    # with chunks of another
+    def _set_artifacts(self, chunks, index, lexical, filters, embeddings, model_name: str, manifest: dict):
+        version = (manifest.get("timestamp"), int(index.ntotal))
+        self._state = (chunks, index, lexical, filters, embeddings, version)
+        self.model_name = model_name
+        self.manifest = manifest
+        if self.cache is not None:
+            self.cache.invalidate(version, model_name)
+
+    @property
+    def chunks(self):
+        return self._state[0]
+
+    @property
+    def index(self) -> 'faiss.Index':
+        return self._state[1]
+
+    @property
+    def lexical(self) -> LexicalIndex:
+        return self._state[2]
+
+    @property
+    def filters(self) -> FilterIndex:
+        return self._state[3]
+
+    @property
+    def version(self):
+        return self._state[5]
+
+    #-------------------------
+    # Retriever over an out_dir written by Base.prepare_from_pdf_paths; the query model is the one
+    # recorded in the manifest, so queries and passages are always embedded by the same model.
+    #------------------------
+    @staticmethod
+    def load(out_dir: str, mmap: bool = Constants.LOAD_MMAP, lazy_chunks: bool = Constants.LOAD_CHUNK_STORE,
+             cache: QueryCache = None):
+        load_args = {"mmap": mmap, "lazy_chunks": lazy_chunks}
+        sig = Retriever._stat_manifest(out_dir)
+        chunks, index, lexical, filters, embeddings, model_name, manifest = Retriever._load_artifacts(
+            out_dir, load_args)
+        retriever = Retriever(chunks, index, model_name=model_name, manifest=manifest, cache=cache, lexical=lexical,
+                              filters=filters, embeddings=embeddings)
+        retriever.out_dir = out_dir
+        retriever._load_args = load_args
+        retriever._manifest_sig = sig
+        retriever._next_check = time.monotonic() + Constants.MANIFEST_CHECK_SECONDS
+        return retriever
+
+    # A missing BM25 or filter index (artifacts prepared before they existed) is built once from the chunks.
+    @staticmethod
+    def _load_artifacts(out_dir: str, load_args: dict) -> tuple:
+        chunks, embeddings, index = Base.load_prepared(out_dir, **load_args)
+        manifest_path = os.path.join(out_dir, Constants.MANIFEST_JSON)
+        manifest = Utils.load_manifest(manifest_path) if os.path.exists(manifest_path) else {}
+        model_name = manifest.get("params", {}).get("EMBED_MODEL_NAME", Constants.EMBED_MODEL_NAME)
+        lexical = None
+        if Constants.LEXICAL_INDEX:
+            lexical_dir = os.path.join(out_dir, Constants.LEXICAL_DIR)
+            lexical = LexicalIndex.load(lexical_dir)
+            if lexical is None or len(lexical) != len(chunks):
+                lexical = LexicalIndex.build(chunks).save(lexical_dir)
+        filters = None
+        if Constants.FILTER_INDEX:
+            filter_dir = os.path.join(out_dir, Constants.FILTER_DIR)
+            filters = FilterIndex.load(filter_dir)
+            if filters is None or len(filters) != len(chunks):
+                filters = FilterIndex.build(chunks).save(filter_dir)
+        return chunks, index, lexical, filters, embeddings, model_name, manifest
+
+    @staticmethod
+    def _stat_manifest(out_dir: str):
+        try:
+            st = os.stat(os.path.join(out_dir, Constants.MANIFEST_JSON))
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    #-------------------------
+    # True once a manifest other than the loaded one was published (stat checked at most every
+    # MANIFEST_CHECK_SECONDS). The manifest is written last, so its new chunks and index are complete.
+    #------------------------
+    def _manifest_published(self) -> bool:
+        now = time.monotonic()
+        if self.out_dir is not None and now >= self._next_check:
+            self._next_check = now + Constants.MANIFEST_CHECK_SECONDS
+            self._published = Retriever._stat_manifest(self.out_dir) != self._manifest_sig
+        return self._published
+
+    #-------------------------
+    # Reload the artifacts after a new manifest was published. Returns True after a reload.
+    #------------------------
+    def refresh(self, force: bool = False) -> bool:
+        if self.out_dir is None or not (force or self._manifest_published()):
+            return False
+        sig = Retriever._stat_manifest(self.out_dir)
+        chunks, index, lexical, filters, embeddings, model_name, manifest = Retriever._load_artifacts(
+            self.out_dir, self._load_args)
+        self._set_artifacts(chunks, index, lexical, filters, embeddings, model_name, manifest)
+        self._manifest_sig = sig
+        self._published = False
+        print(f"[serve] manifest changed in {self.out_dir}: reloaded {index.ntotal} vectors")
+        return True
+
+
+    #-------------------------
+    # Text actually encoded for a query (prefix + normalize_vi); also the cache key.
+    #------------------------
+    def query_text(self, query: str) -> str:
+        return TextNormalizer.normalize_vi(self.query_prefix + query)
+
+    #-------------------------
+    # Unit-length float32 query vectors (the index holds L2-normalized passages, searched by inner product).
+    # Cached vectors are reused; the rest are encoded in one call.
+    #------------------------
+    def encode(self, queries: list) -> np.ndarray:
+        texts = [self.query_text(q) for q in queries]
+        cached = [self.cache.get_embedding(t) for t in texts] if self.cache is not None else [None] * len(texts)
+        missing = [i for i, vec in enumerate(cached) if vec is None]
+        if missing:
+            new = Embedder.embed_queries([texts[i] for i in missing], model_name=self.model_name, normalize=False)
+            new = np.ascontiguousarray(new, dtype=np.float32)
+            faiss.normalize_L2(new)
+            for i, vec in zip(missing, new):
+                cached[i] = vec
+                if self.cache is not None:
+                    self.cache.put_embedding(texts[i], vec)
+        return np.ascontiguousarray(np.vstack(cached), dtype=np.float32)
+
+
+    #-------------------------
+    # Hits from the result cache only, or None (lets the service answer repeated queries without
+    # queueing behind a running batch). Once a new manifest is out, queries go through search_batch,
+    # which reloads the artifacts.
+    #------------------------
+    def lookup(self, query: str, k: int = Constants.SERVE_TOP_K, mode: str = None, filters: dict = None):
+        if self.cache is None or self._manifest_published():
+            return None
+        chunks, _, lexical, _, _, version = self._state
+        mode = self._mode(mode, lexical)
+        filters = self._filters(filters)
+        cached = self.cache.get_results(QueryCache.result_key(self.query_text(query), k, filters, version, mode),
+                                        count_miss=False)
+        return None if cached is None else self._hits(chunks, *cached)
+
+
+    @staticmethod
+    def _mode(mode: str, lexical: LexicalIndex) -> str:
+        mode = mode or Constants.SEARCH_MODE
+        if mode not in ("hybrid", "vector", "lexical"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        return mode if lexical is not None else "vector"
+
+    # {field: sorted values}, without empty entries; None when nothing is filtered
+    @staticmethod
+    def _filters(filters: dict):
+        normalized = {}
+        for field, values in (filters or {}).items():
+            if field not in Constants.FILTER_FIELDS:
+                raise ValueError(f"Unknown filter field: {field} "
+                                 f"(expected one of {', '.join(Constants.FILTER_FIELDS)})")
+            if values is None:
+                continue
+            values = [values] if isinstance(values, (str, int)) else values
+            if values:
+                normalized[field] = sorted({str(v) for v in values})
+        return normalized or None
+
+    #-------------------------
+    # One ranked hit list per query. k is one value for all queries or a list with one per query.
+    # Queries that need the encoder share one encode call and one FAISS search (at the largest k, or at
+    # HYBRID_CANDIDATES when fusing). filters apply to the whole batch.
+    #------------------------
+    def search_batch(self, queries: list, k=Constants.SERVE_TOP_K, mode: str = None, filters: dict = None) -> list:
+        if not queries:
+            return []
+        self.refresh()
+        chunks, index, lexical, filter_index, embeddings, version = self._state
+        mode = self._mode(mode, lexical)
+        filters = self._filters(filters)
+        bitmap = None
+        if filters:
+            if filter_index is None:
+                raise ValueError("Filtered search needs the filter index (FILTER_INDEX)")
+            bitmap = filter_index.select(filters)
+        ks = list(k) if isinstance(k, (list, tuple)) else [k] * len(queries)
+        k_search = max(1, min(max(ks), int(index.ntotal) or 1))
+        if mode == "hybrid":
+            k_search = max(k_search, min(Constants.HYBRID_CANDIDATES, int(index.ntotal) or 1))
+        ranked = [None] * len(queries)
+        keys = [None] * len(queries)
+        if self.cache is not None:
+            for i, q in enumerate(queries):
+                keys[i] = QueryCache.result_key(self.query_text(q), ks[i], filters, version, mode)
+                ranked[i] = self.cache.get_results(keys[i])
+        todo = [i for i, r in enumerate(ranked) if r is None]
+
+        lexical_hits = {}
+        if mode != "vector":
+            mask = filter_index.mask(bitmap) if bitmap is not None else None
+            for i in todo:
+                lexical_hits[i] = lexical.search(queries[i], k_search, mask)
+        # name queries with BM25 hits are answered lexically; everything else goes through the encoder
+        vector_todo = [i for i in todo if mode == "vector"
+                       or (mode == "hybrid" and not (lexical_hits[i][0].size and lexical.is_name(queries[i])))]
+        vector_hits = {}
+        if vector_todo:
+            scores, rows = self._vector_search(index, embeddings, self.encode([queries[i] for i in vector_todo]),
+                                               k_search, filter_index, bitmap)
+            for j, i in enumerate(vector_todo):
+                vector_hits[i] = (rows[j], scores[j])
+
+        for i in todo:
+            if i in vector_hits and i in lexical_hits:
+                rows, scores = Retriever.rrf([vector_hits[i], lexical_hits[i]])
+            else:
+                rows, scores = vector_hits.get(i) or lexical_hits[i]
+            ranked[i] = (rows[:ks[i]], scores[:ks[i]])
+            if self.cache is not None:
+                self.cache.put_results(keys[i], ranked[i])
+        return [self._hits(chunks, rows, scores) for rows, scores in ranked]
+
+    #-------------------------
+    # FAISS search, restricted to the rows set in bitmap when given. Returns (scores, rows) like
+    # index.search, padded with row -1.
+    #------------------------
+    @staticmethod
+    def _vector_search(index, embeddings, x: np.ndarray, k: int, filter_index: FilterIndex = None,
+                       bitmap: np.ndarray = None) -> tuple:
+        if bitmap is None:
+            return index.search(x, k)
+        selected = filter_index.rows(bitmap)
+        if selected.size == 0:
+            return np.zeros((x.shape[0], k), dtype=np.float32), np.full((x.shape[0], k), -1, dtype=np.int64)
+        if (embeddings is not None and selected.size <= Constants.FILTER_EXACT_MAX_ROWS
+                and Indexer.describe(index)["type"] != "flat"):
+            sims = x @ np.asarray(embeddings[selected], dtype=np.float32).T
+            top = min(k, selected.size)
+            order = np.argpartition(-sims, top - 1, axis=1)[:, :top]
+            order = np.take_along_axis(order, np.argsort(-np.take_along_axis(sims, order, axis=1), axis=1), axis=1)
+            scores = np.zeros((x.shape[0], k), dtype=np.float32)
+            rows = np.full((x.shape[0], k), -1, dtype=np.int64)
+            scores[:, :top] = np.take_along_axis(sims, order, axis=1)
+            rows[:, :top] = selected[order]
+            return scores, rows
+        return index.search(x, k, params=Indexer.search_params(index, faiss.IDSelectorBitmap(bitmap)))
+
+    #-------------------------
+    # Reciprocal rank fusion of (rows, scores) rankings; returns fused (rows, scores), best first.
+    #------------------------
+    @staticmethod
+    def rrf(rankings: list, k: int = Constants.RRF_K) -> tuple:
+        fused = {}
+        for rows, _ in rankings:
+            for rank, row in enumerate(rows.tolist()):
+                if row >= 0:
+                    fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank + 1)
+        order = sorted(fused, key=fused.get, reverse=True)
+        return np.asarray(order, dtype=np.int64), np.asarray([fused[row] for row in order], dtype=np.float32)
+
+    def _hits(self, chunks, rows: np.ndarray, scores: np.ndarray) -> list:
+        hits = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            if row < 0:
+                continue
+            chunk = chunks[row]
+            if chunk.get("deleted"):
+                continue
+            hit = {"row": row, "score": score, "text": chunk.get("text")}
+            hit.update({key: chunk.get(key) for key in self.HIT_FIELDS})
+            hits.append(hit)
+        return hits
+
+
+class MicroBatcher:
+    """Coalesces concurrent search requests into batches for one search_fn(queries, k) call.
+
+    The first waiting request opens a batch; requests arriving within max_wait_ms (or while the
+    previous batch is still running) join it, up to max_batch. search_fn runs on a single worker thread,
+    so the event loop keeps accepting requests while a batch is encoded and searched, and one model
+    never runs two batches at once. search_fn receives one k per query; requests with different
+    options (keyword arguments of submit, e.g. mode or filters) are searched in separate calls.
+    """
+
+    def __init__(self, search_fn, max_batch: int = Constants.SERVE_MAX_BATCH,
+                 max_wait_ms: float = Constants.SERVE_MAX_WAIT_MS):
+        self.search_fn = search_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = {"requests": 0, "batches": 0, "max_batch_seen": 0, "busy_seconds": 0.0}
+        self._queue = None
+        self._task = None
+        self._getter = None
+        self._executor = None
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrieval")
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            if self._getter is not None:
+                self._getter.cancel()
+                self._getter = None
+            self._task = None
+            self._executor.shutdown(wait=True)
+
+    #-------------------------
+    # Queue one query and wait for its hits.
+    #------------------------
+    async def submit(self, query: str, k: int = Constants.SERVE_TOP_K, **options) -> list:
+        if self._task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, k, options, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._next(None)]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if self._getter is None and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            item = await self._next(max(0.0, deadline - asyncio.get_running_loop().time()))
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    async def _next(self, timeout):
+        # the pending get survives a timeout and is reused, so no request is lost when the wait expires
+        if self._getter is None:
+            self._getter = asyncio.ensure_future(self._queue.get())
+        done, _ = await asyncio.wait({self._getter}, timeout=timeout)
+        if not done:
+            return None
+        item = self._getter.result()
+        self._getter = None
+        return item
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            groups = {}
+            for item in batch:
+                if not item[3].cancelled():
+                    groups.setdefault(json.dumps(item[2], sort_keys=True), []).append(item)
+            for group in groups.values():
+                await self._search(group)
+
+    async def _search(self, group: list):
+        queries = [query for query, _, _, _ in group]
+        ks = [k for _, k, _, _ in group]
+        t0 = time.perf_counter()
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(self.search_fn, queries, ks, **group[0][2]))
+        except Exception as e:
+            for _, _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.stats["busy_seconds"] += time.perf_counter() - t0
+        self.stats["requests"] += len(group)
+        self.stats["batches"] += 1
+        self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(group))
+        for (_, _, _, future), hits in zip(group, results):
+            if not future.done():
+                future.set_result(hits)
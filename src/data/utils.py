@@ -7,6 +7,8 @@ import time
 import hashlib
 import unicodedata
 
+from .constants import Constants
+
 class Utils:
 
 
@@ -20,21 +22,29 @@ class Utils:
 
 # -----------------------
 # Returns the full hex digest of the file’s contents, basically detect if the pdf changes.
+# algo is any hashlib algorithm; the buffer is reused so large scans do not churn memory.
 # -----------------------
     @staticmethod
-    def file_sha1(path: str, chunk_size: int = 8 * 1024 * 1024) -> str:
-        h = hashlib.sha1()
-        with open(path, "rb") as f:
+    def file_digest(path: str, algo: str = Constants.FILE_DIGEST, chunk_size: int = 8 * 1024 * 1024) -> str:
+        h = hashlib.new(algo)
+        buf = bytearray(chunk_size)
+        view = memoryview(buf)
+        with open(path, "rb", buffering=0) as f:
             while True:
-                chunk = f.read(chunk_size)
-                if not chunk:
+                n = f.readinto(buf)
+                if not n:
                     break
-                h.update(chunk)
+                h.update(view[:n])
         return h.hexdigest()
 
+    @staticmethod
+    def file_sha1(path: str, chunk_size: int = 8 * 1024 * 1024) -> str:
+        return Utils.file_digest(path, "sha1", chunk_size)
+
 
 # -----------------------
 # Clean OCR text 
+# Reference version; pipeline code uses TextNormalizer.clean_ocr (same output, faster).
 # -----------------------
     @staticmethod
     def clean_ocr_text(text: str) -> str:
@@ -46,6 +56,7 @@ class Utils:
 
 # -----------------------
 # Normalize vietnamese
+# Reference version; pipeline code uses TextNormalizer.normalize_vi(_batch) (same output, faster).
 # -----------------------
     @staticmethod
     def normalize_vi_text(s: str) -> str:
@@ -88,13 +99,32 @@ class Utils:
         return items
 
 
+# -----------------------
+# Wrap a raw row-major matrix file into a .npy file, copying in blocks so memory stays bounded.
+# -----------------------
+    @staticmethod
+    def raw_to_npy(raw_path: str, npy_path: str, n_rows: int, dim: int, dtype: str = "float32",
+                   block_size: int = 8 * 1024 * 1024):
+        import numpy as np
+        header = {"descr": np.dtype(dtype).str, "fortran_order": False, "shape": (n_rows, dim)}
+        with open(npy_path, "wb") as out, open(raw_path, "rb") as src:
+            np.lib.format.write_array_header_1_0(out, header)
+            while True:
+                block = src.read(block_size)
+                if not block:
+                    break
+                out.write(block)
+
+
 # -----------------------
 # Save the manifest dictionary to a JSON file (pretty-printed).
 # -----------------------
     @staticmethod
     def save_manifest(path: str, manifest: dict):
-        with open(path, "w", encoding="utf-8") as f:
+        # written to a temp file and swapped in: a running service treats a new manifest as "artifacts ready"
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
             json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(path + ".tmp", path)
 
 
 # -----------------------
@@ -109,25 +139,30 @@ class Utils:
 
 # -----------------------
 # Create a manifest dict capturing PDF info, wiki titles, parameters, and a timestamp.
+# digests ({abspath: digest}, e.g. from FingerprintCache) skips hashing here; the per-PDF field keeps
+# its historical name "sha1" and "digest" records which algorithm produced it.
 # -----------------------
     @staticmethod
-    def make_manifest(pdf_paths: list, wiki_titles: list, params: dict) -> dict:
+    def make_manifest(pdf_paths: list, wiki_titles: list, params: dict, digests: dict = None,
+                      algo: str = Constants.FILE_DIGEST) -> dict:
         pdf_infos = []
         for p in sorted(pdf_paths):
             if not os.path.exists(p):
                 continue
             st = os.stat(p)
+            path = os.path.abspath(p)
             pdf_infos.append({
-                "path": os.path.abspath(p),
+                "path": path,
                 "name": os.path.basename(p),
                 "size": st.st_size,
                 "mtime": st.st_mtime,
-                "sha1": Utils.file_sha1(p)
+                "sha1": digests[path] if digests and path in digests else Utils.file_digest(p, algo)
             })
         manifest = {
             "pdfs": pdf_infos,
             "wiki_titles": sorted(wiki_titles or []),
             "params": params,
+            "digest": algo,
             "timestamp": time.time()
         }
         return manifest
@@ -142,13 +177,17 @@ class Utils:
             return {"diff": True, "reason": "no previous manifest"}
         if old.get("params", {}) != new.get("params", {}):
             return {"diff": True, "reason": "params changed"}
+        if old.get("digest", "sha1") != new.get("digest", "sha1"):
+            # fingerprints from different algorithms cannot be compared
+            return {"diff": True, "reason": "digest changed"}
         old_shas = {p["sha1"] for p in old.get("pdfs", [])}
         new_shas = {p["sha1"] for p in new.get("pdfs", [])}
         removed = old_shas - new_shas
         added = new_shas - old_shas
         wiki_changed = set(old.get("wiki_titles", [])) != set(new.get("wiki_titles", []))
         if removed:
-            return {"diff": True, "reason": "removed_or_changed_files", "removed": list(removed)}
+            return {"diff": True, "reason": "removed_or_changed_files", "removed": list(removed),
+                    "added": list(added), "wiki_changed": wiki_changed}
         if added or wiki_changed:
             return {"diff": True, "reason": "added_files_or_wiki", "added": list(added), "wiki_changed": wiki_changed}
         return {"diff": False, "reason": "no_change"}
@@ -0,0 +1,201 @@
+#wiki_api.py
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import Constants
+from .http_client import HttpClient
+from .ingestion import Ingestion
+from .normalizer import TextNormalizer
+
+
+class WikiApi:
+    """Batched MediaWiki API backend for wiki ingestion.
+
+    One action=query request covers up to WIKI_API_BATCH titles and returns the plain-text extract
+    (extracts, explaintext; the same text the wikipedia library's page.content returns), the lead image
+    (pageimages), canonical URLs (info), redirects and disambiguation flags. Whole-page extracts come
+    one page per response, so the API's continuation is followed within each batch.
+
+    IUCN status is read like the library path does it: from the infobox HTML with
+    Ingestion._extract_iucn_from_html (here the rendered lead section, action=parse section=0, which
+    holds the infobox), then for vi pages without an infobox status from the "Bảng phân loại" wikitext
+    (one batched revisions query). Output has the same shape and fields as Ingestion.fetch_wikipedia_titles.
+    """
+
+    #-------------------------
+    # API endpoint for a language edition (Constants.WIKI_API_URL overrides it, e.g. a local fixture server).
+    #------------------------
+    @staticmethod
+    def api_url(lang: str = "vi") -> str:
+        return Constants.WIKI_API_URL or f"https://{lang}.wikipedia.org/w/api.php"
+
+
+    #-------------------------
+    # Fetch pages for titles, in input order. Titles that are missing or disambiguation pages
+    # fall back to the top search hit (one search request each), like the wikipedia-library path.
+    #------------------------
+    @staticmethod
+    def fetch_titles(titles: list, lang: str = "vi", batch_size: int = Constants.WIKI_API_BATCH,
+                     api_url: str = None, workers: int = Constants.WIKI_FETCH_WORKERS) -> list:
+        api_url = api_url or WikiApi.api_url(lang)
+        titles = list(dict.fromkeys(titles or []))
+        found = WikiApi._query_pages(titles, api_url, batch_size)
+
+        retry = {}
+        for title in titles:
+            if title not in found:
+                hit = WikiApi._search_top_hit(title, api_url)
+                if hit and hit != title:
+                    retry[title] = hit
+        if retry:
+            found_retry = WikiApi._query_pages(list(dict.fromkeys(retry.values())), api_url, batch_size)
+            for title, hit in retry.items():
+                if hit in found_retry:
+                    found[title] = found_retry[hit]
+
+        infos = list({info["title"]: info for info in found.values()}.values())
+        WikiApi._add_iucn(infos, api_url, lang, batch_size, workers)
+        pages = []
+        for title in titles:
+            info = found.get(title)
+            if info is None:
+                continue
+            pages.append(WikiApi._to_page(info, lang))
+        return pages
+
+
+    #-------------------------
+    # Query titles in batches. Returns {input_title: page_info} for pages that exist and are not
+    # disambiguation pages; follows normalization/redirects and the API's continuation.
+    #------------------------
+    @staticmethod
+    def _query_pages(titles: list, api_url: str, batch_size: int) -> dict:
+        out = {}
+        for i in range(0, len(titles), batch_size):
+            batch = titles[i:i + batch_size]
+            params = {
+                "action": "query",
+                "format": "json",
+                "formatversion": "2",
+                "redirects": "1",
+                "prop": "extracts|pageimages|info|pageprops",
+                "explaintext": "1",
+                "exlimit": "max",
+                "piprop": "original",
+                "inprop": "url",
+                "ppprop": "disambiguation",
+                "titles": "|".join(batch),
+            }
+            by_title, alias = WikiApi._query_all(api_url, params)
+            for title in batch:
+                info = by_title.get(WikiApi._resolve(title, alias))
+                if info and not info.get("disambiguation") and "extract" in info:
+                    out[title] = info
+        return out
+
+    # Run one query to completion (following "continue"); returns ({title: page_info}, {from: to}).
+    @staticmethod
+    def _query_all(api_url: str, params: dict) -> tuple:
+        by_title = {}
+        alias = {}
+        cont = {}
+        while True:
+            data = HttpClient.get(api_url, params={**params, **cont}).json()
+            query = data.get("query", {})
+            for entry in query.get("normalized", []) + query.get("redirects", []):
+                alias[entry["from"]] = entry["to"]
+            for page in query.get("pages", []):
+                if page.get("missing") or page.get("invalid"):
+                    continue
+                info = by_title.setdefault(page["title"], {"title": page["title"]})
+                if "fullurl" in page:
+                    info["url"] = page["fullurl"]
+                if "original" in page:
+                    info["image"] = page["original"].get("source")
+                if "disambiguation" in page.get("pageprops", {}):
+                    info["disambiguation"] = True
+                if "extract" in page:
+                    info["extract"] = page["extract"]
+                revs = page.get("revisions") or []
+                if revs:
+                    info["wikitext"] = revs[0].get("slots", {}).get("main", {}).get("content", "")
+            if "continue" not in data:
+                return by_title, alias
+            cont = data["continue"]
+
+    @staticmethod
+    def _resolve(title: str, alias: dict) -> str:
+        # normalized -> redirect chains are short; guard against loops anyway
+        for _ in range(4):
+            if title not in alias:
+                break
+            title = alias[title]
+        return title
+
+
+    @staticmethod
+    def _search_top_hit(title: str, api_url: str):
+        try:
+            data = HttpClient.get(api_url, params={"action": "query", "format": "json", "formatversion": "2",
+                                                   "list": "search", "srsearch": title, "srlimit": "1"}).json()
+        except Exception:
+            return None
+        hits = data.get("query", {}).get("search", [])
+        return hits[0]["title"] if hits else None
+
+
+    #-------------------------
+    # IUCN status per page, set as info["iucn"] = (iucn_text, iucn_code): infobox of the rendered lead
+    # section first (workers concurrent parse requests, capped per host by HttpClient), then for vi pages
+    # without one the "Bảng phân loại" wikitext of all of them in one batched revisions query.
+    #------------------------
+    @staticmethod
+    def _add_iucn(infos: list, api_url: str, lang: str, batch_size: int, workers: int):
+        if not infos:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            htmls = list(executor.map(lambda info: WikiApi._lead_html(info["title"], api_url), infos))
+        for info, html in zip(infos, htmls):
+            info["iucn"] = Ingestion._extract_iucn_from_html(html)
+        if lang != "vi":
+            return
+        todo = [info for info in infos if info["iucn"] == (None, None)]
+        for i in range(0, len(todo), batch_size):
+            batch = todo[i:i + batch_size]
+            by_title, _ = WikiApi._query_all(api_url, {
+                "action": "query", "format": "json", "formatversion": "2", "prop": "revisions",
+                "rvprop": "content", "rvslots": "main", "titles": "|".join(info["title"] for info in batch)})
+            for info in batch:
+                info["iucn"] = Ingestion._extract_iucn_from_wikitext(by_title.get(info["title"], {}).get("wikitext"))
+
+    @staticmethod
+    def _lead_html(title: str, api_url: str):
+        try:
+            data = HttpClient.get(api_url, params={"action": "parse", "format": "json", "formatversion": "2",
+                                                   "page": title, "prop": "text", "section": "0",
+                                                   "disableeditsection": "1"}).json()
+        except Exception:
+            return None
+        return data.get("parse", {}).get("text")
+
+
+    #-------------------------
+    # Build the same page dict as Ingestion._fetch_wiki_page.
+    #------------------------
+    @staticmethod
+    def _to_page(info: dict, lang: str) -> dict:
+        image_url = Ingestion._select_wikipedia_image(SimpleNamespace(images=[info["image"]] if info.get("image") else []))
+        iucn_text, iucn_code = info.get("iucn", (None, None))
+        page_text = TextNormalizer.clean_ocr(info.get("extract", ""))
+        if iucn_text:
+            page_text = f"IUCN conservation status: {iucn_text}\n\n{page_text}"
+        return {
+            "page": 1,
+            "text": page_text,
+            "source": "wiki",
+            "url": info.get("url") or Ingestion.page_url_from_title(info["title"], lang=lang),
+            "title": info["title"],
+            "image_url": image_url,
+            "iucn_text": iucn_text,
+            "iucn_code": iucn_code,
+        }